@@ -36,6 +36,7 @@ CTF通知插件
 项目地址: https://github.com/Y09urt/A1CTF_
 """
 
+import asyncio
 import logging
 from nonebot.plugin import PluginMetadata
 
@@ -86,6 +87,47 @@ try:
 except ImportError as e:
     logger.error(f"CTF通知插件处理器加载失败: {e}")
 
+# 启动时初始化A1CTF客户端(传入 A1CTF_CLIENT_CONFIG), 并按 AUTO_START 开始监控
+# 登录需要求解验证码并访问平台, 在后台任务中进行, 平台不可达时不拖慢或阻塞机器人启动
+try:
+    from nonebot import get_driver
+    from .config import A1CTF_BASE_URL, A1CTF_USERNAME, A1CTF_PASSWORD, A1CTF_CLIENT_CONFIG, AUTO_START
+    from .a1ctf_client import initialize_a1ctf_client, close_a1ctf_client
+    from .notice_monitor import start_notice_monitor, stop_notice_monitor
+    from . import notice_monitor
+
+    driver = get_driver()
+    _startup_task = None
+
+    async def _initialize_plugin():
+        client = await initialize_a1ctf_client(
+            A1CTF_BASE_URL, A1CTF_USERNAME, A1CTF_PASSWORD, **A1CTF_CLIENT_CONFIG
+        )
+        if client and AUTO_START:
+            await start_notice_monitor()
+
+    def _log_startup_failure(task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"CTF通知插件初始化失败: {task.exception()}")
+
+    @driver.on_startup
+    async def _start_plugin():
+        global _startup_task
+        _startup_task = asyncio.create_task(_initialize_plugin())
+        _startup_task.add_done_callback(_log_startup_failure)
+
+    @driver.on_shutdown
+    async def _shutdown_plugin():
+        if _startup_task and not _startup_task.done():
+            _startup_task.cancel()
+            await asyncio.gather(_startup_task, return_exceptions=True)
+        await stop_notice_monitor()
+        await close_a1ctf_client()
+        if notice_monitor.notice_store:
+            notice_monitor.notice_store.close()
+except ImportError as e:
+    logger.error(f"CTF通知插件启动任务注册失败: {e}")
+
 # 导入配置
 try:
     from .config import A1CTF_CONFIG, MONITOR_CONFIG, FEATURES
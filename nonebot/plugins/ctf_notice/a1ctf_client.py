@@ -1,65 +1,313 @@
 import asyncio
 import aiohttp
-import json
 import hashlib
+import json
+import os
 import time
 import logging
+from collections import deque
 from functools import wraps
+from yarl import URL
+
+from .response_cache import ResponseCache
+from .rate_limiter import AsyncTokenBucket
+from .request_tracing import RequestPhaseTracer
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, STATE_CLOSED
+from .json_codec import JSON_DECODER_AUTO, resolve_json_loads
+from .captcha_solver import (
+    SOLVER_MODE_PROCESS,
+    solve_challenge, solve_challenge_in_executor, create_solver_executor
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+}
+
+# TCPConnector 默认参数, 可通过 connector_options 覆盖
+DEFAULT_CONNECTOR_OPTIONS = {
+    "limit": 20,                # 连接池总连接数上限
+    "limit_per_host": 8,        # 单个主机的连接数上限
+    "ttl_dns_cache": 300,       # DNS缓存时间(秒)
+    "keepalive_timeout": 60,    # 空闲连接保持时间(秒)
+}
+
+# 端点分类: 类别 -> URL中的路径片段列表, 用于熔断器、限流等按端点区分的功能; 未匹配的URL归为 "other"
+DEFAULT_ENDPOINT_PATTERNS = {
+    "notices": ["/notices"],
+    "scoreboard": ["/scoreboard"],
+    "auth": ["/api/auth/", "/api/cap/", "/api/account/"],
+}
+
+# 会话级 ClientTimeout 默认参数(秒), 可通过 timeout_options 覆盖
+DEFAULT_TIMEOUT_OPTIONS = {
+    "total": 30,
+    "connect": 10,
+    "sock_read": 20,
+}
+
 def retry_on_401(func):
     @wraps(func)
     async def wrapper(client, *args, **kwargs):
+        generation = client.login_generation
         try:
             return await func(client, *args, **kwargs)
         except aiohttp.ClientResponseError as e:
             if e.status == 401:
                 logger.warning("🚨 Received 401 Unauthorized. Attempting to re-login...")
-                await client.login()
+                await client.relogin(generation)
                 logger.info("🔁 Re-attempting the request after re-login...")
                 return await func(client, *args, **kwargs)
             else:
                 raise
     return wrapper
 
+class CaptchaTokenPool:
+    """
+    预先求解的验证码token池
+
+    后台任务保持池中有 size 个在 ttl 内有效的已兑换验证码token, 登录时直接取用,
+    取走后自动补充。ttl 应略小于服务端允许的验证码token有效期。
+    """
+
+    def __init__(self, solve, size=1, ttl=240, retry_delay=10):
+        self._solve = solve            # 返回验证码token(或None)的协程函数
+        self.size = size
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.hits = 0
+        self.misses = 0
+        self._tokens = deque()         # [(token, 求解完成时间)]
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._tokens.clear()
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        while self._tokens and now - self._tokens[0][1] >= self.ttl:
+            self._tokens.popleft()
+
+    def take(self):
+        """取出一个有效token, 池为空时返回None; 无论命中与否都会唤醒补充任务"""
+        if self._task is None:
+            return None
+        self._drop_expired()
+        self._wakeup.set()
+        if self._tokens:
+            self.hits += 1
+            return self._tokens.popleft()[0]
+        self.misses += 1
+        return None
+
+    def ready_count(self):
+        """当前可用的token数量"""
+        self._drop_expired()
+        return len(self._tokens)
+
+    async def _run(self):
+        while True:
+            self._drop_expired()
+            if len(self._tokens) < self.size:
+                token = await self._solve()
+                if token:
+                    self._tokens.append((token, time.monotonic()))
+                    logger.debug(f"🧩 Captcha pool refilled ({len(self._tokens)}/{self.size})")
+                else:
+                    await asyncio.sleep(self.retry_delay)
+                continue
+
+            # 池已满: 等到最早的token过期, 或有token被取走
+            timeout = self._tokens[0][1] + self.ttl - time.monotonic()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
 class A1CTFClient:
-    def __init__(self, base_url, username, password):
+    def __init__(self, base_url, username, password, solver_mode=SOLVER_MODE_PROCESS, solver_workers=None,
+                 token_store_path=None, token_check_path="/api/account/profile",
+                 captcha_pool_size=0, captcha_pool_ttl=240,
+                 headers=None, connector_options=None, timeout_options=None,
+                 cache_ttls=None, cache_max_entries=128, json_decoder=JSON_DECODER_AUTO,
+                 endpoint_patterns=None, retry_options=None, breaker_options=None, rate_limits=None,
+                 slow_phase_thresholds=None):
         self.base_url = base_url
         self.username = username
         self.password = password
-        self.session = aiohttp.ClientSession(headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
-        })
+        self.token_store_path = token_store_path
+        self.token_check_path = token_check_path
+        self.token_obtained_at = None
+        self.token_lifetime = None    # 观察到的token有效期(秒), 首次收到401时记录
+        self.solver_mode = solver_mode
+        self.solver_workers = solver_workers
+        self._solver_executor = None
+        self.last_solve_timings = []  # 最近一次验证码各子挑战耗时 [(编号, 耗时)]
+        self.captcha_pool = (
+            CaptchaTokenPool(self._solve_captcha, size=captcha_pool_size, ttl=captcha_pool_ttl)
+            if captcha_pool_size > 0 else None
+        )
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.connector_options = {**DEFAULT_CONNECTOR_OPTIONS, **(connector_options or {})}
+        self.timeout_options = {**DEFAULT_TIMEOUT_OPTIONS, **(timeout_options or {})}
+        self.timeout = aiohttp.ClientTimeout(**self.timeout_options)
+        self._session = None
+        # 条件请求缓存: url+查询参数 -> {"etag", "last_modified", "body_hash", "payload"}
+        self._validators = {}
+        self._unchanged = {}          # url -> 最近一次GET请求(不论查询参数)是否返回了与上次相同的数据
+        self.not_modified_hits = 0    # 服务端返回304的次数
+        self.body_hash_hits = 0       # 无校验头时响应体哈希未变化的次数
+        self.response_cache = ResponseCache(cache_ttls, max_entries=cache_max_entries)
+        self._json_loads = resolve_json_loads(json_decoder)
+        self.endpoint_patterns = endpoint_patterns or DEFAULT_ENDPOINT_PATTERNS
+        self.retry_policy = RetryPolicy(**(retry_options or {}))
+        self.breaker_options = breaker_options or {}
+        self.breakers = {}            # 端点类别 -> CircuitBreaker
+        self.tracer = RequestPhaseTracer(self.endpoint_for, slow_thresholds=slow_phase_thresholds)
+        # 端点类别 -> 令牌桶, 未配置的类别不限流
+        self.rate_limiters = {
+            endpoint: AsyncTokenBucket(**options) for endpoint, options in (rate_limits or {}).items()
+        }
         self.token = None
+        self.login_generation = 0     # 每次登录成功加一, 用于判断token是否已被刷新
+        self.coalesced_logins = 0     # 因合并而避免的登录次数
+        self._login_task = None
+
+    @property
+    def session(self):
+        """在运行中的事件循环内惰性创建会话, 会话关闭后再次访问会重新创建"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.connector_options),
+                headers=self.headers,
+                timeout=self.timeout,
+                trace_configs=[self.tracer.trace_config()],
+            )
+        return self._session
 
     async def close_session(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
-
-    def _fnv1a_32(self, data):
-        FNV_OFFSET_BASIS_32 = 0x811c9dc5
-        FNV_PRIME_32 = 0x01000193
-        hash_value = FNV_OFFSET_BASIS_32
-        for byte in data.encode('utf-8'):
-            hash_value ^= byte
-            hash_value = (hash_value * FNV_PRIME_32) & 0xffffffff
-        return hash_value
-
-    def _prng(self, seed, length):
-        state = self._fnv1a_32(seed)
-        result = ""
-        while len(result) < length:
-            state ^= (state << 13) & 0xffffffff
-            state ^= (state >> 17) & 0xffffffff  
-            state ^= (state << 5) & 0xffffffff
-            result += f"{state:08x}"
-        return result[:length]
+        if self.captcha_pool:
+            await self.captcha_pool.stop()
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self._solver_executor:
+            self._solver_executor.shutdown(wait=False, cancel_futures=True)
+            self._solver_executor = None
+
+    def _save_token(self):
+        """将a1token及其观察到的有效期写入本地文件"""
+        if not self.token_store_path or not self.token:
+            return
+        state = {
+            "base_url": self.base_url,
+            "username": self.username,
+            "token": self.token,
+            "obtained_at": self.token_obtained_at,
+            "lifetime": self.token_lifetime,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.token_store_path) or ".", exist_ok=True)
+            tmp_path = f"{self.token_store_path}.tmp"
+            # token等同于登录凭据, 只允许属主读写
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o600)    # 遗留的临时文件不受创建模式影响
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.token_store_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to persist token: {e}")
+
+    def _load_token(self):
+        """读取本地保存的token, 不存在或不属于当前账号时返回None"""
+        if not self.token_store_path or not os.path.exists(self.token_store_path):
+            return None
+        try:
+            with open(self.token_store_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Failed to read saved token: {e}")
+            return None
+        if state.get("base_url") != self.base_url or state.get("username") != self.username:
+            return None
+        return state
+
+    def _set_token(self, token, obtained_at):
+        self.token = token
+        self.token_obtained_at = obtained_at
+        self.login_generation += 1
+
+    def _note_token_rejected(self):
+        """token被拒绝时记录其实际存活时长, 作为下次冷启动判断的依据"""
+        if self.token_obtained_at is None:
+            return
+        lifetime = time.time() - self.token_obtained_at
+        if self.token_lifetime is None or lifetime < self.token_lifetime:
+            self.token_lifetime = lifetime
+            logger.info(f"⏱️ Observed token lifetime: {lifetime:.0f}s")
+            self._save_token()
+
+    async def restore_token(self):
+        """
+        尝试恢复上次保存的token
+
+        用一次轻量请求验证token, 有效则跳过验证码登录; 被拒绝或已超过观察到的有效期时返回False。
+        """
+        state = self._load_token()
+        if not state or not state.get("token"):
+            return False
+
+        obtained_at = state.get("obtained_at") or 0
+        lifetime = state.get("lifetime")
+        self.token_lifetime = lifetime
+        if lifetime is not None and time.time() - obtained_at >= lifetime:
+            logger.info("⌛ Saved token is past its observed lifetime, skipping validation")
+            return False
+
+        self.session.cookie_jar.update_cookies({"a1token": state["token"]}, response_url=URL(self.base_url))
+        check_url = f"{self.base_url}{self.token_check_path}"
+        try:
+            await self._throttle("auth")
+            async with self.session.get(check_url) as response:
+                if response.status == 200:
+                    self._set_token(state["token"], obtained_at)
+                    logger.info("✅ Restored saved token, captcha login skipped")
+                    return True
+                logger.info(f"🔑 Saved token rejected ({response.status}), falling back to captcha login")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to validate saved token: {e}")
+        self.session.cookie_jar.clear(lambda cookie: cookie.key == "a1token")
+        return False
+
+    async def _run_solver(self, challenge_token, count, size, difficulty):
+        """按求解模式计算全部子挑战, 返回 [(编号, solution, 耗时)]"""
+        if self.solver_mode == SOLVER_MODE_PROCESS:
+            if self._solver_executor is None:
+                self._solver_executor = create_solver_executor(self.solver_workers)
+            return await solve_challenge_in_executor(
+                self._solver_executor, challenge_token, count, size, difficulty
+            )
+        return solve_challenge(challenge_token, count, size, difficulty)
 
     async def _solve_captcha(self):
         logger.info("🔐 Starting captcha challenge...")
         try:
             challenge_url = f"{self.base_url}/api/cap/challenge"
+            await self._throttle("auth")
             async with self.session.post(challenge_url, json={}) as resp:
                 resp.raise_for_status()
                 challenge_data = await resp.json()
@@ -76,29 +324,21 @@ class A1CTFClient:
                 
             logger.info(f"   Challenge: count={count}, difficulty={difficulty}, size={size}")
             
-            solutions = []
             start_time = time.time()
-            
-            for i in range(count):
-                salt_seed = challenge_token + str(i + 1)
-                target_seed = challenge_token + str(i + 1) + "d"
-                salt = self._prng(salt_seed, size)
-                target = self._prng(target_seed, difficulty)
-                
-                solution = 0
-                while True:
-                    test_input = salt + str(solution)
-                    hash_result = hashlib.sha256(test_input.encode()).hexdigest()
-                    if hash_result.startswith(target):
-                        solutions.append(solution)
-                        break
-                    solution += 1
+            results = await self._run_solver(challenge_token, count, size, difficulty)
+            solutions = [solution for _, solution, _ in results]
+            self.last_solve_timings = [(index, elapsed) for index, _, elapsed in results]
+            for index, solution, elapsed in results:
+                logger.info(f"   Sub-challenge {index}/{count}: solution={solution}, {elapsed:.3f}s")
             
             end_time = time.time()
-            logger.info(f"   ✅ Challenge solved in {end_time - start_time:.2f} seconds")
+            slowest = max(elapsed for _, _, elapsed in results) if results else 0.0
+            logger.info(f"   ✅ Challenge solved in {end_time - start_time:.2f} seconds "
+                        f"({self.solver_mode} mode, slowest sub-challenge {slowest:.2f}s)")
             
             redeem_url = f"{self.base_url}/api/cap/redeem"
             redeem_payload = {"token": challenge_token, "solutions": solutions}
+            await self._throttle("auth")
             async with self.session.post(redeem_url, json=redeem_payload) as resp:
                 resp.raise_for_status()
                 redeem_data = await resp.json()
@@ -117,19 +357,30 @@ class A1CTFClient:
 
     async def login(self):
         logger.info("🚀 Attempting to login...")
+        captcha_token = self.captcha_pool.take() if self.captcha_pool else None
+        if captcha_token:
+            logger.info("🧩 Using pre-solved captcha token from pool")
+            if await self._login_with_captcha(captcha_token):
+                return True
+            logger.warning("⚠️ Login with pooled captcha token failed, solving a fresh one...")
+
         captcha_token = await self._solve_captcha()
         if not captcha_token:
             logger.error("❌ Could not solve captcha, login aborted")
             return False
-        
+        return await self._login_with_captcha(captcha_token)
+
+    async def _login_with_captcha(self, captcha_token):
         login_url = f"{self.base_url}/api/auth/login"
         payload = {"username": self.username, "password": self.password, "captcha": captcha_token}
         
         try:
+            await self._throttle("auth")
             async with self.session.post(login_url, json=payload) as response:
                 response.raise_for_status()
                 if 'a1token' in response.cookies:
-                    self.token = response.cookies['a1token'].value
+                    self._set_token(response.cookies['a1token'].value, time.time())
+                    self._save_token()
                     logger.info("✅ Login successful!")
                     return True
                 else:
@@ -145,23 +396,247 @@ class A1CTFClient:
             logger.error(f"❌ Network error during login: {e}")
             return False
 
+    async def relogin(self, seen_generation=None):
+        """
+        单飞(single-flight)重新登录
+
+        同一时刻只有一个登录在进行, 并发遇到401的调用方等待同一个登录结果;
+        若请求发出后token已被其他调用方刷新, 则直接返回, 由调用方用新token重放请求。
+        """
+        if seen_generation is not None and seen_generation != self.login_generation:
+            self.coalesced_logins += 1
+            logger.info("🔁 Token already refreshed by a concurrent re-login, skipping login")
+            return True
+
+        if self._login_task is not None and not self._login_task.done():
+            self.coalesced_logins += 1
+            logger.info("⏳ Re-login already in flight, waiting for it...")
+        else:
+            self._note_token_rejected()
+            self._login_task = asyncio.ensure_future(self.login())
+        # shield: 单个调用方被取消不应中断共享的登录
+        return await asyncio.shield(self._login_task)
+
+    def get_stats(self):
+        """获取客户端运行统计"""
+        return {
+            "login_generation": self.login_generation,
+            "coalesced_logins": self.coalesced_logins,
+            "captcha_pool": {
+                "ready": self.captcha_pool.ready_count(),
+                "hits": self.captcha_pool.hits,
+                "misses": self.captcha_pool.misses,
+            } if self.captcha_pool else None,
+            "not_modified_hits": self.not_modified_hits,
+            "body_hash_hits": self.body_hash_hits,
+            "response_cache": self.response_cache.get_stats(),
+            "breakers": {name: breaker.snapshot() for name, breaker in self.breakers.items()},
+            "rate_limiters": {name: limiter.snapshot() for name, limiter in self.rate_limiters.items()},
+        }
+
+    def endpoint_for(self, url):
+        """根据URL判断端点类别"""
+        for endpoint, fragments in self.endpoint_patterns.items():
+            if any(fragment in url for fragment in fragments):
+                return endpoint
+        return "other"
+
+    async def _throttle(self, endpoint):
+        """按端点类别的令牌桶排队等待发送配额"""
+        limiter = self.rate_limiters.get(endpoint)
+        if limiter is None:
+            return
+        waited = await limiter.acquire()
+        if waited >= 1:
+            logger.info(f"⏳ {endpoint} request queued {waited:.1f}s by rate limiter")
+
+    def _breaker_for(self, endpoint):
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(endpoint, **self.breaker_options)
+        return breaker
+
+    @staticmethod
+    def _is_transient_error(error):
+        """超时、连接错误、429和5xx视为平台暂时异常, 可以重试并计入熔断"""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status == 429 or error.status >= 500
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+    async def _call_with_retry(self, endpoint, fetch):
+        """
+        按端点熔断器和重试策略执行请求
+
+        暂时性错误按指数退避+抖动重试; 连续失败达到阈值后熔断, 熔断期间直接抛出 CircuitOpenError,
+        冷却结束后放行一个半开探测请求, 探测成功即恢复。
+        """
+        breaker = self._breaker_for(endpoint)
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                raise CircuitOpenError(endpoint, breaker.retry_after())
+            try:
+                await self._throttle(endpoint)
+                result = await fetch()
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                if not self._is_transient_error(e):
+                    # 平台有正常响应(如4xx), 不影响熔断判断
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                attempt += 1
+                if attempt >= self.retry_policy.attempts or breaker.state != STATE_CLOSED:
+                    raise
+                delay = self.retry_policy.delay(attempt - 1)
+                reason = f"HTTP {e.status}" if isinstance(e, aiohttp.ClientResponseError) else type(e).__name__
+                logger.warning(f"⚠️ {endpoint} request failed ({reason}), retry {attempt}/{self.retry_policy.attempts - 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    def is_unchanged(self, url):
+        """最近一次对 url 的GET请求是否返回了与上次相同的数据(304或响应体哈希相同)"""
+        return self._unchanged.get(url, False)
+
+    def invalidate_cache(self, fragment=None):
+        """使URL中包含 fragment 的GET缓存失效, 例如收到解题通知后使积分榜缓存失效"""
+        count = self.response_cache.invalidate(fragment)
+        if count:
+            logger.debug(f"🧹 Invalidated {count} cached response(s) matching {fragment!r}")
+        return count
+
+    async def request(self, method, url, parser_factory=None, **kwargs):
+        """
+        封装请求
+
+        GET请求经过响应缓存: 按端点TTL缓存结果, 并发的相同请求共享同一次HTTP调用。
+        实际发送时经过端点熔断器和重试策略, 熔断期间抛出 CircuitOpenError。
+        传入 parser_factory 时使用流式解析模式: 响应体分块交给解析器(需提供 feed/close),
+        不保留完整响应体, 因此不参与条件请求和响应体哈希比较。
+        """
+        if parser_factory is not None:
+            send = lambda: self._request_stream(method, url, parser_factory, **kwargs)
+        else:
+            send = lambda: self._request(method, url, **kwargs)
+        endpoint = self.endpoint_for(url)
+        fetch = lambda: self._call_with_retry(endpoint, send)
+        if method != "GET":
+            return await fetch()
+
+        key = self._request_key(url, kwargs.get("params"))
+        if parser_factory is not None:
+            key = f"{key}#{getattr(parser_factory, '__name__', id(parser_factory))}"
+        return await self.response_cache.get_or_fetch(key, self.response_cache.ttl_for(url), fetch)
+
+    @staticmethod
+    def _request_key(url, params=None):
+        """响应缓存与条件请求共用的键: URL + 排序后的查询参数"""
+        if params:
+            return f"{url}?{sorted(params.items())}"
+        return url
+
+    def _normalize_timeout(self, kwargs):
+        """数值超时只覆盖会话超时的 total, 保留 connect / sock_read 等配置"""
+        if isinstance(kwargs.get("timeout"), (int, float)):
+            kwargs["timeout"] = aiohttp.ClientTimeout(**{**self.timeout_options, "total": kwargs["timeout"]})
+
     @retry_on_401
-    async def request(self, method, url, **kwargs):
-        """封装请求，自动处理401并重试"""
+    async def _request_stream(self, method, url, parser_factory, chunk_size=65536, **kwargs):
+        """发送请求并将响应体分块交给流式解析器, 自动处理401并重试"""
+        self._normalize_timeout(kwargs)
+        parser = parser_factory()
+        started_at = time.monotonic()
         async with self.session.request(method, url, **kwargs) as response:
             response.raise_for_status()
-            return await response.json()
+            body_started_at = time.monotonic()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                parser.feed(chunk)
+        self._record_read_phases(url, started_at, body_started_at)
+        return parser.close()
+
+    def _record_read_phases(self, url, started_at, body_started_at):
+        """记录响应体读取和请求总耗时, 其余阶段由 TraceConfig 回调记录"""
+        endpoint = self.endpoint_for(url)
+        now = time.monotonic()
+        self.tracer.record(endpoint, "body", now - body_started_at, url)
+        self.tracer.record(endpoint, "total", now - started_at, url)
+
+    @retry_on_401
+    async def _request(self, method, url, **kwargs):
+        """
+        发送请求，自动处理401并重试
+
+        GET请求会记住每个URL的 ETag / Last-Modified 并发送条件请求头, 收到304时返回上次解码的数据;
+        服务端不提供校验头时, 响应体哈希与上次相同也直接返回上次的数据, 跳过JSON解码。
+        """
+        self._normalize_timeout(kwargs)
+
+        key = self._request_key(url, kwargs.get("params"))
+        entry = self._validators.get(key) if method == "GET" else None
+        if entry:
+            headers = dict(kwargs.get("headers") or {})
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = headers
+
+        started_at = time.monotonic()
+        async with self.session.request(method, url, **kwargs) as response:
+            if entry and response.status == 304:
+                self.not_modified_hits += 1
+                self._unchanged[url] = True
+                self._record_read_phases(url, started_at, time.monotonic())
+                return entry["payload"]
+            response.raise_for_status()
+            body_started_at = time.monotonic()
+            body = await response.read()
+            self._record_read_phases(url, started_at, body_started_at)
+            if method != "GET":
+                return self._json_loads(body)
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            body_hash = None
+            if not etag and not last_modified:
+                body_hash = hashlib.blake2b(body, digest_size=16).digest()
+                if entry and entry["body_hash"] == body_hash:
+                    self.body_hash_hits += 1
+                    self._unchanged[url] = True
+                    return entry["payload"]
+
+            payload = self._json_loads(body)
+            self._validators[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body_hash": body_hash,
+                "payload": payload,
+            }
+            self._unchanged[url] = False
+            return payload
 
 # 全局客户端实例
 a1ctf_client = None
 
-async def initialize_a1ctf_client(base_url, username, password):
-    """初始化并登录A1CTF客户端"""
+async def initialize_a1ctf_client(base_url, username, password, **client_options):
+    """初始化并登录A1CTF客户端, client_options 透传给 A1CTFClient (见 config.A1CTF_CLIENT_CONFIG)"""
     global a1ctf_client
     if not a1ctf_client:
         logger.info("Initializing A1CTF client...")
-        client = A1CTFClient(base_url=base_url, username=username, password=password)
-        if await client.login():
+        client = A1CTFClient(base_url=base_url, username=username, password=password, **client_options)
+        try:
+            logged_in = await client.restore_token() or await client.login()
+        except asyncio.CancelledError:
+            # 启动任务在登录完成前被取消(如机器人关闭), 不遗留未关闭的会话
+            await client.close_session()
+            raise
+        if logged_in:
+            if client.captcha_pool:
+                client.captcha_pool.start()
             a1ctf_client = client
             logger.info("A1CTF client initialized and logged in successfully.")
         else:
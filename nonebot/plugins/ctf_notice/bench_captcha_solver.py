@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+验证码PoW求解内核基准测试
+不依赖nonebot环境, 使用固定种子以便对比不同版本的每秒求解数
+
+用法: python bench_captcha_solver.py [轮数]
+"""
+
+import sys
+import os
+import time
+import hashlib
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from captcha_solver import prng, search_solution, fnv1a_32
+
+# 固定的挑战种子: (challenge_token, size, difficulty)
+FIXED_SEEDS = [
+    ("bench-token-0001", 32, 4),
+    ("bench-token-0002", 32, 4),
+    ("bench-token-0003", 32, 5),
+    ("bench-token-0004", 64, 4),
+]
+SUB_CHALLENGES = 4
+
+def legacy_prng(seed, length):
+    """旧实现: 逐次字符串拼接"""
+    state = fnv1a_32(seed)
+    result = ""
+    while len(result) < length:
+        state ^= (state << 13) & 0xffffffff
+        state ^= (state >> 17) & 0xffffffff
+        state ^= (state << 5) & 0xffffffff
+        result += f"{state:08x}"
+    return result[:length]
+
+def legacy_search(salt, target):
+    """旧实现: 每次构造字符串并完整计算十六进制摘要"""
+    solution = 0
+    while True:
+        hash_result = hashlib.sha256((salt + str(solution)).encode()).hexdigest()
+        if hash_result.startswith(target):
+            return solution
+        solution += 1
+
+def build_cases():
+    cases = []
+    for token, size, difficulty in FIXED_SEEDS:
+        for i in range(1, SUB_CHALLENGES + 1):
+            cases.append((prng(token + str(i), size), prng(token + str(i) + "d", difficulty)))
+    return cases
+
+def check_correctness(cases):
+    """新旧实现结果必须完全一致"""
+    for seed in ["a", "bench-token-0001", "中文种子", ""]:
+        for length in [1, 4, 5, 8, 9, 32, 63, 64]:
+            assert prng(seed, length) == legacy_prng(seed, length), (seed, length)
+    for salt, target in cases[:SUB_CHALLENGES]:
+        assert search_solution(salt, target) == legacy_search(salt, target), (salt, target)
+    print("✅ 正确性校验通过")
+
+def run(name, search, cases, rounds):
+    hashes = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for salt, target in cases:
+            hashes += search(salt, target) + 1
+    elapsed = time.perf_counter() - start
+    solves = len(cases) * rounds
+    print(f"{name:<8} {solves / elapsed:>10.1f} solves/s  {hashes / elapsed / 1e6:>7.3f} MH/s  ({elapsed:.2f}s)")
+    return elapsed
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    cases = build_cases()
+
+    print("=" * 60)
+    print(f"🧪 验证码PoW基准测试: {len(cases)} 个子挑战 x {rounds} 轮")
+    print("=" * 60)
+
+    check_correctness(cases)
+    legacy = run("legacy", legacy_search, cases, rounds)
+    kernel = run("kernel", search_solution, cases, rounds)
+    print("-" * 60)
+    print(f"⚡ 加速比: {legacy / kernel:.2f}x")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+积分榜响应JSON解码基准测试
+不依赖nonebot环境, 对比标准库 json、orjson 与流式字段投影解析(stream)的解码耗时和峰值内存
+
+用法:
+    python bench_json_decode.py                       # 使用按A1CTF响应格式生成的100/1000队伍积分榜
+    python bench_json_decode.py a.json b.json         # 使用录制的积分榜响应
+"""
+
+import sys
+import os
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_codec import resolve_json_loads, JSON_DECODER_STDLIB, JSON_DECODER_ORJSON
+from scoreboard_parser import parse_projected
+
+ROUNDS = 5
+
+def build_scoreboard(team_count: int, challenge_count: int = 40, seed: int = 3) -> bytes:
+    """按 fetch_scoreboard 文档中的A1CTF响应格式生成积分榜响应体(page size = team_count)"""
+    rng = random.Random(seed)
+    base_time = 1693737600000
+    teams = []
+    for team_id in range(1, team_count + 1):
+        solved = rng.sample(range(1, challenge_count + 1), rng.randint(0, challenge_count // 2))
+        teams.append({
+            "team_id": team_id,
+            "team_name": f"队伍{team_id:04d}",
+            "team_avatar": None,
+            "team_slogan": "flag{never_gonna_give_you_up}" if team_id % 7 == 0 else None,
+            "team_members": [
+                {"user_id": f"{team_id:04d}-{m}-{'x' * 24}", "user_name": f"member{team_id}_{m}", "avatar": None}
+                for m in range(rng.randint(1, 4))
+            ],
+            "team_description": None,
+            "rank": team_id,
+            "score": float(team_count - team_id) * 10,
+            "penalty": 0,
+            "group_id": team_id % 3 + 1,
+            "group_name": ["新手组", "校内组", "校外组"][team_id % 3],
+            "solved_challenges": [
+                {
+                    "challenge_id": cid,
+                    "challenge_name": f"challenge_{cid}",
+                    "score": 100.0 + cid,
+                    "solver": f"member{team_id}_0",
+                    "rank": rng.randint(1, team_count),
+                    "solve_time": base_time + rng.randint(0, 86400000),
+                }
+                for cid in solved
+            ],
+            "score_adjustments": [
+                {"adjustment_id": team_id, "adjustment_type": "cheat", "score_change": -50.0, "reason": "违规"}
+            ] if team_id % 50 == 0 else [],
+            "last_solve_time": base_time + rng.randint(0, 86400000),
+        })
+
+    timelines = [
+        {
+            "team_id": team["team_id"],
+            "team_name": team["team_name"],
+            "scores": [
+                {"record_time": base_time + i * 600000, "score": float(i * 25)}
+                for i in range(100)
+            ],
+        }
+        for team in teams[:10]
+    ]
+    groups = [
+        {"group_id": gid, "group_name": name, "team_count": sum(1 for t in teams if t["group_id"] == gid)}
+        for gid, name in [(1, "校内组"), (2, "校外组"), (3, "新手组")]
+    ]
+    payload = {
+        "code": 200,
+        "data": {
+            "game_id": 3,
+            "name": "Newstar",
+            "teams": teams,
+            "top10_timelines": timelines,
+            "groups": groups,
+            "current_group": None,
+            "pagination": {"current_page": 1, "page_size": team_count, "total_count": team_count, "total_pages": 1},
+        },
+    }
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+def measure(loads, body: bytes):
+    """返回 (最佳解码耗时秒数, 解码期间峰值内存字节数)"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        gc.collect()
+        start = time.perf_counter()
+        result = loads(body)
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = loads(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+def available_decoders():
+    decoders = [(JSON_DECODER_STDLIB, resolve_json_loads(JSON_DECODER_STDLIB))]
+    orjson_loads = resolve_json_loads(JSON_DECODER_ORJSON)
+    if orjson_loads is not json.loads:
+        decoders.append((JSON_DECODER_ORJSON, orjson_loads))
+    else:
+        print("⚠️ 未安装 orjson, 跳过 orjson 解码器")
+    decoders.append(("stream", parse_projected))
+    return decoders
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        samples = []
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                samples.append((os.path.basename(path), f.read()))
+    else:
+        samples = [(f"{count} teams", build_scoreboard(count)) for count in (100, 1000)]
+
+    decoders = available_decoders()
+
+    print("=" * 72)
+    print("🧪 积分榜JSON解码基准测试")
+    print("=" * 72)
+    for name, body in samples:
+        print(f"\n📦 {name}: {len(body) / 1024:.1f} KiB")
+        baseline = None
+        for decoder_name, loads in decoders:
+            elapsed, peak = measure(loads, body)
+            baseline = baseline or elapsed
+            print(f"   {decoder_name:<8} {elapsed * 1000:>9.2f} ms  峰值内存 {peak / 1024 / 1024:>7.2f} MiB"
+                  f"  ({baseline / elapsed:.2f}x)")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+通知消息渲染基准测试
+不依赖nonebot环境, 渲染 10000 条混合类型的通知, 对比预编译模板引擎与逐条 if/elif 拼接
+(模板引擎之前 format_notice_message 的实现)的耗时, 并校验两者输出一致
+
+用法:
+    python bench_notice_templates.py            # 默认 10000 条通知
+    python bench_notice_templates.py 50000      # 指定通知数量
+"""
+
+import sys
+import os
+import ast
+import random
+import time
+from datetime import datetime, timedelta
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from notice_templates import NoticeTemplateEngine, NOTICE_EMOJI, format_notice_time
+
+ROUNDS = 5
+
+# 按比赛中实际出现的比例混合通知类型
+CATEGORY_WEIGHTS = {
+    "FirstBlood": 20,
+    "SecondBlood": 15,
+    "ThirdBlood": 15,
+    "NewHint": 15,
+    "NewChallenge": 10,
+    "Announcement": 10,
+    "ChallengeUpdate": 10,
+    "ScoreUpdate": 5,
+}
+
+def load_config_value(name: str):
+    """从 config.py 中读取字面量配置(config.py 依赖包内导入, 不能直接 import)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(name)
+
+def build_notices(count: int, seed: int = 3):
+    """生成 count 条通知, 时间以分钟为粒度(同一分钟内多条通知共享时间字符串)"""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+    start = datetime(2025, 9, 3, 12, 0)
+    notices = []
+    for notice_id in range(1, count + 1):
+        category = rng.choices(categories, weights)[0]
+        if category in ("FirstBlood", "SecondBlood", "ThirdBlood"):
+            data = [f"队伍{rng.randint(1, 500):03d}", f"challenge_{rng.randint(1, 60)}"]
+        elif category == "NewHint":
+            data = [f"challenge_{rng.randint(1, 60)}"]
+        else:
+            data = [f"公告内容 {notice_id}", "详情见平台"][:rng.randint(0, 2)]
+        create_time = (start + timedelta(minutes=notice_id // 20)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        notices.append({
+            "notice_id": notice_id,
+            "notice_category": category,
+            "data": data,
+            "create_time": create_time,
+        })
+    return notices
+
+BLOOD_DESC = {
+    "FirstBlood": "first blood",
+    "SecondBlood": "second blood",
+    "ThirdBlood": "third blood"
+}
+
+def legacy_format_notice_message(notice):
+    """模板引擎之前的实现: 每条通知重新解析时间并按 if/elif 选择格式"""
+    category = notice.get("notice_category")
+    data = notice.get("data", [])
+    try:
+        dt = datetime.fromisoformat(notice.get("create_time").replace('Z', '+00:00'))
+        time_str = dt.strftime("%m-%d %H:%M")
+    except:
+        time_str = notice.get("create_time")
+    emoji = NOTICE_EMOJI.get(category, "🎯")
+
+    if category in ["FirstBlood", "SecondBlood", "ThirdBlood"]:
+        team_name = data[0] if len(data) > 0 else "未知队伍"
+        challenge_name = data[1] if len(data) > 1 else "未知题目"
+        desc = BLOOD_DESC.get(category, "blood")
+        return f"""🎮 CTF赛事通知 🎮
+
+{emoji} {team_name} has got {challenge_name}'s {desc}!
+👥 队伍: {team_name}
+📝 题目: {challenge_name}
+⏰ 时间: {time_str}
+"""
+    elif category == "NewHint":
+        challenge_name = data[0] if len(data) > 0 else "未知题目"
+        return f"""🎮 CTF赛事通知 🎮
+
+{emoji} Challenge [{challenge_name}] added a new hint
+📝 题目: {challenge_name}
+⏰ 时间: {time_str}
+"""
+    else:
+        content = ", ".join(data) if data else "无详细信息"
+        return f"""🎮 CTF赛事通知 🎮
+
+{emoji} {category}
+📄 内容: {content}
+⏰ 时间: {time_str}
+"""
+
+def measure(render, notices):
+    """返回渲染全部通知的最佳耗时(秒)"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for notice in notices:
+            render(notice)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    notices = build_notices(count)
+    engine = NoticeTemplateEngine(
+        load_config_value("MESSAGE_TEMPLATES"),
+        load_config_value("DIGEST_LINE_TEMPLATES"),
+        header=load_config_value("NOTICE_TEMPLATE_CONFIG")["header"],
+    )
+
+    mismatches = sum(1 for notice in notices if engine.render_message(notice) != legacy_format_notice_message(notice))
+
+    print("=" * 72)
+    print(f"🧪 通知消息渲染基准测试 ({count} 条混合通知)")
+    print("=" * 72)
+    if mismatches:
+        print(f"❌ {mismatches} 条通知的渲染结果与原实现不一致")
+        sys.exit(1)
+    print("✅ 渲染结果与原实现一致")
+
+    format_notice_time.cache_clear()
+    results = [
+        ("if/elif", measure(legacy_format_notice_message, notices)),
+        ("template", measure(engine.render_message, notices)),
+        ("line", measure(engine.render_line, notices)),
+    ]
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"   {name:<9} {elapsed * 1000:>8.2f} ms  {elapsed / count * 1e6:>6.2f} µs/条  ({baseline / elapsed:.2f}x)")
+    cache = format_notice_time.cache_info()
+    print(f"\n⏰ 时间格式缓存: 命中 {cache.hits} 次, 未命中 {cache.misses} 次")
@@ -0,0 +1,114 @@
+"""
+A1CTF 验证码(PoW)求解模块
+
+验证码挑战由 count 个互相独立的子挑战组成, 每个子挑战需要找到一个整数 solution,
+使 sha256(salt + str(solution)) 的十六进制摘要以 target 开头。
+
+本模块只依赖标准库, 求解函数均为模块级函数, 以便在 ProcessPoolExecutor 中并行执行。
+"""
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+# 求解模式
+SOLVER_MODE_INLINE = "inline"      # 在当前进程中串行求解(会阻塞事件循环)
+SOLVER_MODE_PROCESS = "process"    # 在进程池中并行求解子挑战
+
+def fnv1a_32(data: str) -> int:
+    FNV_OFFSET_BASIS_32 = 0x811c9dc5
+    FNV_PRIME_32 = 0x01000193
+    hash_value = FNV_OFFSET_BASIS_32
+    for byte in data.encode('utf-8'):
+        hash_value ^= byte
+        hash_value = (hash_value * FNV_PRIME_32) & 0xffffffff
+    return hash_value
+
+def prng(seed: str, length: int) -> str:
+    state = fnv1a_32(seed)
+    words = []
+    for _ in range((length + 7) // 8):
+        state ^= (state << 13) & 0xffffffff
+        state ^= (state >> 17) & 0xffffffff
+        state ^= (state << 5) & 0xffffffff
+        words.append(state)
+    return ("%08x" * len(words) % tuple(words))[:length]
+
+def compile_target(target: str) -> Tuple[bytes, int]:
+    """
+    将十六进制前缀预编译为二进制比较目标
+
+    Returns:
+        Tuple[bytes, int]: (需完全相等的摘要前缀字节, 奇数长度时末尾半字节的值, 否则为-1)
+    """
+    full_bytes = len(target) // 2
+    prefix = bytes.fromhex(target[:full_bytes * 2])
+    nibble = int(target[-1], 16) if len(target) % 2 else -1
+    return prefix, nibble
+
+def search_solution(salt: str, target: str, start: int = 0) -> int:
+    """
+    PoW搜索内核
+
+    salt 只哈希一次, 每个候选值通过 .copy() 复用中间状态;
+    候选值直接格式化为 bytes, 并与预编译的二进制目标比较原始摘要。
+    """
+    base = hashlib.sha256(salt.encode())
+    copy = base.copy
+    prefix, nibble = compile_target(target)
+    prefix_len = len(prefix)
+    solution = start
+
+    if nibble < 0:
+        while True:
+            h = copy()
+            h.update(b"%d" % solution)
+            if h.digest()[:prefix_len] == prefix:
+                return solution
+            solution += 1
+
+    while True:
+        h = copy()
+        h.update(b"%d" % solution)
+        digest = h.digest()
+        if digest[prefix_len] >> 4 == nibble and digest[:prefix_len] == prefix:
+            return solution
+        solution += 1
+
+def solve_sub_challenge(challenge_token: str, index: int, size: int, difficulty: int) -> Tuple[int, int, float]:
+    """
+    求解第 index 个子挑战(从1开始编号)
+
+    Returns:
+        Tuple[int, int, float]: (子挑战编号, solution, 耗时秒数)
+    """
+    start_time = time.perf_counter()
+    salt = prng(challenge_token + str(index), size)
+    target = prng(challenge_token + str(index) + "d", difficulty)
+    solution = search_solution(salt, target)
+    return index, solution, time.perf_counter() - start_time
+
+def solve_challenge(challenge_token: str, count: int, size: int, difficulty: int) -> List[Tuple[int, int, float]]:
+    """在当前进程中串行求解全部子挑战"""
+    return [solve_sub_challenge(challenge_token, i + 1, size, difficulty) for i in range(count)]
+
+async def solve_challenge_in_executor(executor: Executor, challenge_token: str, count: int,
+                                      size: int, difficulty: int) -> List[Tuple[int, int, float]]:
+    """将全部子挑战并行提交到执行器, 等待结果时不阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    futures = [
+        loop.run_in_executor(executor, solve_sub_challenge, challenge_token, i + 1, size, difficulty)
+        for i in range(count)
+    ]
+    return list(await asyncio.gather(*futures))
+
+def create_solver_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """创建求解用进程池, 默认大小为可用CPU核心数"""
+    if max_workers is None:
+        try:
+            max_workers = len(os.sched_getaffinity(0))
+        except AttributeError:
+            max_workers = os.cpu_count() or 1
+    return ProcessPoolExecutor(max_workers=max(1, max_workers))
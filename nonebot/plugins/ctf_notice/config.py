@@ -11,10 +11,85 @@ except ImportError:
     A1CTF_PASSWORD = "your_password"
 
 # API配置
-NOTICES_API = f"{A1CTF_BASE_URL}/api/game/3/notices"
-SCOREBOARD_API = f"{A1CTF_BASE_URL}/api/game/3/scoreboard?page=1&size=20"
+GAME_ID = 3  # 默认比赛ID, 同时监控多场比赛时见下方 GAMES 配置
+NOTICES_API = f"{A1CTF_BASE_URL}/api/game/{GAME_ID}/notices"
+SCOREBOARD_API = f"{A1CTF_BASE_URL}/api/game/{GAME_ID}/scoreboard?page=1&size=20"
 CHECK_INTERVAL = 30  # 检查间隔（秒）
 
+# 通知推送通道配置: 平台提供 WebSocket/SSE 推送时订阅推送, 推送断开期间回退到轮询
+NOTICE_PUSH_CONFIG = {
+    "enabled": False,
+    # 推送地址, {game_id} 会替换为各比赛ID, 如 A1CTF_BASE_URL.replace("http", "ws", 1) + "/api/game/{game_id}/notices/ws"
+    "url": None,
+    "mode": "websocket",           # "websocket" 或 "sse"
+    "reconnect_base_delay": 1.0,   # 重连退避的初始等待（秒）
+    "reconnect_max_delay": 60.0,   # 重连退避的最长等待（秒）
+    "heartbeat": 30.0,             # 心跳间隔（秒）
+    # 推送正常时仍以此间隔轮询一次, 兜底补齐推送遗漏的通知
+    "safety_poll_interval": 300,
+}
+
+# 自适应轮询间隔配置(以 CHECK_INTERVAL 为初始间隔)
+ADAPTIVE_POLL_CONFIG = {
+    "enabled": True,
+    "floor": 5,             # 出现新通知或比赛开始前后的最短间隔（秒）
+    "ceiling": 120,         # 长时间无新通知时的最长间隔（秒）
+    "backoff_factor": 1.5,  # 每个空闲周期间隔放大的倍数
+    # 比赛开始时间(如 "2025-09-03T20:00:00+08:00"), 开始前后 hot_window 秒内保持最短间隔
+    "game_start": None,
+    "hot_window": 3600,
+    "pause_after_game_end": True,  # 收到 GameEnd 通知后暂停轮询
+}
+
+# 通知轮询配置
+NOTICE_POLL_CONFIG = {
+    # 水位线以下保留的已处理ID范围, 用于识别乱序迟到的通知
+    "dedup_window": 256,
+    # 平台支持增量查询时填写参数名(如 "after_id"), 只请求水位线之后的通知; None 表示每次获取全部通知
+    "since_param": None,
+    # 增量查询时从水位线往回多取的ID数, 用于取回乱序迟到的通知
+    "since_overlap": 16,
+}
+
+# 群消息出站队列配置: 按优先级出队, 各群并发发送, 按群与按账号分别限流
+DELIVERY_CONFIG = {
+    # 单群: 平均每秒1条, 最多连发3条
+    "group_rate": 1.0,
+    "group_capacity": 3,
+    # 整个账号: 平均每秒4条, 最多连发10条, 超出后QQ容易触发发言频率风控
+    "account_rate": 4.0,
+    "account_capacity": 10,
+    # 发送失败的重试(只影响失败的群)
+    "retry_attempts": 3,
+    "retry_base_delay": 1.0,
+    "retry_max_delay": 10.0,
+    # 每个群出站队列的最大长度, 队列满时挤掉优先级最低的消息
+    "max_queue_per_group": 50,
+    # 最终发送失败的消息(死信)持久化位置与保留条数, 可用 /ctf_resend 重发
+    "dead_letter_path": "/app/nonebot/data/ctf_notice/dead_letters.json",
+    "max_dead_letters": 200,
+    # 未配置 TARGET_GROUPS 时机器人群列表的缓存时间（秒）, 入群/退群事件会即时更新缓存
+    "group_list_ttl": 600,
+}
+
+# 通知汇总配置: 开启后一个检查周期(或汇总窗口)内的多条通知合并为一条消息发送
+DIGEST_CONFIG = {
+    "enabled": False,
+    "min_notices": 2,     # 至少有这么多条通知时才合并
+    "window": 0,          # 汇总窗口（秒）, 0表示只合并同一检查周期内的通知
+    "max_length": 1500,   # 单条汇总消息的最大字符数, 超出时拆分
+}
+
+# 通知状态持久化配置(SQLite, WAL模式)
+NOTICE_STORE_CONFIG = {
+    "enabled": True,
+    "path": "/app/nonebot/data/ctf_notice/notices.db",
+    # 重启后补发停机期间通知的最大条数, 超出部分只记录不推送(保留最新的)
+    "backlog_limit": 10,
+    # 推送记录保留的最大行数
+    "max_log_rows": 5000,
+}
+
 # 统一的API请求配置
 API_CONFIG = {
     # 共享的请求配置
@@ -38,10 +113,74 @@ API_CONFIG = {
     },
     "scoreboard": {
         "url": SCOREBOARD_API,
-        "timeout": 30
+        "timeout": 30,
+        # 流式解析积分榜, 每支队伍只保留 team_name/score/rank/group_id, 适合队伍数量很多的比赛
+        "stream_parse": False
     }
 }
 
+# A1CTF客户端配置 (作为 initialize_a1ctf_client 的关键字参数传入)
+A1CTF_CLIENT_CONFIG = {
+    # 验证码求解模式: "process" 在进程池中并行求解各子挑战, "inline" 在事件循环中串行求解
+    "solver_mode": "process",
+    # 求解进程数, None 表示使用全部可用CPU核心
+    "solver_workers": None,
+    # a1token持久化文件, 重启后先验证保存的token, 仅在被拒绝时才重新求解验证码; None 表示不持久化
+    "token_store_path": "/app/nonebot/data/ctf_notice/a1token.json",
+    # 验证token时请求的轻量接口
+    "token_check_path": "/api/account/profile",
+    # 预先求解的验证码token数量, 重新登录时直接取用; 0 表示关闭验证码token池
+    "captcha_pool_size": 0,
+    # 池中验证码token的最长保留时间(秒), 应小于服务端允许的验证码token有效期
+    "captcha_pool_ttl": 240,
+    # 会话默认请求头, 各接口调用处不再单独传入
+    "headers": API_CONFIG["headers"],
+    # 连接池配置 (aiohttp.TCPConnector 参数)
+    "connector_options": {
+        "limit": 20,               # 连接总数上限
+        "limit_per_host": 8,       # 单主机连接数上限
+        "ttl_dns_cache": 300,      # DNS缓存时间(秒)
+        "keepalive_timeout": 60,   # 空闲keep-alive连接保留时间(秒)
+    },
+    # 会话级超时配置 (aiohttp.ClientTimeout 参数), 各接口可在 API_CONFIG 中单独指定总超时
+    "timeout_options": {
+        "total": 30,
+        "connect": 10,
+        "sock_read": 20,
+    },
+    # GET响应缓存时间(秒), 键为URL中的路径片段; 未匹配的端点不缓存, 但并发的相同请求仍会合并
+    "cache_ttls": {
+        "/scoreboard": 15,
+    },
+    # 响应缓存最大条目数 (LRU淘汰)
+    "cache_max_entries": 64,
+    # 响应体JSON解码器: "auto" 已安装 orjson 时使用 orjson, "orjson", "json" (标准库)
+    "json_decoder": "auto",
+    # 超时/连接错误/429/5xx 的重试策略: 总尝试次数, 指数退避基础等待和最大等待(秒), 等待时间带随机抖动
+    "retry_options": {
+        "attempts": 3,
+        "base_delay": 0.5,
+        "max_delay": 8,
+    },
+    # 按端点(notices/scoreboard/...)的熔断器: 连续失败次数阈值, 熔断后多久放行半开探测请求(秒)
+    "breaker_options": {
+        "failure_threshold": 5,
+        "recovery_timeout": 30,
+    },
+    # 按端点类别的出站令牌桶限流: rate 为每秒请求数, capacity 为允许的突发数; 超出的请求排队等待
+    "rate_limits": {
+        "notices": {"rate": 1, "capacity": 2},
+        "scoreboard": {"rate": 2, "capacity": 6},
+        "auth": {"rate": 0.5, "capacity": 3},
+    },
+    # 请求阶段慢请求阈值(秒), 超过时记录带URL的警告日志; 阶段: queue/dns/connect/server/body/total
+    "slow_phase_thresholds": {
+        "connect": 3.0,
+        "server": 5.0,
+        "total": 10.0,
+    },
+}
+
 # 积分榜图片保存配置
 SCOREBOARD_IMAGE_CONFIG = {
     "save_dir": "/app/nonebot/scoreboard",
@@ -66,12 +205,40 @@ NOTICE_CATEGORIES = [
     # 留空表示推送所有类型的通知
 ]
 
-# 消息模板配置
+# 多比赛配置 - 一个机器人同时监控多场比赛(共用同一个登录会话和检查任务)
+# 每场比赛可单独设置 target_groups / notice_categories, 未设置时使用上面的全局配置;
+# 群内发送积分榜关键词时显示该群所属比赛的积分榜
+GAMES = [
+    {"game_id": GAME_ID, "name": "Newstar"},
+    # {"game_id": 4, "name": "新生赛", "target_groups": [123456789], "notice_categories": []},
+]
+
+# 消息模板配置 - 启动时按通知类型编译, 未配置的类型使用 default 模板
+# 可用字段: {emoji} {category} {notice_id} {time} {content}(data以逗号连接);
+# 血条通知另有 {team_name} {challenge_name}, NewHint 另有 {challenge_name}
+# 单条推送的消息模板(前面加上 header)
 MESSAGE_TEMPLATES = {
-    "FirstBlood": "🥇 First Blood!",
-    "SecondBlood": "🥈 Second Blood!",
-    "ThirdBlood": "🥉 Third Blood!",
-    "NewHint": "💡 Challenge [{challenge_name}] added a new hint"
+    "FirstBlood": "{emoji} {team_name} has got {challenge_name}'s first blood!\n👥 队伍: {team_name}\n📝 题目: {challenge_name}\n⏰ 时间: {time}",
+    "SecondBlood": "{emoji} {team_name} has got {challenge_name}'s second blood!\n👥 队伍: {team_name}\n📝 题目: {challenge_name}\n⏰ 时间: {time}",
+    "ThirdBlood": "{emoji} {team_name} has got {challenge_name}'s third blood!\n👥 队伍: {team_name}\n📝 题目: {challenge_name}\n⏰ 时间: {time}",
+    "NewHint": "{emoji} Challenge [{challenge_name}] added a new hint\n📝 题目: {challenge_name}\n⏰ 时间: {time}",
+    "default": "{emoji} {category}\n📄 内容: {content}\n⏰ 时间: {time}",
+}
+
+# 汇总消息中每条通知一行的模板
+DIGEST_LINE_TEMPLATES = {
+    "FirstBlood": "{emoji} {team_name} has got {challenge_name}'s first blood! ({time})",
+    "SecondBlood": "{emoji} {team_name} has got {challenge_name}'s second blood! ({time})",
+    "ThirdBlood": "{emoji} {team_name} has got {challenge_name}'s third blood! ({time})",
+    "NewHint": "{emoji} Challenge [{challenge_name}] added a new hint ({time})",
+    "default": "{emoji} {category}: {content} ({time})",
+}
+
+NOTICE_TEMPLATE_CONFIG = {
+    "header": "🎮 CTF赛事通知 🎮\n\n",
+    # 模板覆盖文件(JSON, 格式 {"header": ..., "messages": {...}, "lines": {...}}), 修改后无需重启即生效
+    "override_path": "/app/nonebot/data/ctf_notice/templates.json",
+    "reload_check_interval": 10,   # 检查覆盖文件是否修改的最小间隔（秒）
 }
 
 # 是否在启动时自动开始监控
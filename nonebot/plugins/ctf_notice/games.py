@@ -0,0 +1,53 @@
+"""
+比赛注册表
+
+根据 config.GAMES 生成被监控的比赛列表。每场比赛有自己的推送群组和通知类型过滤,
+未单独配置时沿用全局的 TARGET_GROUPS / NOTICE_CATEGORIES。
+"""
+from typing import Dict, List, Optional
+
+from .config import A1CTF_BASE_URL, GAME_ID, GAMES, TARGET_GROUPS, NOTICE_CATEGORIES
+
+class GameInfo:
+    def __init__(self, game_id: int, name: Optional[str] = None, target_groups: Optional[List[int]] = None,
+                 notice_categories: Optional[List[str]] = None):
+        self.game_id = game_id
+        self.name = name or f"比赛{game_id}"
+        self.target_groups = list(TARGET_GROUPS if target_groups is None else target_groups)
+        # 为空表示推送所有类型的通知
+        self.notice_categories = set(NOTICE_CATEGORIES if notice_categories is None else notice_categories)
+        self.notices_api = f"{A1CTF_BASE_URL}/api/game/{game_id}/notices"
+        self.scoreboard_api = f"{A1CTF_BASE_URL}/api/game/{game_id}/scoreboard"
+
+    def accepts(self, category: Optional[str]) -> bool:
+        return not self.notice_categories or category in self.notice_categories
+
+def _build_registry() -> Dict[int, GameInfo]:
+    registry: Dict[int, GameInfo] = {}
+    for entry in GAMES or [{"game_id": GAME_ID}]:
+        game = GameInfo(
+            entry["game_id"],
+            entry.get("name"),
+            entry.get("target_groups"),
+            entry.get("notice_categories"),
+        )
+        registry[game.game_id] = game
+    return registry
+
+GAME_REGISTRY: Dict[int, GameInfo] = _build_registry()
+
+def get_games() -> List[GameInfo]:
+    return list(GAME_REGISTRY.values())
+
+def get_game(game_id: Optional[int] = None) -> GameInfo:
+    """按ID获取比赛, 未指定或不存在时返回第一场比赛"""
+    if game_id is not None and game_id in GAME_REGISTRY:
+        return GAME_REGISTRY[game_id]
+    return next(iter(GAME_REGISTRY.values()))
+
+def game_for_group(group_id: int) -> GameInfo:
+    """群聊对应的比赛: 优先选择推送群组中包含该群的比赛, 否则返回第一场比赛"""
+    for game in GAME_REGISTRY.values():
+        if group_id in game.target_groups:
+            return game
+    return get_game()
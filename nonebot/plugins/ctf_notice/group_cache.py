@@ -0,0 +1,54 @@
+"""
+机器人群列表缓存
+
+未配置 TARGET_GROUPS 时推送目标是机器人加入的所有群。群列表按TTL缓存,
+机器人入群/退群事件直接更新缓存, 并发的刷新请求合并为一次 get_group_list 调用。
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+class GroupListCache:
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        self._group_ids: Optional[List[int]] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.refreshes = 0
+
+    def _fresh(self) -> bool:
+        return self._group_ids is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    async def get(self, bot) -> List[int]:
+        if self._fresh():
+            self.hits += 1
+            return list(self._group_ids)
+        async with self._lock:
+            # 等锁期间其他协程可能已经刷新过
+            if not self._fresh():
+                group_list = await bot.get_group_list()
+                self._group_ids = [group.get("group_id") for group in group_list if group.get("group_id")]
+                self._fetched_at = time.monotonic()
+                self.refreshes += 1
+            else:
+                self.hits += 1
+            return list(self._group_ids)
+
+    def add(self, group_id: int):
+        if self._group_ids is not None and group_id not in self._group_ids:
+            self._group_ids.append(group_id)
+
+    def remove(self, group_id: int):
+        if self._group_ids is not None and group_id in self._group_ids:
+            self._group_ids.remove(group_id)
+
+    def invalidate(self):
+        self._group_ids = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "groups": len(self._group_ids) if self._group_ids is not None else None,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+        }
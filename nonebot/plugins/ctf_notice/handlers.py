@@ -1,17 +1,31 @@
-from nonebot import on_command, on_message, logger
-from nonebot.adapters.onebot.v11 import Message, GroupMessageEvent, PrivateMessageEvent, MessageSegment, Bot
+from nonebot import on_command, on_message, on_notice, logger
+from nonebot.adapters.onebot.v11 import (
+    Message, GroupMessageEvent, PrivateMessageEvent, MessageSegment, Bot,
+    GroupIncreaseNoticeEvent, GroupDecreaseNoticeEvent
+)
 from nonebot.params import CommandArg
 from nonebot.permission import SUPERUSER
 from nonebot.rule import to_me
 
-from .notice_monitor import start_notice_monitor, stop_notice_monitor, get_monitor_status
+from .notice_monitor import (
+    start_notice_monitor, stop_notice_monitor, get_monitor_status, outbound_queue, group_sender,
+    group_list_cache, notice_templates
+)
+from .outbound_queue import PRIORITY_ANNOUNCEMENT, PRIORITY_CHATTER
 from .config import SCOREBOARD_KEYWORDS
+from .a1ctf_client import get_a1ctf_client
 from .scoreboard import generate_scoreboard
+from .games import game_for_group
 from .ad_detector import detect_advertisement, log_ad_detection, get_ad_detection_summary
 import os
 import asyncio
 import base64
 
+async def send_group_reply(bot: Bot, event: GroupMessageEvent, message,
+                           priority: int = PRIORITY_CHATTER, dead_letter: bool = True) -> bool:
+    """通过出站队列回复群消息, 返回是否发送成功"""
+    return await outbound_queue.submit(event.group_id, message, group_sender(bot), priority, dead_letter)
+
 # 开始监控命令
 ctf_start = on_command("ctf_start", aliases={"ctf开始", "开始监控"}, priority=5)
 
@@ -36,27 +50,153 @@ async def handle_status():
     status = get_monitor_status()
     
     status_text = "运行中 ✅" if status["is_monitoring"] else "已停止 ❌"
+    if status["poll_paused"]:
+        interval_text = "已暂停(比赛已结束)"
+    else:
+        interval_text = f"{status['check_interval']:.0f} 秒"
     
     message = f"""📊 CTF监控状态
 
 状态: {status_text}
-已处理通知: {status["processed_count"]} 条
-检查间隔: {status["check_interval"]} 秒
-API地址: {status["api_url"]}"""
+已推送通知: {status["delivered_count"]} 条
+检查间隔: {interval_text} (基准 {status["base_interval"]} 秒)
+检查次数: {status["check_runs"]} 次 (合并 {status["coalesced_runs"]}, 跳过 {status["skipped_runs"]}, 手动合并 {status["joined_runs"]})"""
+    
+    for game in status["games"]:
+        ended_text = " (已结束)" if game["ended"] else ""
+        message += f"""
+🎮 {game["name"]} (ID {game["game_id"]}){ended_text}
+   水位线: #{game["watermark"]} (窗口内 {game["dedup_window_count"]} 条), 已推送 {game["delivered_count"]} 条
+   API地址: {game["api_url"]}"""
+        push = game["push_stats"]
+        if push:
+            message += (f"\n   推送通道: {'已连接 ✅' if push['connected'] else '未连接, 轮询中 ⚠️'}"
+                        f" (连接 {push['connects']} 次, 收到 {push['received']} 条)")
+    
+    delivery = status["delivery_stats"]
+    message += f"""
+群消息: 成功 {delivery["sent"]} 条, 重试 {delivery["retried"]} 次, 失败 {delivery["failed"]} 条, 丢弃 {delivery["dropped"]} 条
+出站队列: 排队 {delivery["queued"]} 条, 死信 {delivery["dead_letters"]} 条, 账号限流平均等待 {delivery["account_limiter"]["avg_wait"]:.2f}s"""
+    
+    end_to_end = status["notice_latency"]["stages"].get("end_to_end")
+    if end_to_end:
+        message += f"""
+通知送达延迟: p50 {end_to_end["p50"]:.1f}s / p95 {end_to_end["p95"]:.1f}s / p99 {end_to_end["p99"]:.1f}s ({end_to_end["count"]}次, 详见 /ctf_metrics)"""
+    
+    templates = status["template_stats"]
+    message += f"""
+消息模板: 版本 {templates["version"]}, 重载 {templates["reloads"]} 次, 失败 {templates["reload_errors"]} 次"""
+    
+    client_stats = status["client_stats"]
+    if client_stats:
+        message += f"""
+登录次数: {client_stats["login_generation"]} 次
+合并登录: {client_stats["coalesced_logins"]} 次
+未变化响应: 304 {client_stats["not_modified_hits"]} 次, 哈希 {client_stats["body_hash_hits"]} 次"""
+        cache = client_stats["response_cache"]
+        message += f"""
+响应缓存: {cache["entries"]} 条, 命中 {cache["hits"]} 次, 合并 {cache["coalesced"]} 次"""
+        breakers = client_stats["breakers"]
+        if breakers:
+            breaker_lines = []
+            for name, breaker in breakers.items():
+                line = f"{name}={breaker['state']}"
+                if breaker["state"] == "open":
+                    line += f"({breaker['retry_after']:.0f}s后探测)"
+                breaker_lines.append(line)
+            message += f"""
+熔断器: {', '.join(breaker_lines)}"""
+        limiters = client_stats["rate_limiters"]
+        if limiters:
+            limiter_lines = [
+                f"{name} 排队{limiter['queued']} 平均{limiter['avg_wait']:.2f}s 最大{limiter['max_wait']:.2f}s"
+                for name, limiter in limiters.items()
+            ]
+            message += f"""
+限流等待: {'; '.join(limiter_lines)}"""
+        pool = client_stats.get("captcha_pool")
+        if pool:
+            message += f"""
+验证码池: 就绪 {pool["ready"]} 个, 命中 {pool["hits"]} 次, 未命中 {pool["misses"]} 次"""
     
     await ctf_status.finish(message)
 
+# 请求阶段耗时命令
+ctf_metrics = on_command("ctf_metrics", aliases={"ctf指标", "请求耗时"}, priority=5)
+
+@ctf_metrics.handle()
+async def handle_metrics():
+    client = get_a1ctf_client()
+    if not client:
+        await ctf_metrics.finish("❌ A1CTF客户端未初始化")
+    
+    snapshot = client.tracer.snapshot()
+    latency = get_monitor_status()["notice_latency"]
+    if not snapshot and not latency["stages"]:
+        await ctf_metrics.finish("📈 暂无请求耗时数据")
+    
+    message = "📈 请求阶段耗时 (p50/p95/p99/max, 毫秒)"
+    for endpoint, phases in snapshot.items():
+        message += f"\n\n🔗 {endpoint}"
+        for phase, summary in phases.items():
+            message += (f"\n• {phase}: {summary['p50'] * 1000:.0f}/{summary['p95'] * 1000:.0f}/"
+                        f"{summary['p99'] * 1000:.0f}/{summary['max'] * 1000:.0f} ({summary['count']}次)")
+    message += f"\n\n🐢 慢请求阶段: {client.tracer.slow_count} 次"
+    
+    if latency["stages"]:
+        stage_names = {"detect": "创建→发现", "format": "发现→格式化", "send": "格式化→发送完成", "end_to_end": "创建→发送完成"}
+        message += "\n\n⏱️ 通知送达延迟 (p50/p95/p99/max, 秒)"
+        for stage, summary in latency["stages"].items():
+            message += (f"\n• {stage_names.get(stage, stage)}: {summary['p50']:.1f}/{summary['p95']:.1f}/"
+                        f"{summary['p99']:.1f}/{summary['max']:.1f} ({summary['count']}次)")
+        for group_id, summary in latency["groups"].items():
+            message += (f"\n• 群 {group_id}: {summary['p50']:.1f}/{summary['p95']:.1f}/"
+                        f"{summary['p99']:.1f}/{summary['max']:.1f} ({summary['count']}次)")
+    
+    queue_latency = outbound_queue.get_stats()["latency"]
+    if queue_latency:
+        message += "\n\n📤 群消息排队+发送耗时 (p50/p95/p99/max, 毫秒)"
+        for priority, summary in queue_latency.items():
+            message += (f"\n• {priority}: {summary['p50'] * 1000:.0f}/{summary['p95'] * 1000:.0f}/"
+                        f"{summary['p99'] * 1000:.0f}/{summary['max'] * 1000:.0f} ({summary['count']}次)")
+    
+    await ctf_metrics.finish(message)
+
 # 手动检查命令
 ctf_check = on_command("ctf_check", aliases={"ctf检查", "手动检查"}, priority=5)
 
 @ctf_check.handle()
 async def handle_manual_check():
-    from .notice_monitor import check_new_notices
+    from .notice_monitor import run_check
     
     await ctf_check.send("🔍 正在手动检查新通知...")
-    await check_new_notices()
+    await run_check(manual=True)
     await ctf_check.finish("✅ 手动检查完成")
 
+# 重发死信命令
+ctf_resend = on_command("ctf_resend", aliases={"ctf重发", "重发失败消息"}, priority=5, permission=SUPERUSER)
+
+@ctf_resend.handle()
+async def handle_resend(bot: Bot):
+    count = outbound_queue.requeue_dead_letters(group_sender(bot))
+    remaining = len(outbound_queue.dead_letters)
+    message = f"📤 已重新提交 {count} 条发送失败的消息"
+    if remaining:
+        message += f"\n⚠️ 另有 {remaining} 条消息过长(如图片)无法重发"
+    await ctf_resend.finish(message)
+
+# 重载消息模板命令
+ctf_templates = on_command("ctf_templates", aliases={"ctf模板", "重载模板"}, priority=5, permission=SUPERUSER)
+
+@ctf_templates.handle()
+async def handle_reload_templates():
+    errors = notice_templates.reload_errors
+    notice_templates.reload(force=True)
+    stats = notice_templates.get_stats()
+    if stats["reload_errors"] > errors:
+        await ctf_templates.finish("❌ 模板编译失败, 继续使用原有模板, 详见日志")
+    await ctf_templates.finish(f"✅ 消息模板已重新加载 (版本 {stats['version']}, 已配置类型: {', '.join(stats['categories'])})")
+
 # 帮助命令
 # 帮助命令
 ctf_help = on_command("ctf_help", aliases={"ctf帮助"}, priority=5)
@@ -70,6 +210,9 @@ async def handle_help():
 • /ctf_stop - 停止监控  
 • /ctf_status - 查看状态
 • /ctf_check - 手动检查
+• /ctf_metrics - 请求耗时统计
+• /ctf_resend - 重发发送失败的消息(管理员)
+• /ctf_templates - 重新加载消息模板(管理员)
 • /ctf_help - 显示帮助
 • /ad_detect <消息> - 检测广告
 • /ad_config - 查看广告检测配置
@@ -217,50 +360,63 @@ async def handle_scoreboard_request(event: GroupMessageEvent, bot: Bot):
         # await scoreboard_trigger.send("⏳ 正在生成积分榜图片，请稍候...")
         
         # 生成积分榜
-        image_path, ranking_info = await generate_scoreboard()
+        # 群聊配置在哪场比赛的推送群组中, 就展示哪场比赛的积分榜
+        image_path, ranking_info = await generate_scoreboard(game_for_group(event.group_id).game_id)
         
         # 检查文件是否存在
         if not os.path.exists(image_path):
-            await scoreboard_trigger.finish("❌ 积分榜图片生成失败，请稍后重试")
+            await send_group_reply(bot, event, "❌ 积分榜图片生成失败，请稍后重试")
             return
         
         # 检查文件大小
         file_size = os.path.getsize(image_path)
         if file_size > 5 * 1024 * 1024:  # 5MB限制
-            await scoreboard_trigger.finish("❌ 图片文件过大，无法发送")
+            await send_group_reply(bot, event, "❌ 图片文件过大，无法发送")
             return
         
         logger.info(f"📊 积分榜图片已生成: {image_path}, 文件大小: {file_size} bytes")
         
-        try:
-            # 读取图片并转换为 base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-                image_b64 = base64.b64encode(image_data).decode()
-            
-            # 发送图片消息（使用 base64）
-            await scoreboard_trigger.send(MessageSegment.image(f"base64://{image_b64}"))
+        # 读取图片并转换为 base64
+        with open(image_path, 'rb') as f:
+            image_data = f.read()
+            image_b64 = base64.b64encode(image_data).decode()
+        
+        # 发送图片消息（使用 base64）, 失败时降级处理, 不写入死信
+        if await send_group_reply(bot, event, MessageSegment.image(f"base64://{image_b64}"), dead_letter=False):
             logger.info("📊 积分榜图片发送成功")
-            
-        except Exception as img_error:
-            logger.error(f"Base64图片发送失败: {img_error}")
+        else:
+            logger.error("Base64图片发送失败")
             
             # 尝试使用文件路径发送
-            try:
-                logger.info("尝试使用文件路径发送图片...")
-                await scoreboard_trigger.send(MessageSegment.image(f"file:///{image_path}"))
+            logger.info("尝试使用文件路径发送图片...")
+            if await send_group_reply(bot, event, MessageSegment.image(f"file:///{image_path}"), dead_letter=False):
                 logger.info("📊 使用文件路径发送图片成功")
-            except Exception as file_error:
-                logger.error(f"文件路径发送也失败: {file_error}")
+            else:
+                logger.error("文件路径发送也失败")
                 # 如果图片发送完全失败，至少发送文字信息
-                await scoreboard_trigger.send("❌ 图片发送失败，但这里是积分榜信息：")
+                await send_group_reply(bot, event, "❌ 图片发送失败，但这里是积分榜信息：")
         
         # 发送排名信息
-        await scoreboard_trigger.send(ranking_info)
+        await send_group_reply(bot, event, ranking_info)
         
     except Exception as e:
         logger.error(f"生成积分榜时出错: {e}")
-        await scoreboard_trigger.finish(f"❌ 生成积分榜时出错: {str(e)}")
+        await send_group_reply(bot, event, f"❌ 生成积分榜时出错: {str(e)}")
+
+# --- 群列表缓存维护 ---
+group_change = on_notice(priority=1, block=False)
+
+@group_change.handle()
+async def handle_group_change(event: GroupIncreaseNoticeEvent | GroupDecreaseNoticeEvent, bot: Bot):
+    """机器人入群/退群时更新群列表缓存"""
+    if event.user_id != int(bot.self_id):
+        return
+    if isinstance(event, GroupIncreaseNoticeEvent):
+        group_list_cache.add(event.group_id)
+        logger.info(f"机器人加入群组 {event.group_id}, 已更新群列表缓存")
+    else:
+        group_list_cache.remove(event.group_id)
+        logger.info(f"机器人退出群组 {event.group_id}, 已更新群列表缓存")
 
 # --- y爹检测功能 ---
 y_dad_trigger = on_message(priority=15, block=False)
@@ -286,7 +442,7 @@ async def handle_y_dad_request(event: GroupMessageEvent, bot: Bot):
 👖                👖               👖
 👞👞           👞👞         👞👞"""
     
-    await y_dad_trigger.send(y_dad_response)
+    await send_group_reply(bot, event, y_dad_response)
 
 # --- 广告检测功能 ---
 ad_monitor = on_message(priority=20, block=False)
@@ -378,7 +534,7 @@ async def handle_ad_detection(event: GroupMessageEvent, bot: Bot):
 ⚠️ 如误判请联系管理员"""
             
             # 发送通知到群内
-            await ad_monitor.send(warning_message)
+            await send_group_reply(bot, event, warning_message, PRIORITY_ANNOUNCEMENT)
             
         except Exception as e:
             # 如果撤回失败（可能权限不足），则发送警告
@@ -404,7 +560,7 @@ async def handle_ad_detection(event: GroupMessageEvent, bot: Bot):
 
 消息内容: {message_text[:100]}{'...' if len(message_text) > 100 else ''}"""
             
-            await ad_monitor.send(warning_message)
+            await send_group_reply(bot, event, warning_message, PRIORITY_ANNOUNCEMENT)
     
     elif is_ad and detection_result['confidence'] >= warning_threshold:
         # 中等风险的消息只发送警告，不撤回
@@ -428,5 +584,5 @@ async def handle_ad_detection(event: GroupMessageEvent, bot: Bot):
 请注意识别和防范广告信息！"""
         
         logger.info(f"⚠️ 中等风险{'群卡片' if is_group_card_ad else ''}广告检测: {message_text[:50]}...")
-        # await ad_monitor.send(warning_message)  # 可选择是否发送中等风险警告
+        # await send_group_reply(bot, event, warning_message, PRIORITY_ANNOUNCEMENT)  # 可选择是否发送中等风险警告
 
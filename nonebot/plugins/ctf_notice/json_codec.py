@@ -0,0 +1,32 @@
+"""
+JSON解码器选择
+
+A1CTF的积分榜响应体较大, 安装了 orjson 时优先使用它解码, 否则回退到标准库 json。
+也可以直接传入任意接受 bytes 的解码函数。
+"""
+import json
+import logging
+from typing import Any, Callable, Union
+
+logger = logging.getLogger(__name__)
+
+JSON_DECODER_AUTO = "auto"        # 有 orjson 用 orjson, 否则用标准库
+JSON_DECODER_ORJSON = "orjson"
+JSON_DECODER_STDLIB = "json"
+
+def resolve_json_loads(decoder: Union[str, Callable[[bytes], Any]] = JSON_DECODER_AUTO) -> Callable[[bytes], Any]:
+    """根据配置返回解码函数, 函数接受响应体 bytes"""
+    if callable(decoder):
+        return decoder
+
+    if decoder in (JSON_DECODER_AUTO, JSON_DECODER_ORJSON):
+        try:
+            import orjson
+            return orjson.loads
+        except ImportError:
+            if decoder == JSON_DECODER_ORJSON:
+                logger.warning("⚠️ orjson is not installed, falling back to the stdlib json decoder")
+    elif decoder != JSON_DECODER_STDLIB:
+        logger.warning(f"⚠️ Unknown JSON decoder {decoder!r}, falling back to the stdlib json decoder")
+
+    return json.loads
@@ -0,0 +1,59 @@
+"""
+滚动直方图
+
+只保留最近 max_age 秒内、最多 max_samples 个样本, 按需计算分位数,
+用于请求阶段耗时、发送延迟等运行指标。
+"""
+import time
+from collections import deque
+from typing import Dict, Tuple
+
+class RollingHistogram:
+    def __init__(self, max_samples: int = 1024, max_age: float = 3600):
+        self.max_age = max_age
+        self._samples: "deque[Tuple[float, float]]" = deque(maxlen=max_samples)  # (时间戳, 数值)
+        self.total_count = 0    # 累计样本数(不受窗口限制)
+
+    def observe(self, value: float):
+        self._samples.append((time.monotonic(), value))
+        self.total_count += 1
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def summary(self) -> Dict[str, float]:
+        """窗口内样本的 count/p50/p95/p99/max"""
+        self._prune()
+        values = sorted(value for _, value in self._samples)
+        if not values:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+        def percentile(p: float) -> float:
+            return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+        return {
+            "count": len(values),
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": values[-1],
+        }
+
+class HistogramSet:
+    """按键(如 端点/阶段)惰性创建的一组滚动直方图"""
+
+    def __init__(self, max_samples: int = 1024, max_age: float = 3600):
+        self.max_samples = max_samples
+        self.max_age = max_age
+        self._histograms: Dict[Tuple[str, ...], RollingHistogram] = {}
+
+    def observe(self, key: Tuple[str, ...], value: float):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = RollingHistogram(self.max_samples, self.max_age)
+        histogram.observe(value)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        return {key: histogram.summary() for key, histogram in sorted(self._histograms.items())}
@@ -0,0 +1,97 @@
+"""
+通知端到端延迟统计
+
+为每条推送的通知记录时间链: 平台创建(create_time) → 首次被轮询/推送发现 → 格式化完成 → 各群发送完成,
+汇总为分阶段和分群的滚动直方图(p50/p95/p99)。
+
+平台与本机的时钟偏差会计入"发现"阶段和端到端延迟, 其余阶段只使用本机时间。
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .metrics import HistogramSet
+from .poll_interval import parse_game_time
+
+STAGE_DETECT = "detect"            # 平台创建 → 首次发现
+STAGE_FORMAT = "format"            # 发现 → 格式化完成(含汇总窗口等待)
+STAGE_SEND = "send"                # 格式化完成 → 群消息发送完成(排队、限流、重试)
+STAGE_END_TO_END = "end_to_end"    # 平台创建 → 群消息发送完成
+STAGES = (STAGE_DETECT, STAGE_FORMAT, STAGE_SEND, STAGE_END_TO_END)
+
+def parse_create_time(create_time) -> Optional[float]:
+    try:
+        return parse_game_time(create_time)
+    except (TypeError, ValueError):
+        return None
+
+class NoticeTrace:
+    __slots__ = ("category", "created_at", "seen_at", "formatted_at", "sent_at")
+
+    def __init__(self, category: Optional[str], created_at: Optional[float], seen_at: float):
+        self.category = category
+        self.created_at = created_at
+        self.seen_at = seen_at
+        self.formatted_at: Optional[float] = None
+        self.sent_at: Dict[int, float] = {}   # 群号 -> 发送完成时间
+
+class NoticeLatencyTracker:
+    def __init__(self, max_traces: int = 1024, max_samples: int = 1024, max_age: float = 3600):
+        self.max_traces = max_traces   # 最多保留的通知时间链, 超出时淘汰最早发现的通知
+        self.stages = HistogramSet(max_samples, max_age)   # (阶段,) -> 秒
+        self.groups = HistogramSet(max_samples, max_age)   # (群号,) -> 端到端秒数
+        self._traces: "OrderedDict[Tuple[int, int], NoticeTrace]" = OrderedDict()
+
+    def seen(self, game_id: int, notices: Iterable[Dict]):
+        """通知首次被发现(轮询、推送或重启补发)"""
+        now = time.time()
+        for notice in notices:
+            key = (game_id, notice.get("notice_id"))
+            if key in self._traces:
+                continue
+            created_at = parse_create_time(notice.get("create_time"))
+            self._traces[key] = NoticeTrace(notice.get("notice_category"), created_at, now)
+            if created_at is not None:
+                self.stages.observe((STAGE_DETECT,), max(0.0, now - created_at))
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+
+    def formatted(self, game_id: int, notices: Iterable[Dict]):
+        """通知已格式化为待发送的消息"""
+        now = time.time()
+        for notice in notices:
+            trace = self._traces.get((game_id, notice.get("notice_id")))
+            if trace and trace.formatted_at is None:
+                trace.formatted_at = now
+                self.stages.observe((STAGE_FORMAT,), now - trace.seen_at)
+
+    def sent(self, game_id: int, notices: Iterable[Dict], group_id: int):
+        """包含这些通知的消息已发送到群聊(同一通知在每个群只计一次)"""
+        now = time.time()
+        for notice in notices:
+            trace = self._traces.get((game_id, notice.get("notice_id")))
+            if trace is None or group_id in trace.sent_at:
+                continue
+            trace.sent_at[group_id] = now
+            if trace.formatted_at is not None:
+                self.stages.observe((STAGE_SEND,), now - trace.formatted_at)
+            if trace.created_at is not None:
+                latency = max(0.0, now - trace.created_at)
+                self.stages.observe((STAGE_END_TO_END,), latency)
+                self.groups.observe((str(group_id),), latency)
+
+    def on_sent(self, game_id: int, notices: Iterable[Dict]) -> Callable[[int], None]:
+        """出站队列的发送完成回调"""
+        notices = list(notices)
+        return lambda group_id: self.sent(game_id, notices, group_id)
+
+    def get_trace(self, game_id: int, notice_id: int) -> Optional[NoticeTrace]:
+        return self._traces.get((game_id, notice_id))
+
+    def get_stats(self) -> Dict:
+        stages = self.stages.snapshot()
+        return {
+            "stages": {stage: stages[(stage,)] for stage in STAGES if (stage,) in stages},
+            "groups": {key[0]: summary for key, summary in self.groups.snapshot().items()},
+            "tracked": len(self._traces),
+        }
@@ -1,195 +1,548 @@
 import asyncio
 import aiohttp
-from datetime import datetime
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Tuple
 from nonebot import get_bot, logger
 from nonebot_plugin_apscheduler import scheduler
 
 from .config import (
-    NOTICES_API, CHECK_INTERVAL, TARGET_GROUPS, 
-    NOTICE_CATEGORIES, API_CONFIG
+    CHECK_INTERVAL, API_CONFIG, NOTICE_POLL_CONFIG, NOTICE_STORE_CONFIG,
+    ADAPTIVE_POLL_CONFIG, DELIVERY_CONFIG, DIGEST_CONFIG, NOTICE_PUSH_CONFIG,
+    MESSAGE_TEMPLATES, DIGEST_LINE_TEMPLATES, NOTICE_TEMPLATE_CONFIG
 )
 from .a1ctf_client import get_a1ctf_client
+from .outbound_queue import (
+    OutboundQueue, PRIORITY_BLOOD, PRIORITY_HINT, PRIORITY_ANNOUNCEMENT
+)
+from .notice_store import NoticeStore
+from .notice_watermark import NoticeWatermark
+from .notice_source import PushNoticeSource
+from .notice_templates import NoticeTemplateEngine
+from .notice_latency import NoticeLatencyTracker
+from .group_cache import GroupListCache
+from .poll_interval import AdaptivePollInterval, GAME_START_CATEGORY, GAME_END_CATEGORY
+from .games import GameInfo, get_games, get_game
+from .resilience import CircuitOpenError, RetryPolicy
+
+# 代表有队伍解出题目(积分发生变化)的通知类型
+SOLVE_NOTICE_CATEGORIES = {"FirstBlood", "SecondBlood", "ThirdBlood"}
+
+MONITOR_JOB_ID = "ctf_notice_monitor"
+
+class GameMonitor:
+    """一场比赛的监控状态: 水位线、推送计数、汇总缓冲与推送通道"""
 
-# 存储已处理的通知ID
-processed_notices: Set[int] = set()
+    def __init__(self, game: GameInfo):
+        self.game = game
+        self.watermark = NoticeWatermark(NOTICE_POLL_CONFIG["dedup_window"])
+        self.delivered_count = 0
+        self.ended = False          # 已收到 GameEnd 通知, 定时检查不再轮询该比赛
+        # 监控启动后还没有成功获取过通知: 第一次成功获取时才恢复水位线(限制补发条数)或建立水位线
+        self.pending_resume = False
+        self.push: Optional[PushNoticeSource] = None
+        # 汇总模式下等待合并发送的通知
+        self.digest_buffer: List[Dict] = []
+        self.digest_flush_task: Optional[asyncio.Task] = None
+
+    def get_status(self) -> Dict:
+        return {
+            "game_id": self.game.game_id,
+            "name": self.game.name,
+            "api_url": self.game.notices_api,
+            "watermark": self.watermark.watermark,
+            "dedup_window_count": self.watermark.recent_count(),
+            "delivered_count": self.delivered_count,
+            "ended": self.ended,
+            "pending_resume": self.pending_resume,
+            "push_stats": self.push.get_stats() if self.push else None,
+        }
+
+# 所有被监控的比赛, 共用同一个A1CTF客户端会话与定时任务
+game_monitors: Dict[int, GameMonitor] = {game.game_id: GameMonitor(game) for game in get_games()}
 is_monitoring = False
 
-async def fetch_notices() -> List[Dict]:
-    """获取最新的通知列表"""
+# 检查任务的防重入状态
+_check_lock = asyncio.Lock()
+_check_task: Optional[asyncio.Task] = None
+_followup_pending = False
+_include_ended_pending = False  # 手动检查要求下一轮检查包含已结束的比赛
+check_runs = 0          # 实际执行的检查次数
+coalesced_runs = 0      # 检查进行中到达、合并为一次补充检查的定时触发次数
+skipped_runs = 0        # 已有补充检查排队时被直接跳过的定时触发次数
+joined_runs = 0         # 加入进行中检查的手动检查次数
+
+notice_templates = NoticeTemplateEngine(
+    MESSAGE_TEMPLATES,
+    DIGEST_LINE_TEMPLATES,
+    header=NOTICE_TEMPLATE_CONFIG.get("header", ""),
+    override_path=NOTICE_TEMPLATE_CONFIG.get("override_path"),
+    reload_check_interval=NOTICE_TEMPLATE_CONFIG.get("reload_check_interval", 10),
+)
+
+# 每条通知从平台创建到各群发送完成的时间链
+notice_latency = NoticeLatencyTracker()
+
+notice_store: Optional[NoticeStore] = None
+if NOTICE_STORE_CONFIG.get("enabled"):
+    notice_store = NoticeStore(
+        NOTICE_STORE_CONFIG["path"],
+        NOTICE_STORE_CONFIG.get("max_log_rows", 5000),
+        legacy_game_id=get_game().game_id,
+    )
+
+outbound_queue = OutboundQueue(
+    group_rate=DELIVERY_CONFIG.get("group_rate", 1.0),
+    group_capacity=DELIVERY_CONFIG.get("group_capacity", 3),
+    account_rate=DELIVERY_CONFIG.get("account_rate", 4.0),
+    account_capacity=DELIVERY_CONFIG.get("account_capacity", 10),
+    retry_policy=RetryPolicy(
+        attempts=DELIVERY_CONFIG.get("retry_attempts", 3),
+        base_delay=DELIVERY_CONFIG.get("retry_base_delay", 1.0),
+        max_delay=DELIVERY_CONFIG.get("retry_max_delay", 10.0),
+    ),
+    max_queue_per_group=DELIVERY_CONFIG.get("max_queue_per_group", 50),
+    dead_letter_path=DELIVERY_CONFIG.get("dead_letter_path"),
+    max_dead_letters=DELIVERY_CONFIG.get("max_dead_letters", 200),
+)
+
+group_list_cache = GroupListCache(DELIVERY_CONFIG.get("group_list_ttl", 600))
+
+def _create_push_source(monitor: GameMonitor) -> PushNoticeSource:
+    return PushNoticeSource(
+        NOTICE_PUSH_CONFIG["url"].format(game_id=monitor.game.game_id),
+        lambda: get_a1ctf_client().session,
+        lambda notices: handle_pushed_notices(monitor, notices),
+        on_state_change=lambda connected: handle_push_state(monitor, connected),
+        authenticate=lambda: _push_authenticate(),
+        mode=NOTICE_PUSH_CONFIG.get("mode", "websocket"),
+        base_delay=NOTICE_PUSH_CONFIG.get("reconnect_base_delay", 1.0),
+        max_delay=NOTICE_PUSH_CONFIG.get("reconnect_max_delay", 60.0),
+        heartbeat=NOTICE_PUSH_CONFIG.get("heartbeat", 30.0),
+    )
+
+if NOTICE_PUSH_CONFIG.get("enabled") and NOTICE_PUSH_CONFIG.get("url"):
+    for _monitor in game_monitors.values():
+        _monitor.push = _create_push_source(_monitor)
+
+poll_interval: Optional[AdaptivePollInterval] = None
+if ADAPTIVE_POLL_CONFIG.get("enabled"):
+    poll_interval = AdaptivePollInterval(
+        CHECK_INTERVAL,
+        ADAPTIVE_POLL_CONFIG.get("floor", CHECK_INTERVAL),
+        ADAPTIVE_POLL_CONFIG.get("ceiling", CHECK_INTERVAL),
+        backoff_factor=ADAPTIVE_POLL_CONFIG.get("backoff_factor", 1.5),
+        game_start=ADAPTIVE_POLL_CONFIG.get("game_start"),
+        hot_window=ADAPTIVE_POLL_CONFIG.get("hot_window", 3600),
+        pause_after_game_end=ADAPTIVE_POLL_CONFIG.get("pause_after_game_end", True),
+    )
+
+async def fetch_notices(game: Optional[GameInfo] = None, since_id: Optional[int] = None) -> Optional[List[Dict]]:
+    """
+    获取比赛最新的通知列表(未指定比赛时为默认比赛), 请求失败时返回 None
+
+    配置了 NOTICE_POLL_CONFIG["since_param"] 且给出 since_id 时, 只请求该ID之后的增量通知。
+    """
     client = get_a1ctf_client()
     if not client:
         logger.error("A1CTF client not initialized.")
-        return []
+        return None
 
     try:
-        headers = API_CONFIG["headers"]
         timeout = API_CONFIG["notices"]["timeout"]
+        params = None
+        since_param = NOTICE_POLL_CONFIG.get("since_param")
+        if since_param and since_id:
+            params = {since_param: since_id}
         
-        data = await client.request("GET", NOTICES_API, headers=headers, timeout=timeout)
+        game = game or get_game()
+        data = await client.request("GET", game.notices_api, timeout=timeout, params=params)
         
         if data.get("code") == 200:
             return data.get("data", [])
         else:
             logger.warning(f"API returned error code: {data.get('code')}, message: {data.get('message')}")
             
+    except CircuitOpenError as e:
+        logger.debug(f"Skipped notices fetch: {e}")
     except aiohttp.ClientResponseError as e:
         logger.warning(f"API request failed with status: {e.status}, message: {e.message}")
     except asyncio.TimeoutError:
         logger.error("API request timed out.")
     except Exception as e:
         logger.error(f"Failed to fetch notices: {e}")
-    return []
+    return None
+
+def notice_priority(notice: Dict) -> int:
+    """通知在出站队列中的优先级: 血条 > 提示 > 其他公告"""
+    category = notice.get("notice_category")
+    if category in SOLVE_NOTICE_CATEGORIES:
+        return PRIORITY_BLOOD
+    if category in ("NewHint", "Hint"):
+        return PRIORITY_HINT
+    return PRIORITY_ANNOUNCEMENT
 
 def format_notice_message(notice: Dict) -> str:
     """格式化通知消息"""
-    notice_id = notice.get("notice_id")
-    category = notice.get("notice_category")
-    data = notice.get("data", [])
-    create_time = notice.get("create_time")
+    return notice_templates.render_message(notice)
+
+def format_notice_line(notice: Dict) -> str:
+    """把通知格式化为汇总消息中的一行"""
+    return notice_templates.render_line(notice)
+
+def format_notice_digests(notices: List[Dict], max_length: int = 1500) -> List[str]:
+    """把多条通知合并为汇总消息, 单条不超过 max_length 个字符"""
+    return notice_templates.render_digests(notices, max_length)
+
+def collect_new_notices(monitor: GameMonitor, notices: List[Dict]) -> Tuple[List[Dict], List[Tuple[int, Optional[str], bool]]]:
+    """
+    从通知列表中挑出水位线之后的新通知并推进水位线
+
+    返回 (待推送通知(按ID排序), 本周期的 (notice_id, 类型, 是否推送) 记录)
+    """
+    new_notices = []
+    records = []
+    watermark = monitor.watermark
+    is_new = watermark.is_new
+    for notice in notices:
+        notice_id = notice.get("notice_id")
+        if not notice_id or not is_new(notice_id):
+            continue
+        watermark.mark(notice_id)
+        
+        # 过滤通知类型 - 如果比赛的通知类型配置为空，则推送所有类型
+        category = notice.get("notice_category")
+        if not monitor.game.accepts(category):
+            records.append((notice_id, category, False))
+            continue
+        new_notices.append(notice)
+        records.append((notice_id, category, True))
     
-    # 解析时间
+    # 只对新通知按ID排序，确保按顺序发送
+    new_notices.sort(key=lambda x: x.get("notice_id", 0))
+    return new_notices, records
+
+def persist_cycle(monitor: GameMonitor, records: List[Tuple[int, Optional[str], bool]]):
+    """一个轮询周期结束后一次性写入比赛的水位线与推送记录"""
+    if not notice_store:
+        return
     try:
-        dt = datetime.fromisoformat(create_time.replace('Z', '+00:00'))
-        time_str = dt.strftime("%m-%d %H:%M")
-    except:
-        time_str = create_time
-    
-    # 根据类型设置emoji和颜色
-    emoji_map = {
-        "FirstBlood": "🥇",
-        "SecondBlood": "🥈", 
-        "ThirdBlood": "🥉",
-        "NewChallenge": "🆕",
-        "ChallengeUpdate": "🔄",
-        "GameStart": "🎯",
-        "GameEnd": "🏁",
-        "Announcement": "📢",
-        "Hint": "💡",
-        "NewHint": "💡",  # 新提示
-        "TeamUpdate": "👥",
-        "ScoreUpdate": "📊",
-        "SystemNotice": "⚙️"
-    }
+        notice_store.record_cycle(monitor.game.game_id, monitor.watermark.watermark, records)
+    except Exception as e:
+        logger.error(f"保存通知状态失败: {e}")
+
+async def deliver_notices(monitor: GameMonitor, new_notices: List[Dict]):
+    """推送比赛的新通知"""
+    if not new_notices:
+        return
+    monitor.delivered_count += len(new_notices)
+    notice_latency.seen(monitor.game.game_id, new_notices)
     
-    emoji = emoji_map.get(category, "🎯")  # 默认使用🎯表示未知类型
+    # 出现解题通知说明积分已变化, 使该比赛的积分榜缓存失效
+    client = get_a1ctf_client()
+    if client and any(notice.get("notice_category") in SOLVE_NOTICE_CATEGORIES for notice in new_notices):
+        client.invalidate_cache(monitor.game.scoreboard_api)
     
-    # 根据通知类型解析数据格式
-    if category in ["FirstBlood", "SecondBlood", "ThirdBlood"]:
-        # 血条通知：[队伍名, 题目名]
-        team_name = data[0] if len(data) > 0 else "未知队伍"
-        challenge_name = data[1] if len(data) > 1 else "未知题目"
-        
-        # 根据血条类型设置描述
-        blood_desc = {
-            "FirstBlood": "first blood",
-            "SecondBlood": "second blood", 
-            "ThirdBlood": "third blood"
-        }
-        desc = blood_desc.get(category, "blood")
-        
-        message = f"""🎮 CTF赛事通知 🎮
+    window = DIGEST_CONFIG.get("window", 0) if DIGEST_CONFIG.get("enabled") else 0
+    if window > 0:
+        # 汇总窗口内到达的通知合并发送, 窗口从第一条通知开始计时
+        monitor.digest_buffer.extend(new_notices)
+        if monitor.digest_flush_task is None or monitor.digest_flush_task.done():
+            monitor.digest_flush_task = asyncio.create_task(_flush_digest_after(monitor, window))
+        return
+    
+    await send_notices(monitor, new_notices)
 
-{emoji} {team_name} has got {challenge_name}'s {desc}!
-👥 队伍: {team_name}
-📝 题目: {challenge_name}
-⏰ 时间: {time_str}
-"""
-        
-    elif category == "NewHint":
-        # 新提示通知：[题目名]
-        challenge_name = data[0] if len(data) > 0 else "未知题目"
-        
-        message = f"""🎮 CTF赛事通知 🎮
+async def _flush_digest_after(monitor: GameMonitor, window: float):
+    await asyncio.sleep(window)
+    notices = sorted(monitor.digest_buffer, key=lambda x: x.get("notice_id", 0))
+    monitor.digest_buffer.clear()
+    await send_notices(monitor, notices)
 
-{emoji} Challenge [{challenge_name}] added a new hint
-📝 题目: {challenge_name}
-⏰ 时间: {time_str}
-"""
-        
-    else:
-        # 其他类型通知的通用格式
-        content = ", ".join(data) if data else "无详细信息"
+async def send_notices(monitor: GameMonitor, notices: List[Dict]):
+    """格式化并发送通知; 开启汇总模式且通知数达到阈值时合并为汇总消息"""
+    if not notices:
+        return
+    try:
+        bot = get_bot()
+        # 模板覆盖文件有修改时重新编译, 每批通知最多检查一次
+        notice_templates.maybe_reload()
+        game_id = monitor.game.game_id
+        if DIGEST_CONFIG.get("enabled") and len(notices) >= DIGEST_CONFIG.get("min_notices", 2):
+            messages = format_notice_digests(notices, DIGEST_CONFIG.get("max_length", 1500))
+            # 汇总消息按其中最重要的通知排优先级
+            priorities = [min(notice_priority(notice) for notice in notices)] * len(messages)
+            # 汇总拆分为多条时, 以最后一条发送完成作为其中所有通知的送达时间
+            on_sent = [None] * (len(messages) - 1) + [notice_latency.on_sent(game_id, notices)]
+        else:
+            messages = [format_notice_message(notice) for notice in notices]
+            priorities = [notice_priority(notice) for notice in notices]
+            on_sent = [notice_latency.on_sent(game_id, [notice]) for notice in notices]
+        notice_latency.formatted(game_id, notices)
+        await send_to_groups(bot, messages, priorities, monitor.game.target_groups, on_sent)
         
-        message = f"""🎮 CTF赛事通知 🎮
+        for notice in notices:
+            logger.info(f"提交通知: [{monitor.game.name}] {notice.get('notice_id')} - {notice.get('notice_category')}")
+            
+    except Exception as e:
+        logger.error(f"发送通知失败: {e}")
 
-{emoji} {category}
-📄 内容: {content}
-⏰ 时间: {time_str}
-"""
-    
-    return message
+def effective_interval() -> float:
+    """当前轮询间隔: 所有比赛的推送通道都正常时只做兜底轮询"""
+    pushes = [monitor.push for monitor in game_monitors.values()]
+    if pushes and all(push and push.connected for push in pushes):
+        return NOTICE_PUSH_CONFIG.get("safety_poll_interval", 300)
+    return poll_interval.current if poll_interval else CHECK_INTERVAL
 
-async def check_new_notices():
-    """检查新通知"""
-    global processed_notices
-    
-    notices = await fetch_notices()
-    if not notices:
+def adjust_poll_interval(categories: List[Optional[str]]):
+    """根据本周期所有比赛的新通知调整定时任务的轮询间隔, 全部比赛结束后暂停任务"""
+    if not poll_interval or not is_monitoring:
         return
     
-    # 按时间排序，确保按顺序处理
-    notices.sort(key=lambda x: x.get("notice_id", 0))
+    if GAME_END_CATEGORY in categories and not all(monitor.ended for monitor in game_monitors.values()):
+        # 还有比赛在进行, 单场比赛结束只算作一次普通活动
+        categories = [category for category in categories if category != GAME_END_CATEGORY]
     
-    new_notices = []
-    for notice in notices:
-        notice_id = notice.get("notice_id")
-        category = notice.get("notice_category")
-        
-        # 过滤通知类型 - 如果NOTICE_CATEGORIES为空，则推送所有类型
-        if NOTICE_CATEGORIES and category not in NOTICE_CATEGORIES:
-            if notice_id:
-                processed_notices.add(notice_id)
+    was_paused = poll_interval.paused
+    previous = effective_interval()
+    poll_interval.update(categories)
+    interval = effective_interval()
+    try:
+        if poll_interval.paused:
+            if not was_paused:
+                scheduler.pause_job(MONITOR_JOB_ID)
+                logger.info("所有比赛均已结束, 暂停通知轮询")
+            return
+        if was_paused:
+            scheduler.resume_job(MONITOR_JOB_ID)
+            logger.info("比赛重新开始, 恢复通知轮询")
+        if was_paused or interval != previous:
+            scheduler.reschedule_job(MONITOR_JOB_ID, trigger="interval", seconds=interval)
+            logger.debug(f"通知轮询间隔调整为 {interval:.0f} 秒")
+    except Exception as e:
+        logger.warning(f"调整通知轮询间隔失败: {e}")
+
+async def check_new_notices(include_ended: bool = False):
+    """
+    并发检查各场比赛的新通知, 每场比赛每个周期一次请求
+
+    开启 pause_after_game_end 时定时检查跳过已结束的比赛; include_ended(手动检查)时仍检查,
+    以便发现比赛重新开始的通知
+    """
+    skip_ended = ADAPTIVE_POLL_CONFIG.get("pause_after_game_end", True) and not include_ended
+    monitors = [monitor for monitor in game_monitors.values() if not (skip_ended and monitor.ended)]
+    results = await asyncio.gather(*(check_game(monitor) for monitor in monitors), return_exceptions=True)
+    
+    categories = []
+    for monitor, result in zip(monitors, results):
+        if isinstance(result, Exception):
+            logger.error(f"检查比赛 {monitor.game.name} 的通知失败: {result}")
             continue
-            
-        if notice_id and notice_id not in processed_notices:
-            new_notices.append(notice)
-            processed_notices.add(notice_id)
+        categories.extend(result)
+    adjust_poll_interval(categories)
+
+async def check_game(monitor: GameMonitor) -> List[Optional[str]]:
+    """检查一场比赛的新通知, 返回新通知的类型列表"""
+    # 增量请求时回退 since_overlap 个ID, 以便取回乱序迟到的通知
+    since_id = max(0, monitor.watermark.watermark - NOTICE_POLL_CONFIG.get("since_overlap", 0))
+    notices = await fetch_notices(monitor.game, since_id)
+    if notices is None:
+        return []
+    if monitor.pending_resume:
+        return await resume_monitor(monitor, notices)
     
-    # 发送新通知
-    if new_notices:
+    # 通知列表为空或与上次相同(304或响应体未变化)时无需逐条比对
+    client = get_a1ctf_client()
+    if not notices or (client and client.is_unchanged(monitor.game.notices_api)):
+        return []
+    
+    return await process_notices(monitor, notices)
+
+async def process_notices(monitor: GameMonitor, notices: List[Dict]) -> List[Optional[str]]:
+    """处理一场比赛的一批通知(轮询或推送得到): 挑出新通知、持久化并推送, 返回新通知的类型列表"""
+    new_notices, records = collect_new_notices(monitor, notices)
+    categories = [category for _, category, _ in records]
+    if GAME_START_CATEGORY in categories:
+        monitor.ended = False
+    if GAME_END_CATEGORY in categories:
+        monitor.ended = True
+        logger.info(f"比赛 {monitor.game.name} 已结束")
+    # 先持久化再发送: 发送中途重启时宁可漏发也不重复刷屏
+    if records:
+        persist_cycle(monitor, records)
+    await deliver_notices(monitor, new_notices)
+    return categories
+
+async def _run_checks():
+    """在锁内执行检查; 执行期间有定时触发到达时, 结束后再补充执行一次"""
+    global _followup_pending, _include_ended_pending, check_runs
+    
+    async with _check_lock:
+        while True:
+            include_ended = _include_ended_pending
+            _followup_pending = _include_ended_pending = False
+            check_runs += 1
+            await check_new_notices(include_ended)
+            if not _followup_pending or not is_monitoring:
+                break
+
+async def run_check(manual: bool = False):
+    """
+    执行一次通知检查, 保证同一时间只有一次检查在运行
+
+    - 定时触发时已有检查在运行: 合并为结束后的一次补充检查
+    - 手动检查时已有检查在运行: 等待该次检查完成, 不另起一次;
+      有已结束的比赛时追加一次包含已结束比赛的补充检查并等待其完成
+
+    定时触发只启动检查任务后立即返回, 不等待检查完成: 否则 APScheduler 会把
+    运行中的任务计为一个实例, 在 max_instances=1 下直接丢弃期间的触发, 补充检查永远不会发生。
+    """
+    global _check_task, _followup_pending, _include_ended_pending, coalesced_runs, skipped_runs, joined_runs
+    
+    if manual and any(monitor.ended for monitor in game_monitors.values()):
+        _include_ended_pending = True
+    if _check_task and not _check_task.done():
+        if manual:
+            joined_runs += 1
+            _followup_pending = _followup_pending or _include_ended_pending
+        elif _followup_pending:
+            skipped_runs += 1
+            return
+        else:
+            _followup_pending = True
+            coalesced_runs += 1
+            return
+    else:
+        _check_task = asyncio.create_task(_run_checks())
+        _check_task.add_done_callback(_log_check_failure)
+    
+    if manual:
+        # shield: 调用方(如命令处理)被取消时不中断正在进行的检查
+        task = _check_task
         try:
-            bot = get_bot()
-            for notice in new_notices:
-                message = format_notice_message(notice)
-                
-                await send_to_groups(bot, message)
-                
-                logger.info(f"发送通知: {notice.get('notice_id')} - {notice.get('notice_category')}")
-                
-                # 避免发送过快
-                await asyncio.sleep(1)
-                
-        except Exception as e:
-            logger.error(f"发送通知失败: {e}")
-
-async def send_to_groups(bot, message: str):
-    """发送消息到指定群组"""
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 检查被停止监控取消时正常返回, 调用方自身被取消时继续传播
+            if not task.cancelled():
+                raise
+
+def _log_check_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"通知检查失败: {task.exception()}")
+
+async def handle_pushed_notices(monitor: GameMonitor, notices: List[Dict]):
+    """处理推送通道收到的通知, 与轮询检查共用同一把锁, 避免重复推送"""
+    if not is_monitoring:
+        return
+    async with _check_lock:
+        categories = await process_notices(monitor, notices)
+        adjust_poll_interval(categories)
+
+async def handle_push_state(monitor: GameMonitor, connected: bool):
+    """推送通道连接状态变化: 连上后降为兜底轮询, 断开后恢复正常轮询并立即补查一次"""
+    if not is_monitoring:
+        return
+    if connected:
+        logger.info(f"比赛 {monitor.game.name} 的通知推送通道已连接")
+    else:
+        logger.warning(f"比赛 {monitor.game.name} 的通知推送通道已断开, 回退到轮询")
+    try:
+        if not (poll_interval and poll_interval.paused):
+            scheduler.reschedule_job(MONITOR_JOB_ID, trigger="interval", seconds=effective_interval())
+    except Exception as e:
+        logger.warning(f"调整通知轮询间隔失败: {e}")
+    if not connected:
+        asyncio.create_task(run_check())
+
+async def _push_authenticate():
+    client = get_a1ctf_client()
+    if client:
+        await client.relogin(client.login_generation)
+
+async def resume_from_store(monitor: GameMonitor, notices: List[Dict]) -> bool:
+    """
+    从持久化的水位线恢复比赛, 补发停机期间的通知(最多 backlog_limit 条)
+
+    没有保存过状态时返回 False
+    """
+    if not notice_store:
+        return False
+    game_id = monitor.game.game_id
     try:
-        # 如果配置了特定群组，只发送到这些群组
-        if TARGET_GROUPS:
-            for group_id in TARGET_GROUPS:
-                try:
-                    await bot.send_group_msg(group_id=group_id, message=message)
-                    await asyncio.sleep(0.5)  # 避免发送过快
-                except Exception as e:
-                    logger.warning(f"向群组 {group_id} 发送消息失败: {e}")
+        watermark = notice_store.load_watermark(game_id)
+        if watermark is None:
+            return False
+        recent_ids = notice_store.load_recent_ids(game_id, watermark - monitor.watermark.window)
+    except Exception as e:
+        logger.error(f"读取通知状态失败: {e}")
+        return False
+    
+    monitor.watermark.restore(watermark, recent_ids)
+    backlog, records = collect_new_notices(monitor, notices)
+    
+    limit = NOTICE_STORE_CONFIG.get("backlog_limit", 10)
+    if len(backlog) > limit:
+        skipped = backlog[:len(backlog) - limit]
+        backlog = backlog[len(backlog) - limit:]
+        skipped_ids = {notice.get("notice_id") for notice in skipped}
+        records = [(nid, cat, delivered and nid not in skipped_ids) for nid, cat, delivered in records]
+        logger.warning(f"比赛 {monitor.game.name} 停机期间积压 {len(skipped) + len(backlog)} 条通知, 只补发最新的 {len(backlog)} 条")
+    
+    logger.info(f"比赛 {monitor.game.name} 从水位线 #{watermark} 恢复通知监控, 补发 {len(backlog)} 条通知")
+    persist_cycle(monitor, records)
+    await deliver_notices(monitor, backlog)
+    return True
+
+async def resume_monitor(monitor: GameMonitor, notices: List[Dict]) -> List[Optional[str]]:
+    """
+    监控启动后第一次成功获取到比赛的通知列表: 从保存的水位线恢复并补发积压通知,
+    没有保存过状态时以现有通知建立水位线(不推送)
+
+    获取失败时不能调用: 失败的请求会被当作"没有通知", 恢复时不限制之后的补发条数,
+    首次启动时则会保存空的水位线, 下一次成功轮询把历史通知全部推送出去
+    """
+    monitor.pending_resume = False
+    if await resume_from_store(monitor, notices):
+        return []
+    
+    # 首次启动时以现有通知建立水位线，避免重复发送
+    records = [
+        (notice.get("notice_id"), notice.get("notice_category"), False)
+        for notice in notices if notice.get("notice_id")
+    ]
+    monitor.watermark.reset(notice_id for notice_id, _, _ in records)
+    if records:
+        persist_cycle(monitor, records)
+    return []
+
+def group_sender(bot):
+    """生成通过指定bot发送群消息的函数, 供出站队列调用"""
+    async def send(group_id: int, message):
+        await bot.send_group_msg(group_id=group_id, message=message)
+    return send
+
+async def send_to_groups(bot, messages, priorities: Optional[List[int]] = None,
+                         target_groups: Optional[List[int]] = None, on_sent: Optional[List] = None):
+    """
+    通过出站队列发送消息到指定群组, 各群并发, 按优先级出队
+
+    只提交到队列不等待发送完成: 调用方持有检查锁, 某个群的发送重试不能阻塞下一次轮询和推送处理;
+    同一群内的发送顺序由出站队列保证
+    """
+    if isinstance(messages, str):
+        messages = [messages]
+    try:
+        # 如果配置了特定群组，只发送到这些群组；否则发送到所有群组
+        if target_groups:
+            group_ids = list(target_groups)
         else:
-            # 否则发送到所有群组
-            group_list = await bot.get_group_list()
-            for group in group_list:
-                group_id = group.get("group_id")
-                try:
-                    await bot.send_group_msg(group_id=group_id, message=message)
-                    await asyncio.sleep(0.5)  # 避免发送过快
-                except Exception as e:
-                    logger.warning(f"向群组 {group_id} 发送消息失败: {e}")
+            group_ids = await group_list_cache.get(bot)
+        
+        outbound_queue.enqueue(group_sender(bot), group_ids, messages, priorities, on_sent)
     except Exception as e:
         logger.error(f"发送消息失败: {e}")
 
 async def start_notice_monitor():
     """开始监控"""
-    global is_monitoring, processed_notices
+    global is_monitoring
     
     if is_monitoring:
         return
@@ -197,22 +550,36 @@ async def start_notice_monitor():
     is_monitoring = True
     logger.info("开始CTF通知监控")
     
-    # 初始化时获取所有现有通知ID，避免重复发送
-    notices = await fetch_notices()
-    processed_notices = {notice.get("notice_id") for notice in notices if notice.get("notice_id")}
+    monitors = list(game_monitors.values())
+    for monitor in monitors:
+        monitor.ended = False
+        monitor.pending_resume = True
+    results = await asyncio.gather(*(fetch_notices(monitor.game) for monitor in monitors))
+    for monitor, notices in zip(monitors, results):
+        if notices is None:
+            logger.warning(f"比赛 {monitor.game.name} 的通知获取失败, 将在第一次成功轮询时恢复水位线")
+            continue
+        await resume_monitor(monitor, notices)
     
     # 添加定时任务
+    if poll_interval:
+        poll_interval.reset()
     scheduler.add_job(
-        check_new_notices,
+        run_check,
         "interval",
         seconds=CHECK_INTERVAL,
-        id="ctf_notice_monitor",
-        replace_existing=True
+        id=MONITOR_JOB_ID,
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1
     )
+    for monitor in monitors:
+        if monitor.push:
+            monitor.push.start()
 
 async def stop_notice_monitor():
     """停止监控"""
-    global is_monitoring
+    global is_monitoring, _followup_pending, _include_ended_pending
     
     if not is_monitoring:
         return
@@ -222,15 +589,49 @@ async def stop_notice_monitor():
     
     # 移除定时任务
     try:
-        scheduler.remove_job("ctf_notice_monitor")
+        scheduler.remove_job(MONITOR_JOB_ID)
     except:
         pass
+    
+    for monitor in game_monitors.values():
+        if monitor.push:
+            await monitor.push.stop()
+    
+    # 取消进行中的检查与汇总发送, 停止后不再持久化状态或推送通知
+    tasks = [_check_task] if _check_task and not _check_task.done() else []
+    _followup_pending = _include_ended_pending = False
+    for monitor in game_monitors.values():
+        if monitor.digest_flush_task and not monitor.digest_flush_task.done():
+            tasks.append(monitor.digest_flush_task)
+        monitor.digest_flush_task = None
+        monitor.digest_buffer.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    discarded = await outbound_queue.stop()
+    if discarded:
+        logger.info(f"停止监控, 丢弃出站队列中未发送的 {discarded} 条消息")
 
 def get_monitor_status() -> Dict:
     """获取监控状态"""
+    client = get_a1ctf_client()
     return {
         "is_monitoring": is_monitoring,
-        "processed_count": len(processed_notices),
-        "check_interval": CHECK_INTERVAL,
-        "api_url": NOTICES_API
+        "games": [monitor.get_status() for monitor in game_monitors.values()],
+        "delivered_count": sum(monitor.delivered_count for monitor in game_monitors.values()),
+        "store_path": notice_store.path if notice_store else None,
+        "check_interval": effective_interval(),
+        "base_interval": CHECK_INTERVAL,
+        "poll_paused": bool(poll_interval and poll_interval.paused),
+        "check_running": bool(_check_task and not _check_task.done()),
+        "check_runs": check_runs,
+        "coalesced_runs": coalesced_runs,
+        "skipped_runs": skipped_runs,
+        "joined_runs": joined_runs,
+        "delivery_stats": outbound_queue.get_stats(),
+        "group_list_cache": group_list_cache.get_stats(),
+        "template_stats": notice_templates.get_stats(),
+        "notice_latency": notice_latency.get_stats(),
+        "client_stats": client.get_stats() if client else {}
     }
@@ -0,0 +1,191 @@
+"""
+推送式通知源
+
+平台提供 WebSocket 或 SSE 推送通道时订阅该通道, 收到的通知立即交给回调处理;
+连接断开后按指数退避(全抖动)重连, 并通过 on_state_change 通知调用方,
+以便在推送不可用期间回退到轮询。
+
+不依赖nonebot环境, 可单独导入测试。
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PUSH_MODE_WEBSOCKET = "websocket"
+PUSH_MODE_SSE = "sse"
+
+def extract_notices(payload) -> List[Dict]:
+    """从推送消息中取出通知列表, 兼容单条通知、通知数组和 {"code": 200, "data": [...]} 三种格式"""
+    if isinstance(payload, list):
+        return [item for item in payload if isinstance(item, dict)]
+    if isinstance(payload, dict):
+        if "notice_id" in payload:
+            return [payload]
+        data = payload.get("data")
+        if isinstance(data, (list, dict)):
+            return extract_notices(data)
+    return []
+
+class PushNoticeSource:
+    def __init__(self, url: str,
+                 get_session: Callable[[], aiohttp.ClientSession],
+                 on_notices: Callable[[List[Dict]], Awaitable[None]],
+                 on_state_change: Optional[Callable[[bool], Awaitable[None]]] = None,
+                 authenticate: Optional[Callable[[], Awaitable[None]]] = None,
+                 mode: str = PUSH_MODE_WEBSOCKET, json_loads=json.loads,
+                 base_delay: float = 1.0, max_delay: float = 60.0, heartbeat: float = 30.0):
+        self.url = url
+        self.get_session = get_session
+        self.on_notices = on_notices
+        self.on_state_change = on_state_change
+        self.authenticate = authenticate    # 握手返回401时调用(重新登录), 之后立即重连
+        self.mode = mode
+        self.json_loads = json_loads
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heartbeat = heartbeat
+
+        self.connected = False
+        self.connects = 0
+        self.disconnects = 0
+        self.received = 0
+        self.last_message_at: Optional[float] = None
+        self._failures = 0
+        self._reauthenticated = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._set_connected(False)
+
+    def _next_delay(self) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** self._failures)))
+        self._failures += 1
+        return delay
+
+    async def _set_connected(self, connected: bool):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if connected:
+            self.connects += 1
+            self._failures = 0
+            self._reauthenticated = False
+        else:
+            self.disconnects += 1
+        if self.on_state_change:
+            try:
+                await self.on_state_change(connected)
+            except Exception as e:
+                logger.error(f"Push state callback failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                if self.mode == PUSH_MODE_SSE:
+                    await self._consume_sse()
+                else:
+                    await self._consume_websocket()
+                logger.warning("⚠️ Notice push channel closed by server")
+            except asyncio.CancelledError:
+                raise
+            except aiohttp.WSServerHandshakeError as e:
+                if await self._reauthenticate(e.status):
+                    continue
+                logger.warning(f"⚠️ Notice push handshake failed: HTTP {e.status}")
+            except aiohttp.ClientResponseError as e:
+                if await self._reauthenticate(e.status):
+                    continue
+                logger.warning(f"⚠️ Notice push subscription failed: HTTP {e.status}")
+            except Exception as e:
+                logger.warning(f"⚠️ Notice push channel error: {type(e).__name__}: {e}")
+
+            await self._set_connected(False)
+            delay = self._next_delay()
+            logger.info(f"🔄 Reconnecting notice push channel in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _reauthenticate(self, status: int) -> bool:
+        """握手被拒(401)时重新登录一次并立即重连; 重新登录后仍被拒则按退避重连"""
+        if status != 401 or not self.authenticate or self._reauthenticated:
+            return False
+        logger.info("🔐 Notice push channel rejected credentials, re-authenticating")
+        self._reauthenticated = True
+        await self._set_connected(False)
+        try:
+            await self.authenticate()
+        except Exception as e:
+            logger.warning(f"⚠️ Re-authentication for notice push failed: {e}")
+            return False
+        return True
+
+    async def _dispatch(self, raw):
+        try:
+            notices = extract_notices(self.json_loads(raw))
+        except ValueError:
+            logger.debug(f"Ignored non-JSON push message: {str(raw)[:100]}")
+            return
+        self.last_message_at = time.time()
+        if notices:
+            self.received += len(notices)
+            try:
+                await self.on_notices(notices)
+            except Exception as e:
+                logger.error(f"Failed to handle pushed notices: {e}")
+
+    async def _consume_websocket(self):
+        async with self.get_session().ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            await self._set_connected(True)
+            logger.info(f"✅ Notice push channel connected (websocket): {self.url}")
+            async for msg in ws:
+                if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    await self._dispatch(msg.data)
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    raise ws.exception() or ConnectionError("websocket error")
+
+    async def _consume_sse(self):
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+        # 推送连接长期保持, 只限制建立连接的时间, 用读超时检测静默断线
+        timeout = aiohttp.ClientTimeout(total=None, connect=10, sock_read=self.heartbeat * 3)
+        async with self.get_session().get(self.url, headers=headers, timeout=timeout) as resp:
+            resp.raise_for_status()
+            await self._set_connected(True)
+            logger.info(f"✅ Notice push channel connected (sse): {self.url}")
+            data_lines: List[str] = []
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if not line:
+                    # 空行表示一个事件结束
+                    if data_lines:
+                        await self._dispatch("\n".join(data_lines))
+                        data_lines = []
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip(" "))
+                # 以 ":" 开头的注释行(心跳)和 event/id 字段无需处理
+
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "connected": self.connected,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "received": self.received,
+            "last_message_at": self.last_message_at,
+        }
@@ -0,0 +1,121 @@
+"""
+通知状态持久化
+
+使用 SQLite(WAL模式) 按比赛保存通知水位线与推送记录, 机器人重启后从上次的水位线继续,
+既不重复推送也不丢失停机期间产生的通知。每个轮询周期只提交一次事务。
+"""
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS monitor_state (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notice_log (
+    game_id     INTEGER NOT NULL,
+    notice_id   INTEGER NOT NULL,
+    category    TEXT,
+    delivered   INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (game_id, notice_id)
+);
+"""
+
+class NoticeStore:
+    def __init__(self, path: str, max_log_rows: int = 5000, legacy_game_id: int = 0):
+        self.path = path
+        self.max_log_rows = max_log_rows      # 每场比赛推送记录保留的最大行数
+        self.legacy_game_id = legacy_game_id  # 旧版(单比赛)数据库迁移时归属的比赛
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self):
+        if self._conn is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL模式下 NORMAL 只在检查点时fsync, 断电最多丢失最后一个周期
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _migrate(self):
+        """把旧版单比赛的数据(不含 game_id)迁移到 legacy_game_id 名下"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(notice_log)")]
+        if not columns or "game_id" in columns:
+            return
+        logger.info(f"Migrating notice store to per-game schema (game {self.legacy_game_id})")
+        with self._conn:
+            self._conn.execute("ALTER TABLE notice_log RENAME TO notice_log_v0")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(
+                "INSERT INTO notice_log (game_id, notice_id, category, delivered, recorded_at) "
+                "SELECT ?, notice_id, category, delivered, recorded_at FROM notice_log_v0",
+                (self.legacy_game_id,),
+            )
+            self._conn.execute("DROP TABLE notice_log_v0")
+            self._conn.execute(
+                "UPDATE monitor_state SET key = ? WHERE key = 'watermark'",
+                (f"watermark:{self.legacy_game_id}",),
+            )
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def load_watermark(self, game_id: int) -> Optional[int]:
+        """读取比赛保存的水位线, 从未保存过时返回 None"""
+        self.open()
+        row = self._conn.execute("SELECT value FROM monitor_state WHERE key = ?", (f"watermark:{game_id}",)).fetchone()
+        return row[0] if row else None
+
+    def load_recent_ids(self, game_id: int, above: int) -> List[int]:
+        """读取比赛中ID大于 above 的已记录通知, 用于恢复水位线的去重窗口"""
+        self.open()
+        rows = self._conn.execute(
+            "SELECT notice_id FROM notice_log WHERE game_id = ? AND notice_id > ?", (game_id, above)
+        )
+        return [row[0] for row in rows]
+
+    def record_cycle(self, game_id: int, watermark: int, notices: Iterable[Tuple[int, Optional[str], bool]]):
+        """在一个事务中保存比赛本周期的水位线与 (notice_id, 类型, 是否已推送) 记录"""
+        self.open()
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO notice_log (game_id, notice_id, category, delivered, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(game_id, notice_id, category, int(delivered), now) for notice_id, category, delivered in notices],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO monitor_state (key, value) VALUES (?, ?)", (f"watermark:{game_id}", watermark)
+            )
+            # 按主键定位第 max_log_rows 新的记录, 删除更早的记录
+            self._conn.execute(
+                "DELETE FROM notice_log WHERE game_id = ? AND notice_id < "
+                "(SELECT notice_id FROM notice_log WHERE game_id = ? ORDER BY notice_id DESC LIMIT 1 OFFSET ?)",
+                (game_id, game_id, self.max_log_rows - 1),
+            )
+
+    def get_stats(self) -> Dict:
+        self.open()
+        total, delivered = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(delivered), 0) FROM notice_log"
+        ).fetchone()
+        return {"path": self.path, "logged": total, "delivered": delivered}
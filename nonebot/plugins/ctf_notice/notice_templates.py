@@ -0,0 +1,238 @@
+"""
+通知消息模板引擎
+
+加载时把每种通知类型的模板编译为渲染函数, 放入按通知类型分派的表中:
+渲染一条通知只需一次字典查找和一次 str.format_map, 模板中的未知字段在编译时报错,
+不会等到推送时才失败。通知时间按原始字符串缓存格式化结果。
+
+模板可从覆盖文件(JSON)热重载: 文件修改后在下次检查时重新编译并整体替换分派表,
+编译失败时保留原有模板。
+
+不依赖nonebot环境, 可单独导入测试。
+"""
+import json
+import logging
+import os
+import string
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = "default"
+
+# 根据类型设置emoji
+NOTICE_EMOJI = {
+    "FirstBlood": "🥇",
+    "SecondBlood": "🥈",
+    "ThirdBlood": "🥉",
+    "NewChallenge": "🆕",
+    "ChallengeUpdate": "🔄",
+    "GameStart": "🎯",
+    "GameEnd": "🏁",
+    "Announcement": "📢",
+    "Hint": "💡",
+    "NewHint": "💡",  # 新提示
+    "TeamUpdate": "👥",
+    "ScoreUpdate": "📊",
+    "SystemNotice": "⚙️"
+}
+DEFAULT_EMOJI = "🎯"  # 未知类型
+
+# 通知 data 数组中各位置对应的模板字段
+DATA_FIELDS = {
+    "FirstBlood": ("team_name", "challenge_name"),
+    "SecondBlood": ("team_name", "challenge_name"),
+    "ThirdBlood": ("team_name", "challenge_name"),
+    "NewHint": ("challenge_name",),
+}
+DATA_FIELD_DEFAULTS = {"team_name": "未知队伍", "challenge_name": "未知题目"}
+
+# 所有类型都可用的模板字段; content 为 data 数组以逗号连接
+COMMON_FIELDS = frozenset({"emoji", "category", "notice_id", "time", "content"})
+
+# 配置中缺少 default 模板时使用
+FALLBACK_TEMPLATE = "{emoji} {category}: {content} ({time})"
+
+Renderer = Callable[[Dict], str]
+
+@lru_cache(maxsize=4096)
+def format_notice_time(create_time) -> str:
+    """解析通知时间, 结果按原始字符串缓存"""
+    try:
+        dt = datetime.fromisoformat(create_time.replace('Z', '+00:00'))
+        return dt.strftime("%m-%d %H:%M")
+    except (AttributeError, TypeError, ValueError):
+        return create_time
+
+def compile_template(template: str, category: Optional[str] = None, prefix: str = "", suffix: str = "") -> Renderer:
+    """
+    把模板编译为渲染函数
+
+    category 为 None 时编译的是通用模板, 类型和emoji在渲染时按通知取值。
+    模板引用了该类型不提供的字段时抛出 ValueError。
+    """
+    text = prefix + template + suffix
+    data_fields = DATA_FIELDS.get(category, ())
+    available = COMMON_FIELDS.union(data_fields)
+    used = set()
+    try:
+        for _, field, _, _ in string.Formatter().parse(text):
+            if field is None:
+                continue
+            name = field.split(".", 1)[0].split("[", 1)[0]
+            if name not in available:
+                raise ValueError(f"unknown field {{{field}}}")
+            used.add(name)
+    except ValueError as e:
+        raise ValueError(f"invalid template for {category or DEFAULT_CATEGORY}: {e}") from None
+
+    fmt = text.format_map
+    positions = tuple((index, name, DATA_FIELD_DEFAULTS[name]) for index, name in enumerate(data_fields))
+    needs_content = "content" in used
+    emoji = NOTICE_EMOJI.get(category, DEFAULT_EMOJI)
+
+    def render(notice: Dict) -> str:
+        data = notice.get("data") or []
+        notice_category = notice.get("notice_category")
+        fields = {
+            "emoji": emoji if category is not None else NOTICE_EMOJI.get(notice_category, DEFAULT_EMOJI),
+            "category": notice_category,
+            "notice_id": notice.get("notice_id"),
+            "time": format_notice_time(notice.get("create_time")),
+        }
+        for index, name, default in positions:
+            fields[name] = data[index] if len(data) > index else default
+        if needs_content:
+            fields["content"] = ", ".join(data) if data else "无详细信息"
+        return fmt(fields)
+
+    return render
+
+def compile_table(templates: Dict[str, str], prefix: str = "", suffix: str = "") -> Dict[str, Renderer]:
+    """编译一组 {通知类型: 模板}, 未配置的类型使用 default 模板"""
+    table = {
+        category: compile_template(template, category, prefix, suffix)
+        for category, template in templates.items() if category != DEFAULT_CATEGORY
+    }
+    table[DEFAULT_CATEGORY] = compile_template(templates.get(DEFAULT_CATEGORY, FALLBACK_TEMPLATE), None, prefix, suffix)
+    return table
+
+class NoticeTemplateEngine:
+    def __init__(self, messages: Dict[str, str], lines: Dict[str, str], header: str = "",
+                 override_path: Optional[str] = None, reload_check_interval: float = 10.0):
+        self.messages = dict(messages)      # 单条推送的消息模板
+        self.lines = dict(lines)            # 汇总消息中每条通知一行的模板
+        self.header = header
+        self.active_header = header         # 当前生效的消息头(覆盖文件中的 header 优先)
+        self.override_path = override_path  # JSON: {"header": ..., "messages": {...}, "lines": {...}}
+        self.reload_check_interval = reload_check_interval
+
+        self.version = 1
+        self.reloads = 0
+        self.reload_errors = 0
+        self._override_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._message_table, self._line_table = self._compile(self.header, self.messages, self.lines)
+        self.reload()
+
+    @staticmethod
+    def _compile(header: str, messages: Dict[str, str], lines: Dict[str, str]) -> Tuple[Dict[str, Renderer], Dict[str, Renderer]]:
+        return compile_table(messages, prefix=header, suffix="\n"), compile_table(lines)
+
+    def render_message(self, notice: Dict) -> str:
+        table = self._message_table
+        return (table.get(notice.get("notice_category")) or table[DEFAULT_CATEGORY])(notice)
+
+    def render_line(self, notice: Dict) -> str:
+        table = self._line_table
+        return (table.get(notice.get("notice_category")) or table[DEFAULT_CATEGORY])(notice)
+
+    def render_digests(self, notices: List[Dict], max_length: int = 1500) -> List[str]:
+        """
+        把多条通知合并为以当前消息头开头的汇总消息
+
+        单条汇总消息不超过 max_length 个字符, 超出时拆分为多条, 不丢弃通知;
+        单行本身超出长度时截断该行
+        """
+        first = f"{self.active_header}📋 {len(notices)}条通知"
+        continued = f"{self.active_header}📋 (续)"
+        # 每行都要能放进只含消息头的汇总消息(含换行符)
+        line_limit = max(1, max_length - max(len(first), len(continued)) - 1)
+        digests = []
+        current = first
+        has_lines = False
+        for notice in notices:
+            line = self.render_line(notice)
+            if len(line) > line_limit:
+                line = line[:line_limit - 1] + "…"
+            line = "\n" + line
+            if has_lines and len(current) + len(line) > max_length:
+                digests.append(current)
+                current = continued
+            current += line
+            has_lines = True
+        digests.append(current)
+        return digests
+
+    def maybe_reload(self) -> bool:
+        """距上次检查超过 reload_check_interval 时检查覆盖文件是否有修改"""
+        if not self.override_path:
+            return False
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_check_interval
+        return self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """覆盖文件有修改(或 force)时重新编译模板, 返回是否替换了模板"""
+        if not self.override_path:
+            return False
+        try:
+            mtime = os.stat(self.override_path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        except OSError as e:
+            logger.warning(f"⚠️ Cannot stat template override file: {e}")
+            return False
+        if not force and mtime == self._override_mtime:
+            return False
+
+        header, messages, lines = self.header, dict(self.messages), dict(self.lines)
+        try:
+            if mtime is not None:
+                with open(self.override_path, "r", encoding="utf-8") as f:
+                    override = json.load(f)
+                header = override.get("header", header)
+                messages.update(override.get("messages", {}))
+                lines.update(override.get("lines", {}))
+            tables = self._compile(header, messages, lines)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.reload_errors += 1
+            self._override_mtime = mtime
+            logger.error(f"❌ Failed to reload notice templates, keeping previous ones: {e}")
+            return False
+
+        # 整体替换分派表, 渲染中的调用仍使用旧表
+        self._message_table, self._line_table = tables
+        self.active_header = header
+        self._override_mtime = mtime
+        self.version += 1
+        self.reloads += 1
+        logger.info(f"✅ Notice templates reloaded from {self.override_path} (version {self.version})")
+        return True
+
+    def get_stats(self) -> Dict:
+        time_cache = format_notice_time.cache_info()
+        return {
+            "version": self.version,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "override_path": self.override_path,
+            "categories": sorted(category for category in self._message_table if category != DEFAULT_CATEGORY),
+            "time_cache_hits": time_cache.hits,
+            "time_cache_misses": time_cache.misses,
+        }
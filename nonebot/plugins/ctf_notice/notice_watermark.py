@@ -0,0 +1,50 @@
+"""
+通知高水位线去重
+
+平台的 notice_id 单调递增, 只需保存水位线和水位线以下一小段窗口内的已处理ID,
+去重状态的大小与比赛产生的通知总数无关。
+"""
+from typing import Iterable, Set
+
+class NoticeWatermark:
+    """
+    通知高水位线
+
+    notice_id 不超过水位线的通知直接跳过, 不为其保存任何状态;
+    只在水位线以下 window 个ID的范围内记录已处理ID, 用于识别乱序迟到的通知。
+    """
+
+    def __init__(self, window: int = 256):
+        self.window = window
+        self.watermark = 0
+        self._recent: Set[int] = set()
+
+    def is_new(self, notice_id: int) -> bool:
+        if notice_id > self.watermark:
+            return True
+        if notice_id <= self.watermark - self.window:
+            return False
+        return notice_id not in self._recent
+
+    def mark(self, notice_id: int):
+        self._recent.add(notice_id)
+        if notice_id > self.watermark:
+            self.watermark = notice_id
+            floor = self.watermark - self.window
+            self._recent = {i for i in self._recent if i > floor}
+
+    def reset(self, notice_ids: Iterable[int] = ()):
+        self.watermark = 0
+        self._recent = set()
+        for notice_id in notice_ids:
+            self.mark(notice_id)
+
+    def restore(self, watermark: int, recent_ids: Iterable[int] = ()):
+        """从持久化状态恢复水位线与去重窗口"""
+        self.reset(recent_ids)
+        self.watermark = max(self.watermark, watermark)
+        floor = self.watermark - self.window
+        self._recent = {i for i in self._recent if i > floor}
+
+    def recent_count(self) -> int:
+        return len(self._recent)
@@ -0,0 +1,274 @@
+"""
+群消息出站队列
+
+所有发往群聊的消息(赛事通知、积分榜回复、广告警告等)统一经过此队列:
+- 按优先级出队: 血条通知 > 提示 > 公告 > 普通回复, 同优先级内保持提交顺序
+- 每群一个有界队列和一个发送协程, 各群并发发送; 队列满时挤掉优先级最低的消息
+- 每群一个令牌桶 + 账号级共享令牌桶, 避免触发QQ风控
+- 发送失败在该群内退避重试, 最终失败的消息写入持久化的死信列表, 可手动重发
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .metrics import HistogramSet
+from .rate_limiter import AsyncTokenBucket
+from .resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# 优先级, 数值越小越先发送
+PRIORITY_BLOOD = 0
+PRIORITY_HINT = 1
+PRIORITY_ANNOUNCEMENT = 2
+PRIORITY_CHATTER = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_BLOOD: "blood",
+    PRIORITY_HINT: "hint",
+    PRIORITY_ANNOUNCEMENT: "announcement",
+    PRIORITY_CHATTER: "chatter",
+}
+
+SendFunc = Callable[[int, object], Awaitable[object]]
+SentCallback = Callable[[int], None]
+
+class _OutboundMessage:
+    __slots__ = ("group_id", "message", "priority", "send", "future", "enqueued_at", "dead_letter", "on_sent")
+
+    def __init__(self, group_id: int, message, priority: int, send: SendFunc, future: asyncio.Future,
+                 dead_letter: bool, on_sent: Optional[SentCallback] = None):
+        self.group_id = group_id
+        self.message = message
+        self.priority = priority
+        self.send = send
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.dead_letter = dead_letter
+        self.on_sent = on_sent
+
+class OutboundQueue:
+    def __init__(self, group_rate: float = 1.0, group_capacity: float = 3,
+                 account_rate: float = 4.0, account_capacity: float = 10,
+                 retry_policy: Optional[RetryPolicy] = None, max_queue_per_group: int = 50,
+                 dead_letter_path: Optional[str] = None, max_dead_letters: int = 200,
+                 max_dead_letter_chars: int = 4000):
+        self.group_rate = group_rate
+        self.group_capacity = group_capacity
+        self.account_limiter = AsyncTokenBucket(account_rate, account_capacity)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_queue_per_group = max_queue_per_group
+        self.dead_letter_path = dead_letter_path
+        self.max_dead_letters = max_dead_letters
+        self.max_dead_letter_chars = max_dead_letter_chars   # 超长消息(如base64图片)只记录摘要, 不可重发
+
+        self.group_limiters: Dict[int, AsyncTokenBucket] = {}
+        self._queues: Dict[int, list] = {}                   # 群号 -> [(优先级, 序号, 消息)] 小顶堆
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._seq = itertools.count()
+        self.latency = HistogramSet()                        # (优先级名,) -> 入队到发送完成的秒数
+        self.dead_letters: List[Dict] = self._load_dead_letters()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def _limiter_for(self, group_id: int) -> AsyncTokenBucket:
+        limiter = self.group_limiters.get(group_id)
+        if limiter is None:
+            limiter = self.group_limiters[group_id] = AsyncTokenBucket(self.group_rate, self.group_capacity)
+        return limiter
+
+    def submit(self, group_id: int, message, send: SendFunc, priority: int = PRIORITY_CHATTER,
+               dead_letter: bool = True, on_sent: Optional[SentCallback] = None) -> asyncio.Future:
+        """
+        提交一条群消息, 返回在发送成功(True)或最终失败(False)时完成的 Future
+
+        dead_letter=False 时最终失败的消息不写入死信列表(调用方自行降级处理);
+        on_sent 在发送接口返回成功后立即以群号调用, 用于统计端到端延迟
+        """
+        future = asyncio.get_running_loop().create_future()
+        item = _OutboundMessage(group_id, message, priority, send, future, dead_letter, on_sent)
+        queue = self._queues.setdefault(group_id, [])
+
+        if len(queue) >= self.max_queue_per_group:
+            # 队列已满: 新消息优先级更高时挤掉队列中优先级最低、最晚提交的消息, 否则丢弃新消息
+            worst = max(queue)
+            if (priority, float("inf")) < worst[:2]:
+                queue.remove(worst)
+                heapq.heapify(queue)
+                self._drop(worst[2], "queue full")
+            else:
+                self._drop(item, "queue full")
+                return future
+
+        heapq.heappush(queue, (priority, next(self._seq), item))
+        worker = self._workers.get(group_id)
+        if worker is None or worker.done():
+            self._workers[group_id] = asyncio.create_task(self._run_group(group_id))
+        return future
+
+    def enqueue(self, send: SendFunc, group_ids: Iterable[int], messages: List,
+                priorities: Optional[List[int]] = None,
+                on_sent: Optional[List[Optional[SentCallback]]] = None) -> Dict[int, List[asyncio.Future]]:
+        """把 messages 提交到每个群后立即返回, 不等待发送; 返回 {群号: [各条消息的 Future]}"""
+        group_ids = list(dict.fromkeys(group_ids))
+        if not group_ids or not messages:
+            return {}
+        priorities = priorities or [PRIORITY_CHATTER] * len(messages)
+        on_sent = on_sent or [None] * len(messages)
+        return {
+            group_id: [self.submit(group_id, message, send, priority, on_sent=callback)
+                       for message, priority, callback in zip(messages, priorities, on_sent)]
+            for group_id in group_ids
+        }
+
+    async def deliver(self, send: SendFunc, group_ids: Iterable[int], messages: List,
+                      priorities: Optional[List[int]] = None,
+                      on_sent: Optional[List[Optional[SentCallback]]] = None) -> Dict[int, int]:
+        """把 messages 提交到每个群并等待发送完成; 返回 {群号: 成功条数}"""
+        futures = self.enqueue(send, group_ids, messages, priorities, on_sent)
+        results = {}
+        for group_id, group_futures in futures.items():
+            results[group_id] = sum(1 for ok in await asyncio.gather(*group_futures) if ok)
+        return results
+
+    async def _run_group(self, group_id: int):
+        queue = self._queues[group_id]
+        while queue:
+            _, _, item = heapq.heappop(queue)
+            try:
+                ok = await self._send_with_retry(item)
+            except asyncio.CancelledError:
+                if not item.future.done():
+                    item.future.set_result(False)
+                raise
+            if not item.future.done():
+                item.future.set_result(ok)
+
+    async def stop(self) -> int:
+        """
+        取消所有群的发送协程, 丢弃队列中尚未发送的消息(其 Future 以 False 完成), 返回丢弃条数
+
+        停止后再提交的消息会重新启动该群的发送协程
+        """
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        discarded = 0
+        for queue in self._queues.values():
+            for _, _, item in queue:
+                if not item.future.done():
+                    item.future.set_result(False)
+            discarded += len(queue)
+            queue.clear()
+        return discarded
+
+    async def _send_with_retry(self, item: _OutboundMessage) -> bool:
+        policy = self.retry_policy
+        for attempt in range(policy.attempts):
+            await self._limiter_for(item.group_id).acquire()
+            await self.account_limiter.acquire()
+            try:
+                await item.send(item.group_id, item.message)
+                self.sent += 1
+                self.latency.observe((PRIORITY_NAMES.get(item.priority, str(item.priority)),),
+                                     time.monotonic() - item.enqueued_at)
+                if item.on_sent:
+                    try:
+                        item.on_sent(item.group_id)
+                    except Exception as e:
+                        logger.warning(f"发送完成回调失败: {e}")
+                return True
+            except Exception as e:
+                if attempt + 1 >= policy.attempts:
+                    self.failed += 1
+                    logger.warning(f"向群组 {item.group_id} 发送消息失败: {e}")
+                    if item.dead_letter:
+                        self._add_dead_letter(item, str(e))
+                    return False
+                self.retried += 1
+                delay = policy.delay(attempt)
+                logger.info(f"向群组 {item.group_id} 发送消息失败, {delay:.1f} 秒后重试: {e}")
+                await asyncio.sleep(delay)
+        return False
+
+    def _drop(self, item: _OutboundMessage, reason: str):
+        self.dropped += 1
+        logger.warning(f"群组 {item.group_id} 出站队列已满, 丢弃一条 {PRIORITY_NAMES.get(item.priority)} 消息")
+        if item.dead_letter:
+            self._add_dead_letter(item, reason)
+        if not item.future.done():
+            item.future.set_result(False)
+
+    # ---- 死信列表 ----
+
+    def _add_dead_letter(self, item: _OutboundMessage, error: str):
+        text = str(item.message)
+        resendable = len(text) <= self.max_dead_letter_chars
+        self.dead_letters.append({
+            "group_id": item.group_id,
+            "priority": item.priority,
+            "message": text if resendable else text[:200],
+            "resendable": resendable,
+            "error": error,
+            "failed_at": time.time(),
+        })
+        del self.dead_letters[:-self.max_dead_letters]
+        self._save_dead_letters()
+
+    def _load_dead_letters(self) -> List[Dict]:
+        if not self.dead_letter_path or not os.path.exists(self.dead_letter_path):
+            return []
+        try:
+            with open(self.dead_letter_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取死信列表失败: {e}")
+            return []
+
+    def _save_dead_letters(self):
+        if not self.dead_letter_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            tmp_path = f"{self.dead_letter_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.dead_letters, f, ensure_ascii=False)
+            os.replace(tmp_path, self.dead_letter_path)
+        except Exception as e:
+            logger.warning(f"保存死信列表失败: {e}")
+
+    def requeue_dead_letters(self, send: SendFunc) -> int:
+        """重新提交可重发的死信, 返回提交条数; 不可重发的记录保留"""
+        resend = [entry for entry in self.dead_letters if entry.get("resendable")]
+        self.dead_letters = [entry for entry in self.dead_letters if not entry.get("resendable")]
+        self._save_dead_letters()
+        for entry in resend:
+            self.submit(entry["group_id"], entry["message"], send, entry.get("priority", PRIORITY_CHATTER))
+        return len(resend)
+
+    # ---- 状态 ----
+
+    def depth(self) -> Dict[int, int]:
+        return {group_id: len(queue) for group_id, queue in self._queues.items() if queue}
+
+    def get_stats(self) -> Dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "queued": sum(self.depth().values()),
+            "depth": self.depth(),
+            "dead_letters": len(self.dead_letters),
+            "latency": {key[0]: summary for key, summary in self.latency.snapshot().items()},
+            "account_limiter": self.account_limiter.snapshot(),
+        }
@@ -0,0 +1,56 @@
+"""
+自适应轮询间隔
+
+- 出现新通知或处于比赛开始前后的高峰期时, 间隔收紧到下限
+- 连续空闲时按倍数退避, 直到上限
+- 收到比赛结束通知后暂停轮询
+"""
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+GAME_START_CATEGORY = "GameStart"
+GAME_END_CATEGORY = "GameEnd"
+
+def parse_game_time(value) -> Optional[float]:
+    """把配置中的比赛时间(时间戳或ISO格式字符串)转换为时间戳"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+class AdaptivePollInterval:
+    def __init__(self, base: float, floor: float, ceiling: float, backoff_factor: float = 1.5,
+                 game_start=None, hot_window: float = 3600, pause_after_game_end: bool = True):
+        self.base = base
+        self.floor = min(floor, base)
+        self.ceiling = max(ceiling, base)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.game_start = parse_game_time(game_start)
+        self.hot_window = hot_window      # 比赛开始前后多少秒内保持下限间隔
+        self.pause_after_game_end = pause_after_game_end
+        self.current = base
+        self.paused = False
+
+    def reset(self):
+        self.current = self.base
+        self.paused = False
+
+    def in_hot_window(self, now: Optional[float] = None) -> bool:
+        if self.game_start is None:
+            return False
+        now = time.time() if now is None else now
+        return abs(now - self.game_start) <= self.hot_window
+
+    def update(self, categories: Iterable[Optional[str]], now: Optional[float] = None) -> float:
+        """根据本周期新通知的类型计算下一次轮询间隔"""
+        categories = list(categories)
+        if GAME_START_CATEGORY in categories:
+            self.game_start = time.time() if now is None else now
+            self.paused = False
+        if self.pause_after_game_end and GAME_END_CATEGORY in categories:
+            self.paused = True
+        elif categories or self.in_hot_window(now):
+            self.current = self.floor
+        else:
+            self.current = min(self.ceiling, self.current * self.backoff_factor)
+        return self.current
@@ -0,0 +1,62 @@
+"""
+异步令牌桶限流器
+
+超出速率的调用按到达顺序排队等待而不是直接发出, 并记录排队等待时间以便调整配额。
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+
+class AsyncTokenBucket:
+    def __init__(self, rate: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.rate = rate                  # 每秒补充的令牌数
+        self.capacity = max(capacity, 1)  # 桶容量, 即允许的突发请求数
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()       # asyncio.Lock 按FIFO唤醒, 保证排队顺序
+        self.queued = 0                   # 当前排队中的调用数
+        self.acquired = 0
+        self.delayed = 0                  # 需要等待才拿到令牌的调用数
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """获取令牌, 令牌不足时排队等待; 返回等待秒数"""
+        start = self.clock()
+        self.queued += 1
+        try:
+            async with self._lock:
+                self._refill()
+                while self._tokens < tokens:
+                    await self.sleep((tokens - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= tokens
+        finally:
+            self.queued -= 1
+
+        waited = self.clock() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def snapshot(self) -> Dict:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "queued": self.queued,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "avg_wait": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait": round(self.max_wait, 3),
+        }
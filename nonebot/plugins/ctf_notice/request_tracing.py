@@ -0,0 +1,109 @@
+"""
+请求阶段耗时追踪
+
+通过 aiohttp.TraceConfig 记录每个请求各阶段的耗时, 按端点汇总为滚动直方图:
+- queue:   等待连接池空闲连接
+- dns:     DNS解析
+- connect: 建立连接(TCP + TLS握手, 不含DNS)
+- server:  请求头发出到收到响应头(服务端处理时间, 即TTFB)
+- body:    读取响应体 (由客户端在读取完成后记录)
+- total:   请求总耗时 (由客户端在读取完成后记录)
+
+单个阶段超过阈值时记录带URL的警告日志。
+"""
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+import aiohttp
+
+from .metrics import HistogramSet
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("queue", "dns", "connect", "server", "body", "total")
+
+# 各阶段的慢请求阈值(秒)
+DEFAULT_SLOW_THRESHOLDS = {
+    "queue": 2.0,
+    "dns": 1.0,
+    "connect": 3.0,
+    "server": 5.0,
+    "body": 5.0,
+    "total": 10.0,
+}
+
+class RequestPhaseTracer:
+    def __init__(self, classify: Callable[[str], str], slow_thresholds: Optional[Dict[str, float]] = None,
+                 max_samples: int = 512, max_age: float = 3600):
+        self.classify = classify
+        self.slow_thresholds = {**DEFAULT_SLOW_THRESHOLDS, **(slow_thresholds or {})}
+        self.histograms = HistogramSet(max_samples=max_samples, max_age=max_age)
+        self.slow_count = 0
+
+    def record(self, endpoint: str, phase: str, seconds: float, url=None):
+        self.histograms.observe((endpoint, phase), seconds)
+        threshold = self.slow_thresholds.get(phase)
+        if threshold is not None and seconds >= threshold:
+            self.slow_count += 1
+            logger.warning(f"🐢 Slow {phase} phase: {seconds:.2f}s for {endpoint} {url}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{端点: {阶段: {count, p50, p95, p99, max}}}"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        items = sorted(self.histograms.snapshot().items(), key=lambda item: (item[0][0], PHASES.index(item[0][1])))
+        for (endpoint, phase), summary in items:
+            result.setdefault(endpoint, {})[phase] = summary
+        return result
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.request_start = time.monotonic()
+            ctx.headers_sent = None
+            ctx.dns_time = 0.0
+
+        async def on_connection_queued_start(session, ctx, params):
+            ctx.queued_start = time.monotonic()
+
+        async def on_connection_queued_end(session, ctx, params):
+            ctx.queue_time = time.monotonic() - ctx.queued_start
+
+        async def on_dns_resolvehost_start(session, ctx, params):
+            ctx.dns_start = time.monotonic()
+
+        async def on_dns_resolvehost_end(session, ctx, params):
+            ctx.dns_time = time.monotonic() - ctx.dns_start
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.monotonic()
+
+        async def on_connection_create_end(session, ctx, params):
+            ctx.connect_time = time.monotonic() - ctx.connect_start - ctx.dns_time
+
+        async def on_request_headers_sent(session, ctx, params):
+            ctx.headers_sent = time.monotonic()
+
+        async def on_request_end(session, ctx, params):
+            url = params.url
+            endpoint = self.classify(str(url))
+            if hasattr(ctx, "queue_time"):
+                self.record(endpoint, "queue", ctx.queue_time, url)
+            if hasattr(ctx, "dns_start"):
+                self.record(endpoint, "dns", ctx.dns_time, url)
+            if hasattr(ctx, "connect_time"):
+                self.record(endpoint, "connect", ctx.connect_time, url)
+            server_start = ctx.headers_sent or ctx.request_start
+            self.record(endpoint, "server", time.monotonic() - server_start, url)
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_headers_sent.append(on_request_headers_sent)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
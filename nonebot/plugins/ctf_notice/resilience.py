@@ -0,0 +1,91 @@
+"""
+请求容错模块
+
+- RetryPolicy: 指数退避 + 全抖动(full jitter)的重试策略
+- CircuitBreaker: 按端点的熔断器, 平台持续异常时快速失败, 冷却后放行一个半开探测请求
+"""
+import random
+import time
+from typing import Callable, Dict, Optional
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.attempts = max(1, attempts)   # 总尝试次数(含第一次)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次失败(从0开始)后的等待时间: [0, min(max_delay, base_delay * 2^attempt)] 内均匀随机"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+# 熔断器状态
+STATE_CLOSED = "closed"          # 正常放行
+STATE_OPEN = "open"              # 熔断中, 直接拒绝
+STATE_HALF_OPEN = "half_open"    # 冷却结束, 只放行一个探测请求
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态, 请求未发出"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit for '{endpoint}' is open, retry after {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.clock = clock
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_count = 0              # 累计熔断次数
+        self.rejected_count = 0          # 熔断期间被拒绝的请求数
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.state != STATE_OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - self.clock())
+
+    def allow_request(self) -> bool:
+        """是否放行请求; 冷却结束后第一个请求作为半开探测放行, 探测完成前其余请求仍被拒绝"""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and self.retry_after() <= 0:
+            self.state = STATE_HALF_OPEN
+        if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected_count += 1
+        return False
+
+    def record_success(self):
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                self.open_count += 1
+            self.state = STATE_OPEN
+            self.opened_at = self.clock()
+
+    def release_probe(self):
+        """探测请求被取消时释放探测名额, 不计入成功或失败"""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1),
+            "open_count": self.open_count,
+            "rejected_count": self.rejected_count,
+        }
@@ -0,0 +1,99 @@
+"""
+GET响应缓存模块
+
+- 按端点(URL中的路径片段)配置缓存时间, 未匹配的端点不缓存
+- 使用LRU策略限制缓存条目数
+- 并发的相同请求共享同一个进行中的调用, 只发出一次HTTP请求
+- 提供按路径片段失效的接口, 供通知监控在积分变化时调用
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class ResponseCache:
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 128,
+                 clock: Callable[[], float] = time.monotonic):
+        # 路径片段 -> 缓存时间(秒), 按片段长度降序匹配, 越具体的配置优先
+        self.ttls = dict(sorted((ttls or {}).items(), key=lambda item: len(item[0]), reverse=True))
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (过期时间, 数据)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, url: str) -> float:
+        """获取URL对应端点的缓存时间, 0表示不缓存"""
+        for fragment, ttl in self.ttls.items():
+            if fragment in url:
+                return ttl
+        return 0
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        从缓存读取, 未命中时调用 fetch
+
+        同一 key 已有请求在进行时等待其结果而不再发起新请求; 请求失败时异常传给所有等待者, 结果不缓存。
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                # 发起者被取消, 请求仍在进行: 完成后再清理, 其他等待者不受影响
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        if ttl > 0 and value is not None:
+            self.put(key, value, ttl)
+        return value
+
+    def invalidate(self, fragment: Optional[str] = None) -> int:
+        """使URL中包含 fragment 的缓存失效, fragment 为 None 时清空全部; 返回失效的条目数"""
+        if fragment is None:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+        keys = [key for key in self._entries if fragment in key]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -11,7 +11,10 @@ from matplotlib.dates import DateFormatter
 import matplotlib.font_manager as fm
 
 from .a1ctf_client import get_a1ctf_client
+from .scoreboard_parser import ProjectedScoreboardParser
+from .resilience import CircuitOpenError
 from .config import API_CONFIG, SCOREBOARD_IMAGE_CONFIG
+from .games import get_game
 from nonebot import logger
 
 def setup_chinese_font():
@@ -50,9 +53,9 @@ setup_chinese_font()
 check_font_display()
 sns.set_style("whitegrid")  # 设置seaborn风格
 
-async def fetch_scoreboard(group_id: Optional[int] = None) -> Dict:
+async def fetch_scoreboard(group_id: Optional[int] = None, game_id: Optional[int] = None) -> Dict:
     """
-    异步获取积分榜数据，支持指定组别ID
+    异步获取积分榜数据，支持指定组别ID和比赛ID(未指定时为默认比赛)
     
     基于A1CTF API响应格式:
     {
@@ -115,8 +118,7 @@ async def fetch_scoreboard(group_id: Optional[int] = None) -> Dict:
         return {}
 
     try:
-        headers = API_CONFIG["headers"]
-        base_url = API_CONFIG["scoreboard"]["url"].split('?')[0]  # 获取基础URL
+        base_url = get_game(game_id).scoreboard_api  # 获取比赛的积分榜基础URL
         
         # 构建请求参数
         params = {"page": 1, "size": 100}
@@ -134,7 +136,10 @@ async def fetch_scoreboard(group_id: Optional[int] = None) -> Dict:
         logger.debug(f"请求URL: {url}")
         logger.debug(f"请求参数: {params}")
         
-        data = await client.request("GET", url, headers=headers, timeout=timeout)
+        # 流式投影解析: 队伍只保留 team_name/score/rank/group_id, 峰值内存不随队伍数增长
+        parser_factory = ProjectedScoreboardParser if API_CONFIG["scoreboard"].get("stream_parse") else None
+        
+        data = await client.request("GET", url, timeout=timeout, parser_factory=parser_factory)
         
         # 处理API响应
         if data.get('code') != 200:
@@ -166,6 +171,8 @@ async def fetch_scoreboard(group_id: Optional[int] = None) -> Dict:
             
         return result
         
+    except CircuitOpenError as e:
+        logger.warning(f"积分榜接口熔断中, 跳过请求: {e}")
     except aiohttp.ClientResponseError as e:
         logger.warning(f"API request failed with status: {e.status}, message: {e.message}")
     except asyncio.TimeoutError:
@@ -175,12 +182,12 @@ async def fetch_scoreboard(group_id: Optional[int] = None) -> Dict:
     
     return {}
 
-async def fetch_all_groups_info() -> List[Dict]:
-    """获取所有组别信息"""
+async def fetch_all_groups_info(game_id: Optional[int] = None) -> List[Dict]:
+    """获取比赛的所有组别信息"""
     logger.info("📡 正在获取所有组别信息...")
     
     # 获取不带group_id的数据来获取所有组别列表
-    all_data = await fetch_scoreboard()
+    all_data = await fetch_scoreboard(game_id=game_id)
     groups = all_data.get('groups', [])
     
     logger.info(f"发现 {len(groups)} 个组别:")
@@ -359,9 +366,9 @@ def plot_group_scoreboard(group_info: Dict, teams: List[Dict], timelines: List[D
         except:
             pass
 
-async def generate_scoreboard() -> Tuple[List[str], str]:
+async def generate_scoreboard(game_id: Optional[int] = None) -> Tuple[List[str], str]:
     """
-    生成所有组别的积分榜图片
+    生成比赛所有组别的积分榜图片
     
     Returns:
         Tuple[List[str], str]: (图片路径列表, 排名信息文本)
@@ -370,7 +377,8 @@ async def generate_scoreboard() -> Tuple[List[str], str]:
         logger.info("🚀 开始生成所有组别的积分榜...")
         
         # 获取所有组别信息
-        groups = await fetch_all_groups_info()
+        game = get_game(game_id)
+        groups = await fetch_all_groups_info(game.game_id)
         if not groups:
             raise ValueError("无法获取组别信息")
         
@@ -381,7 +389,7 @@ async def generate_scoreboard() -> Tuple[List[str], str]:
         os.makedirs(save_dir, exist_ok=True)
         
         image_paths = []
-        ranking_info = "🏆 Newstar 积分榜汇总\n\n"
+        ranking_info = f"🏆 {game.name} 积分榜汇总\n\n"
         
         # 为每个组别生成图片
         for group_info in groups:
@@ -392,7 +400,7 @@ async def generate_scoreboard() -> Tuple[List[str], str]:
                 logger.info(f"📊 正在处理组别: {group_name} (ID: {group_id})")
                 
                 # 获取组别数据
-                scoreboard_data = await fetch_scoreboard(group_id)
+                scoreboard_data = await fetch_scoreboard(group_id, game.game_id)
                 
                 if not scoreboard_data:
                     logger.warning(f"跳过组别 {group_name}：无法获取数据")
@@ -403,7 +411,7 @@ async def generate_scoreboard() -> Tuple[List[str], str]:
                 
                 # 生成文件路径
                 safe_group_name = group_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-                filename = f"scoreboard_group_{group_id}_{safe_group_name}.png"
+                filename = f"scoreboard_{game.game_id}_group_{group_id}_{safe_group_name}.png"
                 save_path = os.path.join(save_dir, filename)
                 
                 # 生成图表
@@ -454,12 +462,13 @@ async def generate_scoreboard() -> Tuple[List[str], str]:
         logger.error(f"❌ 生成积分榜完全失败: {e}")
         raise
 
-async def generate_single_group_scoreboard(group_id: int) -> Tuple[str, str]:
+async def generate_single_group_scoreboard(group_id: int, game_id: Optional[int] = None) -> Tuple[str, str]:
     """
     生成单个组别的积分榜图片
     
     Args:
         group_id: 组别ID
+        game_id: 比赛ID, 未指定时为默认比赛
         
     Returns:
         Tuple[str, str]: (图片路径, 排名信息文本)
@@ -468,7 +477,8 @@ async def generate_single_group_scoreboard(group_id: int) -> Tuple[str, str]:
         logger.info(f"🚀 开始生成组别 {group_id} 的积分榜...")
         
         # 获取组别信息
-        groups = await fetch_all_groups_info()
+        game = get_game(game_id)
+        groups = await fetch_all_groups_info(game.game_id)
         group_info = next((g for g in groups if g['group_id'] == group_id), None)
         
         if not group_info:
@@ -476,7 +486,7 @@ async def generate_single_group_scoreboard(group_id: int) -> Tuple[str, str]:
             group_info = {'group_id': group_id, 'group_name': f'组别{group_id}', 'team_count': 0}
         
         # 获取组别数据
-        scoreboard_data = await fetch_scoreboard(group_id)
+        scoreboard_data = await fetch_scoreboard(group_id, game.game_id)
         
         if not scoreboard_data:
             raise ValueError(f"无法获取组别 {group_id} 的数据")
@@ -491,7 +501,7 @@ async def generate_single_group_scoreboard(group_id: int) -> Tuple[str, str]:
         # 生成文件路径
         group_name = group_info['group_name']
         safe_group_name = group_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-        filename = f"scoreboard_group_{group_id}_{safe_group_name}.png"
+        filename = f"scoreboard_{game.game_id}_group_{group_id}_{safe_group_name}.png"
         save_path = os.path.join(save_dir, filename)
         
         # 生成图表
@@ -506,7 +516,7 @@ async def generate_single_group_scoreboard(group_id: int) -> Tuple[str, str]:
             raise FileNotFoundError(f"图片文件未生成: {save_path}")
         
         # 生成排名信息
-        game_name = scoreboard_data.get('name', '未知比赛')
+        game_name = scoreboard_data.get('name', game.name)
         
         ranking_info = f"🏆 {game_name} - {group_name}\n\n🏅 前三名:\n"
         
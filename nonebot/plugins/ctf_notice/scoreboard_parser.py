@@ -0,0 +1,174 @@
+"""
+积分榜响应的流式字段投影解析器
+
+积分榜响应中每支队伍都带有 team_members / solved_challenges / score_adjustments 等
+机器人用不到的大数组。本解析器随响应体分块到达增量解析, data.teams 中的队伍逐个解码后
+只保留投影字段, 立即丢弃其余内容, 因此峰值内存只与单支队伍的大小有关, 不随队伍数量增长。
+
+响应中的其它字段(top10_timelines、groups 等)按原样保留。
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+# 机器人实际使用的队伍字段
+DEFAULT_TEAM_FIELDS = ("team_name", "score", "rank", "group_id")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# 可以出现在完整标量值之后的字符
+_SCALAR_DELIMITERS = frozenset(",]} \t\n\r")
+
+# 解析状态
+_EXPECT_OBJECT = 0    # 等待对象开始 '{'
+_EXPECT_KEY = 1       # 等待键名或对象结束
+_EXPECT_COLON = 2     # 等待键名后的冒号
+_EXPECT_VALUE = 3     # 等待值
+_IN_TEAMS = 4         # 位于 data.teams 数组内
+
+class ProjectedScoreboardParser:
+    """
+    增量解析 {"code": ..., "data": {..., "teams": [...], ...}} 形式的积分榜响应
+
+    用法:
+        parser = ProjectedScoreboardParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        result = parser.close()
+    """
+
+    # 需要逐层进入而不是整体解码的对象路径
+    _DESCEND_PATHS = {("data",)}
+    # 需要逐元素流式解析的数组路径
+    _STREAM_PATH = ("data", "teams")
+
+    def __init__(self, team_fields: Iterable[str] = DEFAULT_TEAM_FIELDS, compact_after: int = 65536):
+        self.team_fields = tuple(team_fields)
+        self.compact_after = compact_after
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buf = ""
+        self._pos = 0
+        self._state = _EXPECT_OBJECT
+        self._key = None
+        self._root: Dict[str, Any] = {}
+        # 正在构建的对象栈: [(路径, 对象)]
+        self._stack: List[Tuple[Tuple[str, ...], Dict[str, Any]]] = []
+        self._teams: List[Dict[str, Any]] = []
+        self._done = False
+
+    def project(self, team: Dict[str, Any]) -> Dict[str, Any]:
+        """只保留投影字段的紧凑队伍记录"""
+        return {field: team.get(field) for field in self.team_fields}
+
+    def feed(self, chunk: bytes):
+        self._buf += self._decoder.decode(chunk)
+        self._parse(eof=False)
+
+    def close(self) -> Dict[str, Any]:
+        """输入结束, 返回解析结果; 响应体不完整时抛出 ValueError"""
+        self._buf += self._decoder.decode(b"", final=True)
+        self._parse(eof=True)
+        if not self._done:
+            raise ValueError("Incomplete scoreboard response")
+        return self._root
+
+    def _skip_ws(self):
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+
+    def _decode_value(self, eof: bool):
+        """解码当前位置的完整JSON值, 数据不足时返回 (False, None)"""
+        try:
+            value, end = self._raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f"Malformed scoreboard response at offset {self._pos}")
+            return False, None
+        # 数字位于缓冲区末尾时可能还没接收完整; 后面不是分隔符时(如 "12." 或 "1e"
+        # 停在分块边界, raw_decode 只解码到 "12" / "1")同样需要等待后续数据
+        if not eof and (end == len(self._buf) or
+                        (self._buf[self._pos] not in '"{[' and self._buf[end] not in _SCALAR_DELIMITERS)):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _parse(self, eof: bool):
+        buf_len = len(self._buf)
+        while not self._done:
+            self._skip_ws()
+            if self._pos >= buf_len:
+                break
+            char = self._buf[self._pos]
+
+            if self._state == _EXPECT_OBJECT:
+                if char != "{":
+                    raise ValueError(f"Expected '{{' at offset {self._pos}")
+                self._pos += 1
+                self._stack.append(((), self._root))
+                self._state = _EXPECT_KEY
+
+            elif self._state == _EXPECT_KEY:
+                if char == ",":
+                    self._pos += 1
+                elif char == "}":
+                    self._pos += 1
+                    self._stack.pop()
+                    if not self._stack:
+                        self._done = True
+                else:
+                    ok, key = self._decode_value(eof)
+                    if not ok:
+                        break
+                    self._key = key
+                    self._state = _EXPECT_COLON
+
+            elif self._state == _EXPECT_COLON:
+                if char != ":":
+                    raise ValueError(f"Expected ':' at offset {self._pos}")
+                self._pos += 1
+                self._state = _EXPECT_VALUE
+
+            elif self._state == _EXPECT_VALUE:
+                path, obj = self._stack[-1]
+                child_path = path + (self._key,)
+                if char == "{" and child_path in self._DESCEND_PATHS:
+                    self._pos += 1
+                    child: Dict[str, Any] = {}
+                    obj[self._key] = child
+                    self._stack.append((child_path, child))
+                    self._state = _EXPECT_KEY
+                elif char == "[" and child_path == self._STREAM_PATH:
+                    self._pos += 1
+                    obj[self._key] = self._teams
+                    self._state = _IN_TEAMS
+                else:
+                    ok, value = self._decode_value(eof)
+                    if not ok:
+                        break
+                    obj[self._key] = value
+                    self._state = _EXPECT_KEY
+
+            elif self._state == _IN_TEAMS:
+                if char == ",":
+                    self._pos += 1
+                elif char == "]":
+                    self._pos += 1
+                    self._state = _EXPECT_KEY
+                else:
+                    ok, team = self._decode_value(eof)
+                    if not ok:
+                        break
+                    self._teams.append(self.project(team))
+
+            # 丢弃已解析的部分, 避免缓冲区随响应体增长
+            if self._pos > self.compact_after:
+                self._buf = self._buf[self._pos:]
+                self._pos = 0
+                buf_len = len(self._buf)
+
+def parse_projected(body: bytes, team_fields: Iterable[str] = DEFAULT_TEAM_FIELDS, chunk_size: int = 65536) -> Dict[str, Any]:
+    """对完整响应体执行投影解析, 主要用于测试和基准对比"""
+    parser = ProjectedScoreboardParser(team_fields)
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    return parser.close()
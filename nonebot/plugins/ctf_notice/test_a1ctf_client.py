@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+A1CTF客户端单飞重新登录独立测试
+不依赖nonebot环境, 使用本地 aiohttp 服务器模拟平台的登录接口与需要登录的接口
+"""
+
+import sys
+import os
+import asyncio
+import logging
+
+from aiohttp import web
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_notice_state import check, load_plugin_module
+
+a1ctf_client = load_plugin_module("a1ctf_client")
+
+# 测试中的401与重新登录是预期行为, 不输出警告
+logging.getLogger("ctf_notice.a1ctf_client").setLevel(logging.ERROR)
+
+LOGIN_DELAY = 0.2
+
+class FakeA1CTFServer:
+    """模拟平台: 登录接口签发 a1token, 其余接口在 cookie 不是当前token时返回401"""
+
+    def __init__(self):
+        self.logins = 0
+        self.rejected = 0
+        self.token = None
+        self.app = web.Application()
+        self.app.router.add_post("/api/auth/login", self.handle_login)
+        self.app.router.add_get("/api/game/1/notices", self.handle_notices)
+
+    async def handle_login(self, request):
+        self.logins += 1
+        # 登录(含验证码校验)较慢, 让并发的401都在登录完成前到达
+        await asyncio.sleep(LOGIN_DELAY)
+        self.token = f"token-{self.logins}"
+        response = web.json_response({"code": 200})
+        response.set_cookie("a1token", self.token)
+        return response
+
+    async def handle_notices(self, request):
+        if self.token is None or request.cookies.get("a1token") != self.token:
+            self.rejected += 1
+            return web.json_response({"code": 401}, status=401)
+        return web.json_response({"code": 200, "data": [{"notice_id": int(request.query.get("i", 0))}]})
+
+    def expire_token(self):
+        self.token = f"expired-{self.logins}"
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def make_client(server: FakeA1CTFServer):
+    client = a1ctf_client.A1CTFClient(f"http://localhost:{server.port}", "tester", "secret")
+
+    async def fake_solve_captcha():
+        return "captcha-token"
+
+    # 验证码求解(工作量证明)与单飞登录无关, 直接返回固定token
+    client._solve_captcha = fake_solve_captcha
+    return client
+
+async def fetch_all(client, server: FakeA1CTFServer, count: int):
+    # 每个请求使用不同的查询参数, 避免被响应缓存合并为同一次HTTP调用
+    return await asyncio.gather(*(
+        client.request("GET", f"http://localhost:{server.port}/api/game/1/notices", params={"i": i})
+        for i in range(count)
+    ))
+
+async def test_concurrent_401():
+    """测试并发的401只触发一次登录, 其余调用方等待同一个登录结果后重放请求"""
+    print("\n🧪 并发401单飞重新登录")
+    server = FakeA1CTFServer()
+    await server.start()
+    client = make_client(server)
+    try:
+        results = await fetch_all(client, server, 4)
+        first = [
+            check("4个并发401只登录一次", server.logins == 1 and server.rejected == 4),
+            check("其余3个调用方合并到进行中的登录", client.coalesced_logins == 3),
+            check("登录后所有请求重放成功",
+                  [r["data"][0]["notice_id"] for r in results] == [0, 1, 2, 3]),
+            check("登录代数递增一次", client.login_generation == 1),
+        ]
+
+        # token过期后再次并发401: 仍只登录一次
+        server.expire_token()
+        client.response_cache.invalidate()
+        results = await fetch_all(client, server, 4)
+        second = [
+            check("token过期后再次只登录一次", server.logins == 2 and client.login_generation == 2),
+            check("第二轮的请求重放成功", all(r["code"] == 200 for r in results)),
+        ]
+    finally:
+        await client.close_session()
+        await server.stop()
+    return all(first + second)
+
+async def test_stale_generation():
+    """测试请求发出后token已被刷新时, 迟到的401不再登录"""
+    print("\n🧪 迟到的401")
+    server = FakeA1CTFServer()
+    await server.start()
+    client = make_client(server)
+    try:
+        seen = client.login_generation
+        await client.relogin()
+        logins = server.logins
+        refreshed = await client.relogin(seen)
+        results = [
+            check("以旧代数重新登录时直接返回", refreshed and server.logins == logins == 1),
+            check("计入合并的登录次数", client.coalesced_logins == 1),
+        ]
+
+        # 调用方被取消不影响共享的登录
+        waiter = asyncio.ensure_future(client.relogin(client.login_generation))
+        await asyncio.sleep(LOGIN_DELAY / 4)
+        waiter.cancel()
+        await asyncio.sleep(LOGIN_DELAY)
+        results.append(check("调用方被取消时共享的登录继续完成",
+                             server.logins == 2 and client.login_generation == 2))
+    finally:
+        await client.close_session()
+        await server.stop()
+    return all(results)
+
+def main():
+    print("=" * 60)
+    print("🚀 A1CTF客户端重新登录测试")
+    print("=" * 60)
+
+    async def run():
+        return [await test_concurrent_401(), await test_stale_generation()]
+
+    results = asyncio.run(run())
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
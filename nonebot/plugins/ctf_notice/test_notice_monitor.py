@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+通知监控调度独立测试
+以包的形式导入 notice_monitor(需要nonebot), 使用耗时的假检查函数验证检查任务的防重入与合并;
+未安装nonebot时跳过
+"""
+
+import sys
+import os
+import asyncio
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_notice_state import FakeScheduler, check, load_notice_monitor
+
+CHECK_DURATION = 0.2
+
+def reset_check_state(nm):
+    nm._check_task = None
+    nm._followup_pending = nm._include_ended_pending = False
+    nm.check_runs = nm.coalesced_runs = nm.skipped_runs = nm.joined_runs = 0
+    nm.is_monitoring = True
+    nm.game_monitors = {}
+
+async def check_overlap_guard(nm):
+    """测试定时触发不等待检查完成、重叠的触发合并为一次补充检查、手动检查加入进行中的检查"""
+    print("\n🧪 检查任务防重入")
+    reset_check_state(nm)
+    runs = []
+
+    async def slow_check(include_ended=False):
+        runs.append(include_ended)
+        await asyncio.sleep(CHECK_DURATION)
+
+    nm.check_new_notices = slow_check
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await nm.run_check()
+    first_task = nm._check_task
+    results = [
+        check("定时触发启动检查后立即返回", loop.time() - start < CHECK_DURATION / 4 and not first_task.done()),
+    ]
+
+    await asyncio.sleep(0)
+    for _ in range(3):
+        await nm.run_check()
+    results.append(check("检查进行中的定时触发合并为一次补充检查",
+                         nm.coalesced_runs == 1 and nm.skipped_runs == 2 and nm._check_task is first_task))
+
+    start = loop.time()
+    await nm.run_check(manual=True)
+    results += [
+        check("手动检查加入进行中的检查, 不另起任务", nm.joined_runs == 1 and nm._check_task is first_task),
+        check("手动检查等待检查(含补充检查)完成后返回", first_task.done() and loop.time() - start >= CHECK_DURATION),
+        check("重叠的触发只补充执行一次", nm.check_runs == 2 and len(runs) == 2),
+    ]
+
+    await nm.run_check(manual=True)
+    results.append(check("空闲时手动检查独立执行", nm.check_runs == 3 and nm._check_task is not first_task))
+    return all(results)
+
+async def check_manual_failure(nm):
+    """测试手动检查得到进行中检查的结果: 检查失败时异常传给手动检查的调用方"""
+    print("\n🧪 手动检查得到检查结果")
+    reset_check_state(nm)
+
+    async def failing_check(include_ended=False):
+        await asyncio.sleep(CHECK_DURATION / 2)
+        raise RuntimeError("boom")
+
+    nm.check_new_notices = failing_check
+    await nm.run_check()
+    try:
+        await nm.run_check(manual=True)
+        raised = False
+    except RuntimeError:
+        raised = True
+    results = [check("进行中检查的异常传给加入的手动检查", raised and nm.joined_runs == 1)]
+
+    # 异常已由手动检查取得, 下一次定时触发正常启动新的检查
+    nm.check_new_notices = lambda include_ended=False: asyncio.sleep(0)
+    await nm.run_check()
+    await nm._check_task
+    results.append(check("检查失败后定时触发重新启动检查", nm.check_runs == 2))
+    return all(results)
+
+async def check_stop_cancels_tasks(nm):
+    """测试停止监控时取消进行中的检查、待发送的汇总和出站队列中的消息"""
+    print("\n🧪 停止监控")
+    reset_check_state(nm)
+    finished = []
+
+    async def slow_check(include_ended=False):
+        await asyncio.sleep(CHECK_DURATION)
+        finished.append(True)
+
+    async def slow_send(group_id, message):
+        await asyncio.sleep(10)
+
+    nm.check_new_notices = slow_check
+    monitor = nm.GameMonitor(nm.GameInfo(1, notice_categories=[]))
+    monitor.digest_buffer.append({"notice_id": 1})
+    monitor.digest_flush_task = asyncio.create_task(asyncio.sleep(10))
+    nm.game_monitors = {1: monitor}
+    nm.scheduler = FakeScheduler()
+
+    await nm.run_check()
+    check_task = nm._check_task
+    manual = asyncio.create_task(nm.run_check(manual=True))
+    queued = [nm.outbound_queue.submit(1, f"m{i}", slow_send) for i in range(3)]
+    await asyncio.sleep(0)
+
+    await nm.stop_notice_monitor()
+    await asyncio.sleep(CHECK_DURATION * 1.5)
+    return all([
+        check("进行中的检查被取消", check_task.cancelled() and not finished),
+        check("等待中的手动检查正常返回", manual.done() and not manual.cancelled() and manual.exception() is None),
+        check("待发送的汇总被取消并清空", monitor.digest_flush_task is None and not monitor.digest_buffer),
+        check("出站队列中的消息不再发送", all(f.done() and f.result() is False for f in queued)),
+    ])
+
+def main():
+    print("=" * 60)
+    print("🚀 通知监控调度测试")
+    print("=" * 60)
+
+    nm = load_notice_monitor()
+    if nm is None:
+        return True
+
+    async def run():
+        return [await check_overlap_guard(nm), await check_manual_failure(nm), await check_stop_cancels_tasks(nm)]
+
+    results = asyncio.run(run())
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
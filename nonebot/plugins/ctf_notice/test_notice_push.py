@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+通知推送通道独立测试
+不依赖nonebot环境, 使用本地 aiohttp 服务器模拟平台的 WebSocket / SSE 推送
+"""
+
+import sys
+import os
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+from aiohttp import web
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from notice_source import PushNoticeSource, PUSH_MODE_SSE, PUSH_MODE_WEBSOCKET, extract_notices
+
+# 测试中的断线重连是预期行为, 不输出重连警告
+logging.getLogger("notice_source").setLevel(logging.ERROR)
+
+def make_notice(notice_id: int, category: str = "FirstBlood"):
+    return {
+        "notice_id": notice_id,
+        "notice_category": category,
+        "data": ["测试队伍", f"challenge_{notice_id}"],
+        "create_time": "2025-09-03T12:00:00Z",
+    }
+
+class FakePushServer:
+    """模拟平台推送: 每个连接推送 per_connection 条通知后由服务端断开"""
+
+    def __init__(self, per_connection: int = 2, reject_first: int = 0):
+        self.per_connection = per_connection
+        self.reject_first = reject_first    # 前几次握手返回401
+        self.connections = 0
+        self.next_id = 1
+        self.app = web.Application()
+        self.app.router.add_get("/ws", self.handle_ws)
+        self.app.router.add_get("/sse", self.handle_sse)
+        self.runner = None
+        self.port = None
+
+    def _take_notices(self):
+        notices = [make_notice(self.next_id + i) for i in range(self.per_connection)]
+        self.next_id += self.per_connection
+        return notices
+
+    async def handle_ws(self, request):
+        self.connections += 1
+        if self.connections <= self.reject_first:
+            raise web.HTTPUnauthorized()
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str("not json")
+        for notice in self._take_notices():
+            await ws.send_str(json.dumps(notice))
+            await asyncio.sleep(0.01)
+        await ws.close()
+        return ws
+
+    async def handle_sse(self, request):
+        self.connections += 1
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await resp.write(b": heartbeat\n\n")
+        # 以平台响应格式推送, data 字段跨多行
+        payload = json.dumps({"code": 200, "data": self._take_notices()}, indent=1)
+        body = "".join(f"data: {line}\n" for line in payload.splitlines()) + "\n"
+        await resp.write(body.encode("utf-8"))
+        await asyncio.sleep(0.05)
+        return resp
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+async def run_source(server: FakePushServer, mode: str, path: str, expected: int, authenticate=None):
+    received = []
+    states = []
+
+    async def on_notices(notices):
+        received.extend(notice["notice_id"] for notice in notices)
+
+    async def on_state_change(connected):
+        states.append(connected)
+
+    async with aiohttp.ClientSession() as session:
+        source = PushNoticeSource(
+            f"http://localhost:{server.port}{path}",
+            lambda: session,
+            on_notices,
+            on_state_change=on_state_change,
+            authenticate=authenticate,
+            mode=mode,
+            base_delay=0.05,
+            max_delay=0.1,
+        )
+        source.start()
+        deadline = time.monotonic() + 5
+        while len(received) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        await source.stop()
+    return received, states, source
+
+async def test_websocket_reconnect():
+    """测试WebSocket推送与断线重连"""
+    print("\n🧪 WebSocket推送与断线重连")
+    server = FakePushServer(per_connection=2)
+    await server.start()
+    try:
+        received, states, source = await run_source(server, PUSH_MODE_WEBSOCKET, "/ws", expected=6)
+    finally:
+        await server.stop()
+
+    ok = received[:6] == [1, 2, 3, 4, 5, 6] and source.connects >= 3
+    ok = ok and states[:2] == [True, False] and states[-1] is False
+    print(f"   收到通知: {received}, 连接 {source.connects} 次, 状态变化: {states[:6]}")
+    print(f"   {'✅ 通过' if ok else '❌ 失败'}")
+    return ok
+
+async def test_sse_multiline_event():
+    """测试SSE推送(多行data、心跳注释、平台响应格式)"""
+    print("\n🧪 SSE推送")
+    server = FakePushServer(per_connection=3)
+    await server.start()
+    try:
+        received, states, source = await run_source(server, PUSH_MODE_SSE, "/sse", expected=3)
+    finally:
+        await server.stop()
+
+    ok = received[:3] == [1, 2, 3] and source.received >= 3
+    print(f"   收到通知: {received}, 连接 {source.connects} 次")
+    print(f"   {'✅ 通过' if ok else '❌ 失败'}")
+    return ok
+
+async def test_reauthenticate_on_401():
+    """测试握手返回401时重新登录并立即重连"""
+    print("\n🧪 握手401重新登录")
+    server = FakePushServer(per_connection=1, reject_first=1)
+    await server.start()
+    auth_calls = []
+
+    async def authenticate():
+        auth_calls.append(time.monotonic())
+
+    try:
+        received, states, source = await run_source(server, PUSH_MODE_WEBSOCKET, "/ws", expected=1,
+                                                     authenticate=authenticate)
+    finally:
+        await server.stop()
+
+    ok = received[:1] == [1] and len(auth_calls) == 1
+    print(f"   收到通知: {received}, 重新登录 {len(auth_calls)} 次")
+    print(f"   {'✅ 通过' if ok else '❌ 失败'}")
+    return ok
+
+async def test_fallback_when_unreachable():
+    """测试推送服务不可达时保持未连接状态(调用方据此继续轮询)并按退避重试"""
+    print("\n🧪 推送不可达时回退")
+    received = []
+
+    async def on_notices(notices):
+        received.extend(notices)
+
+    async with aiohttp.ClientSession() as session:
+        source = PushNoticeSource("http://localhost:9/ws", lambda: session, on_notices,
+                                  base_delay=0.01, max_delay=0.02)
+        source.start()
+        await asyncio.sleep(0.3)
+        await source.stop()
+
+    ok = not source.connected and source.connects == 0 and source._failures >= 2 and not received
+    print(f"   连接 {source.connects} 次, 重试 {source._failures} 次")
+    print(f"   {'✅ 通过' if ok else '❌ 失败'}")
+    return ok
+
+def test_extract_notices():
+    """测试推送消息格式解析"""
+    print("\n🧪 推送消息格式解析")
+    cases = [
+        (make_notice(1), [1]),
+        ([make_notice(1), make_notice(2)], [1, 2]),
+        ({"code": 200, "data": [make_notice(3)]}, [3]),
+        ({"code": 200, "data": make_notice(4)}, [4]),
+        ({"type": "ping"}, []),
+        ("pong", []),
+    ]
+    ok = True
+    for payload, expected in cases:
+        result = [notice["notice_id"] for notice in extract_notices(payload)]
+        if result != expected:
+            ok = False
+            print(f"   ❌ {payload!r}: 期望 {expected}, 实际 {result}")
+    print(f"   {'✅ 通过' if ok else '❌ 失败'}")
+    return ok
+
+async def main():
+    print("=" * 60)
+    print("🚀 通知推送通道测试")
+    print("=" * 60)
+
+    results = [test_extract_notices()]
+    results.append(await test_websocket_reconnect())
+    results.append(await test_sse_multiline_event())
+    results.append(await test_reauthenticate_on_401())
+    results.append(await test_fallback_when_unreachable())
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+通知水位线与状态持久化独立测试
+水位线和 SQLite 存储不依赖nonebot环境; 重启补发测试需要nonebot, 未安装时跳过
+"""
+
+import sys
+import os
+import asyncio
+import logging
+import sqlite3
+import tempfile
+import types
+import importlib
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from notice_watermark import NoticeWatermark
+from notice_store import NoticeStore, SCHEMA_VERSION
+
+logging.getLogger("notice_store").setLevel(logging.ERROR)
+
+def check(name, condition):
+    print(f"   {'✅' if condition else '❌'} {name}")
+    return condition
+
+def test_watermark_window():
+    """测试去重窗口边界与乱序迟到的通知"""
+    print("\n🧪 水位线去重窗口")
+    w = NoticeWatermark(window=4)
+    for notice_id in (1, 2, 3, 5, 10):
+        w.mark(notice_id)
+
+    results = [
+        check("水位线为最大ID", w.watermark == 10),
+        check("已处理的水位线不是新通知", not w.is_new(10)),
+        check("水位线之后是新通知", w.is_new(11)),
+        check("窗口下边界(水位线-窗口)视为已处理", not w.is_new(6)),
+        check("窗口内未处理的ID是新通知", w.is_new(7) and w.is_new(9)),
+        check("窗口外的旧ID被丢弃", w.recent_count() == 1),
+    ]
+
+    # 乱序到达: 窗口内迟到的通知只处理一次
+    w.mark(8)
+    results.append(check("迟到的通知标记后不再重复", not w.is_new(8) and w.is_new(7)))
+    results.append(check("迟到的通知不回退水位线", w.watermark == 10))
+
+    # 水位线推进后窗口随之上移
+    w.mark(13)
+    results.append(check("窗口上移后移出的ID视为已处理", not w.is_new(9) and w.recent_count() == 2))
+    results.append(check("新窗口内未处理的ID仍是新通知", w.is_new(11) and w.is_new(12)))
+    return all(results)
+
+def test_watermark_restore():
+    """测试从持久化的水位线与已记录ID恢复"""
+    print("\n🧪 水位线恢复")
+    w = NoticeWatermark(window=4)
+    w.mark(100)
+    w.restore(20, [15, 17, 19])
+
+    results = [
+        check("恢复到保存的水位线", w.watermark == 20),
+        check("窗口内已记录的ID不再推送", not w.is_new(17) and not w.is_new(19)),
+        check("窗口内未记录的ID是新通知", w.is_new(18)),
+        check("窗口外的ID被丢弃", not w.is_new(15) and not w.is_new(16) and w.recent_count() == 2),
+        check("恢复前的状态被清空", w.is_new(100)),
+    ]
+
+    # 记录中的ID高于保存的水位线时以记录为准
+    w.restore(20, [19, 22])
+    results.append(check("记录的ID高于水位线时取最大值", w.watermark == 22 and w.is_new(20) and not w.is_new(19)))
+
+    w.restore(30)
+    results.append(check("没有记录时只恢复水位线", w.watermark == 30 and w.recent_count() == 0 and w.is_new(27)))
+    return all(results)
+
+def test_store_record_cycle():
+    """测试按比赛保存水位线与推送记录, 以及每场比赛的记录裁剪"""
+    print("\n🧪 通知状态存储")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data", "notices.db")
+        store = NoticeStore(path, max_log_rows=3)
+        results = [check("没有保存过状态时返回 None", store.load_watermark(1) is None)]
+
+        store.record_cycle(1, 5, [(i, "FirstBlood", True) for i in range(1, 6)])
+        store.record_cycle(2, 2, [(1, "NewHint", True), (2, "Announcement", False)])
+        results.append(check("保存比赛水位线", store.load_watermark(1) == 5 and store.load_watermark(2) == 2))
+        results.append(check("超过 max_log_rows 时只保留最新的记录",
+                             sorted(store.load_recent_ids(1, 0)) == [3, 4, 5]))
+        results.append(check("裁剪不影响其它比赛", sorted(store.load_recent_ids(2, 0)) == [1, 2]))
+        results.append(check("按 above 过滤记录", sorted(store.load_recent_ids(1, 3)) == [4, 5]))
+        results.append(check("统计推送记录", store.get_stats()["logged"] == 5 and store.get_stats()["delivered"] == 4))
+
+        # 空周期只推进水位线
+        store.record_cycle(1, 7, [])
+        results.append(check("空周期更新水位线", store.load_watermark(1) == 7))
+        store.close()
+
+        reopened = NoticeStore(path, max_log_rows=3)
+        results.append(check("重新打开后状态保留",
+                             reopened.load_watermark(1) == 7 and sorted(reopened.load_recent_ids(1, 0)) == [3, 4, 5]))
+        reopened.close()
+    return all(results)
+
+def test_store_migrate_v0():
+    """测试旧版(单比赛, 不含 game_id)数据库的迁移"""
+    print("\n🧪 旧版数据库迁移")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "notices.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE monitor_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE notice_log (
+                notice_id   INTEGER PRIMARY KEY,
+                category    TEXT,
+                delivered   INTEGER NOT NULL,
+                recorded_at REAL NOT NULL
+            );
+            INSERT INTO monitor_state (key, value) VALUES ('watermark', 42);
+            INSERT INTO notice_log VALUES (40, 'FirstBlood', 1, 0), (41, 'NewHint', 0, 0), (42, 'Announcement', 1, 0);
+        """)
+        conn.commit()
+        conn.close()
+
+        store = NoticeStore(path, legacy_game_id=7)
+        results = [
+            check("水位线迁移到 legacy_game_id", store.load_watermark(7) == 42),
+            check("推送记录迁移到 legacy_game_id", sorted(store.load_recent_ids(7, 0)) == [40, 41, 42]),
+            check("其它比赛没有状态", store.load_watermark(0) is None and store.load_recent_ids(0, 0) == []),
+            check("推送标记保留", store.get_stats()["delivered"] == 2),
+        ]
+        store.record_cycle(8, 3, [(3, "FirstBlood", True)])
+        results.append(check("迁移后可保存多场比赛", store.load_recent_ids(8, 0) == [3]))
+        store.close()
+
+        conn = sqlite3.connect(path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        results.append(check("更新 schema 版本并删除旧表", version == SCHEMA_VERSION and "notice_log_v0" not in tables))
+
+        reopened = NoticeStore(path, legacy_game_id=9)
+        results.append(check("已迁移的数据库不会重复迁移",
+                             reopened.load_watermark(7) == 42 and reopened.load_watermark(9) is None))
+        reopened.close()
+    return all(results)
+
+def load_plugin_module(name: str):
+    """以包的形式导入使用相对导入的插件模块(不执行插件的 __init__.py)"""
+    if "ctf_notice" not in sys.modules:
+        package = types.ModuleType("ctf_notice")
+        package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+        sys.modules["ctf_notice"] = package
+    return importlib.import_module(f"ctf_notice.{name}")
+
+def load_notice_monitor():
+    """以包的形式导入 notice_monitor(依赖nonebot与apscheduler插件), 不可用时返回 None"""
+    if "ctf_notice.notice_monitor" in sys.modules:
+        return sys.modules["ctf_notice.notice_monitor"]
+    try:
+        import nonebot
+        nonebot.init(driver="~none")
+        # 测试使用临时数据库, 不创建配置中的数据库
+        load_plugin_module("config").NOTICE_STORE_CONFIG["enabled"] = False
+        return load_plugin_module("notice_monitor")
+    except Exception as e:
+        print(f"   ⚠️ 无法导入 notice_monitor, 跳过: {e}")
+        return None
+
+def test_resume_backlog_limit():
+    """测试重启补发只推送最新的 backlog_limit 条通知, 其余只记录不推送"""
+    print("\n🧪 重启补发积压通知")
+    nm = load_notice_monitor()
+    if nm is None:
+        return True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NoticeStore(os.path.join(tmp, "notices.db"))
+        store.record_cycle(1, 10, [(i, "FirstBlood", True) for i in range(1, 11)])
+
+        delivered = []
+
+        async def fake_deliver(monitor, notices):
+            delivered.extend(notice["notice_id"] for notice in notices)
+
+        nm.notice_store = store
+        nm.deliver_notices = fake_deliver
+        nm.NOTICE_STORE_CONFIG["backlog_limit"] = 3
+        monitor = nm.GameMonitor(nm.GameInfo(1, notice_categories=[]))
+        notices = [{"notice_id": i, "notice_category": "FirstBlood", "data": []} for i in range(30, 4, -1)]
+
+        resumed = asyncio.run(nm.resume_from_store(monitor, notices))
+        rows = dict(store._conn.execute("SELECT notice_id, delivered FROM notice_log WHERE game_id = 1"))
+        results = [
+            check("从保存的水位线恢复", resumed),
+            check("只补发最新的 backlog_limit 条", delivered == [28, 29, 30]),
+            check("水位线推进到最新通知", store.load_watermark(1) == 30),
+            check("跳过的积压通知记录为未推送", all(rows[i] == 0 for i in range(11, 28))),
+            check("补发的通知记录为已推送", all(rows[i] == 1 for i in (28, 29, 30))),
+        ]
+
+        other = nm.GameMonitor(nm.GameInfo(2, notice_categories=[]))
+        results.append(check("没有保存过状态的比赛不补发", not asyncio.run(nm.resume_from_store(other, notices))))
+        store.close()
+        nm.notice_store = None
+    return all(results)
+
+class FakeScheduler:
+    def add_job(self, *args, **kwargs):
+        pass
+
+    def remove_job(self, *args, **kwargs):
+        pass
+
+def make_notices(first: int, last: int):
+    return [{"notice_id": i, "notice_category": "FirstBlood", "data": []} for i in range(last, first - 1, -1)]
+
+def test_resume_after_failed_fetch():
+    """测试启动时获取通知失败: 不保存水位线, 在第一次成功轮询时才补发(仍限制条数)或建立水位线"""
+    print("\n🧪 启动时获取通知失败")
+    nm = load_notice_monitor()
+    if nm is None:
+        return True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NoticeStore(os.path.join(tmp, "notices.db"))
+        store.record_cycle(1, 10, [(i, "FirstBlood", True) for i in range(1, 11)])
+
+        # 每场比赛依次返回的获取结果, None 表示请求失败
+        responses = {
+            1: [None, make_notices(5, 30)],
+            2: [None, make_notices(1, 5), make_notices(1, 6)],
+        }
+        delivered = {1: [], 2: []}
+
+        async def fake_fetch(game=None, since_id=None):
+            return responses[game.game_id].pop(0)
+
+        async def fake_deliver(monitor, notices):
+            delivered[monitor.game.game_id].extend(notice["notice_id"] for notice in notices)
+
+        resumed = nm.GameMonitor(nm.GameInfo(1, notice_categories=[]))
+        first_start = nm.GameMonitor(nm.GameInfo(2, notice_categories=[]))
+        nm.game_monitors = {1: resumed, 2: first_start}
+        nm.notice_store = store
+        nm.scheduler = FakeScheduler()
+        nm.fetch_notices = fake_fetch
+        nm.deliver_notices = fake_deliver
+        nm.NOTICE_STORE_CONFIG["backlog_limit"] = 3
+
+        async def run():
+            await nm.start_notice_monitor()
+            results = [
+                check("获取失败时不推送", delivered == {1: [], 2: []}),
+                check("获取失败时不保存空水位线", store.load_watermark(2) is None and store.load_watermark(1) == 10),
+                check("获取失败的比赛等待恢复", resumed.pending_resume and first_start.pending_resume),
+            ]
+
+            await nm.check_game(resumed)
+            await nm.check_game(first_start)
+            results += [
+                check("第一次成功轮询时仍只补发最新的 backlog_limit 条", delivered[1] == [28, 29, 30]),
+                check("首次启动在第一次成功轮询时建立水位线, 不推送历史通知",
+                      delivered[2] == [] and store.load_watermark(2) == 5),
+                check("恢复完成后不再等待", not resumed.pending_resume and not first_start.pending_resume),
+            ]
+
+            await nm.check_game(first_start)
+            results.append(check("建立水位线后正常推送新通知", delivered[2] == [6]))
+            await nm.stop_notice_monitor()
+            return results
+
+        results = asyncio.run(run())
+        store.close()
+        nm.notice_store = None
+    return all(results)
+
+def main():
+    print("=" * 60)
+    print("🚀 通知水位线与状态持久化测试")
+    print("=" * 60)
+
+    results = [
+        test_watermark_window(),
+        test_watermark_restore(),
+        test_store_record_cycle(),
+        test_store_migrate_v0(),
+        test_resume_backlog_limit(),
+        test_resume_after_failed_fetch(),
+    ]
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
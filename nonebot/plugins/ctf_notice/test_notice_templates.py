@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+通知汇总消息独立测试
+不依赖nonebot环境, 验证汇总消息使用模板配置的消息头、按长度拆分且单行超长时截断
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from notice_templates import NoticeTemplateEngine
+from bench_notice_templates import build_notices, load_config_value
+
+def check(name, condition):
+    print(f"   {'✅' if condition else '❌'} {name}")
+    return condition
+
+def make_engine(override_path=None) -> NoticeTemplateEngine:
+    return NoticeTemplateEngine(
+        load_config_value("MESSAGE_TEMPLATES"),
+        load_config_value("DIGEST_LINE_TEMPLATES"),
+        header=load_config_value("NOTICE_TEMPLATE_CONFIG")["header"],
+        override_path=override_path,
+    )
+
+def test_digest_header():
+    """测试汇总消息使用模板配置(及覆盖文件)中的消息头"""
+    print("\n🧪 汇总消息头")
+    header = load_config_value("NOTICE_TEMPLATE_CONFIG")["header"]
+    notices = build_notices(3)
+    digests = make_engine().render_digests(notices)
+    results = [
+        check("使用 NOTICE_TEMPLATE_CONFIG 的消息头", len(digests) == 1 and digests[0].startswith(header)),
+        check("包含通知条数和每条通知一行", "3条通知" in digests[0] and digests[0].count("\n") == header.count("\n") + 3),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "templates.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"header": "【校赛通知】\n"}, f, ensure_ascii=False)
+        engine = make_engine(path)
+        results.append(check("覆盖文件中的消息头生效", engine.render_digests(notices)[0].startswith("【校赛通知】\n")))
+        results.append(check("单条消息与汇总消息使用同一消息头",
+                             engine.render_message(notices[0]).startswith("【校赛通知】\n")))
+    return all(results)
+
+def test_digest_length():
+    """测试汇总消息不超过 max_length: 按行拆分, 单行超长时截断"""
+    print("\n🧪 汇总消息长度")
+    engine = make_engine()
+    max_length = 300
+    notices = build_notices(40)
+    digests = engine.render_digests(notices, max_length)
+    lines = sum(digest.count("\n") for digest in digests) - len(digests) * engine.active_header.count("\n")
+    results = [
+        check("超出长度时拆分为多条", len(digests) > 1 and "(续)" in digests[1]),
+        check("每条汇总不超过 max_length", all(len(digest) <= max_length for digest in digests)),
+        check("拆分不丢弃通知", lines == len(notices)),
+    ]
+
+    long_notice = {"notice_id": 1, "notice_category": "Announcement", "data": ["公告" * 500],
+                   "create_time": "2025-09-03T12:00:00Z"}
+    digests = engine.render_digests([long_notice] + notices[:2], max_length)
+    results.append(check("单行超长时截断该行", len(digests[0]) <= max_length and digests[0].rstrip().endswith("…")))
+    results.append(check("截断的行之后的通知仍然发送",
+                         sum(digest.count("\n") for digest in digests)
+                         - len(digests) * engine.active_header.count("\n") == 3))
+    return all(results)
+
+def main():
+    print("=" * 60)
+    print("🚀 通知汇总消息测试")
+    print("=" * 60)
+
+    results = [test_digest_header(), test_digest_length()]
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
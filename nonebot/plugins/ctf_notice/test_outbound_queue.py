@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+群消息出站队列独立测试
+不依赖nonebot环境, 使用假的发送函数验证优先级、重试、死信与发送完成回调
+"""
+
+import sys
+import os
+import asyncio
+import logging
+import tempfile
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_notice_state import check, load_plugin_module
+
+outbound_queue = load_plugin_module("outbound_queue")
+RetryPolicy = load_plugin_module("resilience").RetryPolicy
+
+OutboundQueue = outbound_queue.OutboundQueue
+PRIORITY_BLOOD = outbound_queue.PRIORITY_BLOOD
+PRIORITY_HINT = outbound_queue.PRIORITY_HINT
+PRIORITY_ANNOUNCEMENT = outbound_queue.PRIORITY_ANNOUNCEMENT
+PRIORITY_CHATTER = outbound_queue.PRIORITY_CHATTER
+
+# 测试中的发送失败是预期行为, 不输出重试警告
+logging.getLogger("ctf_notice.outbound_queue").setLevel(logging.ERROR)
+
+def make_queue(attempts: int = 3, **kwargs) -> OutboundQueue:
+    """限流足够宽松、重试不等待的队列"""
+    return OutboundQueue(group_rate=1000, group_capacity=1000, account_rate=1000, account_capacity=1000,
+                         retry_policy=RetryPolicy(attempts, base_delay=0, max_delay=0), **kwargs)
+
+class FakeSender:
+    """记录发送的消息; fail_times 为每条消息在成功前失败的次数(-1 表示一直失败)"""
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+        self.attempts = {}
+
+    async def __call__(self, group_id, message):
+        key = (group_id, message)
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if self.fail_times < 0 or self.attempts[key] <= self.fail_times:
+            raise RuntimeError("send failed")
+        self.sent.append(key)
+
+async def check_priority_order():
+    """测试同一群内按优先级出队, 同优先级保持提交顺序"""
+    print("\n🧪 优先级与提交顺序")
+    queue = make_queue()
+    send = FakeSender()
+    submitted = [
+        ("c1", PRIORITY_CHATTER), ("a1", PRIORITY_ANNOUNCEMENT), ("b1", PRIORITY_BLOOD),
+        ("h1", PRIORITY_HINT), ("c2", PRIORITY_CHATTER), ("b2", PRIORITY_BLOOD), ("a2", PRIORITY_ANNOUNCEMENT),
+    ]
+    # 同步提交: 发送协程在下一次让出事件循环时才开始出队
+    futures = [queue.submit(1, message, send, priority) for message, priority in submitted]
+    await asyncio.gather(*futures)
+    order = [message for _, message in send.sent]
+
+    fifo_send = FakeSender()
+    fifo = [f"m{i}" for i in range(10)]
+    results = await queue.deliver(fifo_send, [2, 3], fifo, [PRIORITY_HINT] * len(fifo))
+
+    return all([
+        check("高优先级先发送", order == ["b1", "b2", "h1", "a1", "a2", "c1", "c2"]),
+        check("同优先级按提交顺序发送",
+              [m for g, m in fifo_send.sent if g == 2] == fifo and [m for g, m in fifo_send.sent if g == 3] == fifo),
+        check("deliver 返回各群成功条数", results == {2: 10, 3: 10}),
+    ])
+
+async def check_retry_and_dead_letter():
+    """测试失败后重试, 达到 max_attempts 后写入死信列表"""
+    print("\n🧪 重试与死信")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dead_letters.json")
+        queue = make_queue(attempts=3, dead_letter_path=path)
+
+        flaky = FakeSender(fail_times=2)
+        recovered = await queue.submit(1, "flaky", flaky)
+        dead_after_retry = len(queue.dead_letters)
+        broken = FakeSender(fail_times=-1)
+        failed = await queue.submit(1, "broken", broken, PRIORITY_BLOOD)
+        silent = await queue.submit(1, "no-dead-letter", broken, dead_letter=False)
+
+        results = [
+            check("重试后成功", recovered and flaky.attempts[(1, "flaky")] == 3 and dead_after_retry == 0),
+            check("尝试 max_attempts 次后失败", not failed and broken.attempts[(1, "broken")] == 3),
+            check("最终失败写入死信列表",
+                  len(queue.dead_letters) == 1 and queue.dead_letters[0]["message"] == "broken"
+                  and queue.dead_letters[0]["priority"] == PRIORITY_BLOOD),
+            check("dead_letter=False 时不写入死信列表", not silent and len(queue.dead_letters) == 1),
+            check("统计失败与重试次数", queue.failed == 2 and queue.retried == 2 + 2 + 2 and queue.sent == 1),
+            check("死信列表持久化", len(make_queue(dead_letter_path=path).dead_letters) == 1),
+        ]
+    return all(results)
+
+async def check_requeue_dead_letters():
+    """测试重发死信: 只重新提交可重发的记录, 超长消息的摘要保留"""
+    print("\n🧪 重发死信")
+    queue = make_queue(attempts=1, max_dead_letter_chars=20)
+    broken = FakeSender(fail_times=-1)
+    await queue.submit(1, "first", broken, PRIORITY_HINT)
+    await queue.submit(2, "second", broken)
+    await queue.submit(1, "x" * 50, broken)
+
+    send = FakeSender()
+    requeued = queue.requeue_dead_letters(send)
+    await asyncio.gather(*queue._workers.values())
+
+    return all([
+        check("返回重新提交的条数", requeued == 2),
+        check("可重发的死信发送成功", sorted(send.sent) == [(1, "first"), (2, "second")]),
+        check("不可重发的记录保留", len(queue.dead_letters) == 1 and not queue.dead_letters[0]["resendable"]),
+    ])
+
+async def check_on_sent():
+    """测试发送完成回调只在发送成功时以群号调用"""
+    print("\n🧪 发送完成回调")
+    queue = make_queue(attempts=2)
+    calls = []
+
+    ok = FakeSender()
+    queue.enqueue(ok, [1, 2], ["a", "b"], on_sent=[lambda gid: calls.append(("a", gid)), None])
+    broken = FakeSender(fail_times=-1)
+    await queue.submit(3, "c", broken, on_sent=lambda gid: calls.append(("c", gid)))
+    await asyncio.gather(*queue._workers.values())
+
+    def failing_callback(group_id):
+        raise ValueError("callback failed")
+
+    survived = await queue.submit(4, "d", ok, on_sent=failing_callback)
+
+    return all([
+        check("发送成功时以群号调用回调", sorted(calls) == [("a", 1), ("a", 2)]),
+        check("发送失败时不调用回调", all(message != "c" for message, _ in calls)),
+        check("回调异常不影响发送结果", survived and (4, "d") in ok.sent),
+    ])
+
+async def check_stop():
+    """测试停止时取消发送协程并丢弃未发送的消息, 之后提交的消息正常发送"""
+    print("\n🧪 停止出站队列")
+    queue = make_queue()
+    started = asyncio.Event()
+
+    async def slow_send(group_id, message):
+        started.set()
+        await asyncio.sleep(10)
+
+    futures = [queue.submit(1, f"m{i}", slow_send) for i in range(3)] + [queue.submit(2, "other", slow_send)]
+    await started.wait()
+    discarded = await queue.stop()
+    results = [f.result() for f in futures if f.done()]
+
+    send = FakeSender()
+    resumed = await queue.submit(1, "after", send)
+
+    return all([
+        check("丢弃队列中未发送的消息", discarded == 2),
+        check("所有消息的 Future 以 False 完成(含发送中的消息)", results == [False] * 4),
+        check("停止后提交的消息正常发送", resumed and send.sent == [(1, "after")]),
+    ])
+
+def main():
+    print("=" * 60)
+    print("🚀 群消息出站队列测试")
+    print("=" * 60)
+
+    async def run():
+        return [
+            await check_priority_order(),
+            await check_retry_and_dead_letter(),
+            await check_requeue_dead_letters(),
+            await check_on_sent(),
+            await check_stop(),
+        ]
+
+    results = asyncio.run(run())
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+熔断器与令牌桶独立测试
+不依赖nonebot环境, 注入可控的时钟(和令牌桶的等待函数), 结果与实际耗时无关
+"""
+
+import sys
+import os
+import asyncio
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resilience import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+from rate_limiter import AsyncTokenBucket
+
+def check(name, condition):
+    print(f"   {'✅' if condition else '❌'} {name}")
+    return condition
+
+class FakeClock:
+    """可控时钟; sleep 不真正等待, 只把时钟向前拨"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay: float):
+        # 先让出事件循环, 其他已就绪的协程在等待开始时的时刻运行
+        self.sleeps.append(round(delay, 6))
+        await asyncio.sleep(0)
+        self.now += delay
+
+def test_circuit_breaker():
+    """测试熔断器 closed → open → half_open → closed 的状态转换"""
+    print("\n🧪 熔断器状态转换")
+    clock = FakeClock()
+    breaker = CircuitBreaker("notices", failure_threshold=3, recovery_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    results = [check("成功请求清零连续失败次数", breaker.state == STATE_CLOSED and breaker.allow_request())]
+
+    breaker.record_failure()
+    results.append(check("连续失败达到阈值时熔断", breaker.state == STATE_OPEN and breaker.open_count == 1))
+    results.append(check("熔断期间拒绝请求", not breaker.allow_request() and breaker.rejected_count == 1))
+    results.append(check("retry_after 为剩余冷却时间", breaker.retry_after() == 30))
+
+    clock.now += 29.9
+    results.append(check("冷却结束前仍拒绝", not breaker.allow_request() and breaker.state == STATE_OPEN))
+
+    clock.now += 0.1
+    results.append(check("冷却结束后放行一个半开探测请求",
+                         breaker.allow_request() and breaker.state == STATE_HALF_OPEN))
+    results.append(check("探测完成前拒绝其余请求", not breaker.allow_request() and breaker.rejected_count == 3))
+
+    breaker.record_failure()
+    results.append(check("探测失败重新熔断并重新计时",
+                         breaker.state == STATE_OPEN and breaker.open_count == 2 and breaker.retry_after() == 30))
+
+    clock.now += 30
+    breaker.allow_request()
+    breaker.release_probe()
+    results.append(check("探测被取消时释放探测名额",
+                         breaker.state == STATE_HALF_OPEN and breaker.allow_request()))
+
+    breaker.record_success()
+    results.append(check("探测成功后恢复正常",
+                         breaker.state == STATE_CLOSED and breaker.consecutive_failures == 0
+                         and breaker.retry_after() == 0 and breaker.allow_request() and breaker.allow_request()))
+    return all(results)
+
+async def check_token_bucket():
+    """测试令牌桶的突发容量、按速率补充与排队等待"""
+    print("\n🧪 令牌桶补充与等待")
+    clock = FakeClock()
+    bucket = AsyncTokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+    waits = [await bucket.acquire() for _ in range(3)]
+    results = [check("突发容量内不等待", waits == [0, 0, 0] and not clock.sleeps)]
+
+    waited = await bucket.acquire()
+    results.append(check("令牌耗尽后按速率等待", waited == 0.5 and clock.sleeps == [0.5] and bucket.delayed == 1))
+
+    clock.now += 0.25
+    waited = await bucket.acquire()
+    results.append(check("只等待不足的部分", waited == 0.25 and clock.sleeps[-1] == 0.25))
+
+    clock.now += 60
+    waits = [await bucket.acquire() for _ in range(4)]
+    results.append(check("补充不超过桶容量", waits == [0, 0, 0, 0.5]))
+
+    # 令牌耗尽时并发的调用按到达顺序依次拿到令牌
+    order = []
+
+    async def acquire(index):
+        waited = await bucket.acquire()
+        order.append((index, waited))
+
+    tasks = [asyncio.ensure_future(acquire(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    queued = bucket.queued
+    await asyncio.gather(*tasks)
+    results.append(check("并发调用按到达顺序排队", [i for i, _ in order] == [0, 1, 2] and queued == 3))
+    results.append(check("排队时间逐个累加", [w for _, w in order] == [0.5, 1.0, 1.5]))
+
+    stats = bucket.snapshot()
+    results.append(check("统计获取与等待", stats["acquired"] == 12 and stats["max_wait"] == 1.5 and stats["queued"] == 0))
+    return all(results)
+
+def main():
+    print("=" * 60)
+    print("🚀 熔断器与令牌桶测试")
+    print("=" * 60)
+
+    results = [test_circuit_breaker(), asyncio.run(check_token_bucket())]
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
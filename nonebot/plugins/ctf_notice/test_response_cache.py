@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+GET响应缓存独立测试
+不依赖nonebot环境, 使用可控时钟验证进行中请求合并、TTL过期与LRU淘汰
+"""
+
+import sys
+import os
+import asyncio
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from response_cache import ResponseCache
+
+def check(name, condition):
+    print(f"   {'✅' if condition else '❌'} {name}")
+    return condition
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeUpstream:
+    """记录上游调用次数, 每次调用等待 delay 秒后返回递增的结果"""
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"code": 200, "data": self.calls}
+
+async def test_inflight_coalescing():
+    """测试并发的相同请求只调用一次上游"""
+    print("\n🧪 进行中请求合并")
+    cache = ResponseCache({"/scoreboard": 10})
+    upstream = FakeUpstream()
+    key = "http://ctf/api/game/1/scoreboard"
+
+    first, second = await asyncio.gather(cache.get_or_fetch(key, 10, upstream), cache.get_or_fetch(key, 10, upstream))
+    results = [
+        check("两个并发的相同请求只调用一次上游", upstream.calls == 1 and first is second),
+        check("第二个请求计为合并", cache.coalesced == 1 and cache.misses == 1),
+    ]
+
+    await cache.get_or_fetch(key, 10, upstream)
+    results.append(check("TTL内再次请求命中缓存", upstream.calls == 1 and cache.hits == 1))
+
+    # 不缓存的端点(ttl=0)仍合并并发请求, 但结束后不保留结果
+    uncached = FakeUpstream()
+    await asyncio.gather(*(cache.get_or_fetch("notices", 0, uncached) for _ in range(3)))
+    await cache.get_or_fetch("notices", 0, uncached)
+    results.append(check("ttl=0 时合并并发请求但不缓存结果", uncached.calls == 2))
+
+    # 上游失败时异常传给所有等待者, 结果不缓存
+    failing = FakeUpstream(error=RuntimeError("upstream down"))
+    outcomes = await asyncio.gather(*(cache.get_or_fetch("fail", 10, failing) for _ in range(2)),
+                                    return_exceptions=True)
+    results.append(check("上游失败时异常传给所有等待者",
+                         failing.calls == 1 and all(isinstance(o, RuntimeError) for o in outcomes)))
+    failing.error = None
+    results.append(check("失败的结果不缓存", (await cache.get_or_fetch("fail", 10, failing))["data"] == 2))
+
+    # 发起者被取消时请求继续进行, 其他等待者仍拿到结果
+    slow = FakeUpstream(delay=0.1)
+    initiator = asyncio.ensure_future(cache.get_or_fetch("slow", 10, slow))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(cache.get_or_fetch("slow", 10, slow))
+    await asyncio.sleep(0.02)
+    initiator.cancel()
+    value = await waiter
+    results.append(check("发起者被取消不影响其他等待者", slow.calls == 1 and value["data"] == 1))
+    return all(results)
+
+async def test_ttl_and_eviction():
+    """测试TTL到期失效, 超出容量时淘汰最久未使用的条目"""
+    print("\n🧪 TTL过期与LRU淘汰")
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, clock=clock)
+    upstream = FakeUpstream(delay=0)
+
+    await cache.get_or_fetch("a", 5, upstream)
+    clock.now += 4.9
+    await cache.get_or_fetch("a", 5, upstream)
+    results = [check("TTL到期前命中缓存", upstream.calls == 1)]
+    clock.now += 0.1
+    await cache.get_or_fetch("a", 5, upstream)
+    results.append(check("TTL到期后重新请求", upstream.calls == 2))
+
+    cache.invalidate()
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    cache.get("a")                 # 访问 a, b 成为最久未使用的条目
+    cache.put("c", 3, 60)
+    results.append(check("达到容量时淘汰最久未使用的条目",
+                         cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3))
+    results.append(check("条目数不超过 max_entries", cache.get_stats()["entries"] == 2))
+
+    results.append(check("按路径片段失效", cache.invalidate("a") == 1 and cache.get("a") is None))
+    return all(results)
+
+def main():
+    print("=" * 60)
+    print("🚀 GET响应缓存测试")
+    print("=" * 60)
+
+    async def run():
+        return [await test_inflight_coalescing(), await test_ttl_and_eviction()]
+
+    results = asyncio.run(run())
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
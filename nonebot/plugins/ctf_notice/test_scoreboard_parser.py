@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+积分榜流式投影解析器独立测试
+不依赖nonebot环境, 在不同分块大小下与 json.loads 的结果对比
+"""
+
+import sys
+import os
+import json
+
+# 添加项目路径到sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scoreboard_parser import parse_projected, DEFAULT_TEAM_FIELDS
+from bench_json_decode import build_scoreboard
+
+CHUNK_SIZES = (1, 2, 3, 5, 7, 16, 64, 4096, 65536)
+
+def expected_projection(body: bytes):
+    """用 json.loads 解码后按解析器的规则投影队伍字段"""
+    payload = json.loads(body)
+    teams = payload.get("data", {}).get("teams")
+    if teams is not None:
+        payload["data"]["teams"] = [{field: team.get(field) for field in DEFAULT_TEAM_FIELDS} for team in teams]
+    return payload
+
+SAMPLES = [
+    ("浮点数与指数", json.dumps({"code": 200, "data": {"teams": [{"score": 5}], "x": 1e10}})),
+    ("负数与小数", json.dumps({"code": 200, "data": {"teams": [{"score": -12.5, "rank": 1}], "y": -0.001, "z": 2.5E-7}})),
+    ("标量紧邻结束符", '{"code":200,"data":{"teams":[{"score":100.25,"rank":3}],"total":12.5e+3}}'),
+    ("true/false/null", json.dumps({"code": 200, "data": {"teams": [], "ok": True, "closed": False, "current_group": None}})),
+    ("多字节字符", json.dumps({"code": 200, "data": {"name": "新生赛🏆", "teams": [{"team_name": "队伍🚩", "score": 1.5}]}},
+                          ensure_ascii=False)),
+    ("缩进格式", json.dumps({"code": 200, "data": {"teams": [{"team_name": "a", "score": 3.0e2}], "groups": [1, 2.0]}},
+                         indent=2)),
+    ("data 之后的字段", json.dumps({"code": 200, "data": {"teams": [{"score": 1}]}, "message": "ok", "ts": 1693737600.123})),
+]
+
+def test_matches_json_loads():
+    """测试各分块大小下的解析结果与 json.loads 一致"""
+    print("\n🧪 与 json.loads 对比")
+    samples = [(name, text.encode("utf-8"), CHUNK_SIZES) for name, text in SAMPLES]
+    # 大响应逐字节分块时每个分块都要重新尝试解码整支队伍, 只测试实际网络分块大小
+    samples.append(("100支队伍积分榜", build_scoreboard(100), (61, 1024, 16384, 65536)))
+
+    ok = True
+    for name, body, chunk_sizes in samples:
+        expected = expected_projection(body)
+        for chunk_size in chunk_sizes:
+            try:
+                result = parse_projected(body, chunk_size=chunk_size)
+            except ValueError as e:
+                result = f"ValueError: {e}"
+            if result != expected:
+                ok = False
+                print(f"   ❌ {name} (分块 {chunk_size}): {str(result)[:120]}")
+                break
+        else:
+            print(f"   ✅ {name}")
+    return ok
+
+def test_rejects_invalid():
+    """测试不完整或格式错误的响应抛出 ValueError"""
+    print("\n🧪 不完整/错误的响应")
+    cases = [
+        ("截断在小数点", b'{"code":200,"data":{"teams":[],"x":12.'),
+        ("截断在指数", b'{"code":200,"data":{"teams":[],"x":1e'),
+        ("缺少结束括号", b'{"code":200,"data":{"teams":[{"score":1}]}'),
+        ("非法字符", b'{"code":200,"data":{"teams":[],"x":12.x}}'),
+        ("不是对象", b'[1, 2, 3]'),
+    ]
+    ok = True
+    for name, body in cases:
+        for chunk_size in (1, 4, 65536):
+            try:
+                parse_projected(body, chunk_size=chunk_size)
+            except ValueError:
+                continue
+            ok = False
+            print(f"   ❌ {name} (分块 {chunk_size}): 未抛出 ValueError")
+            break
+        else:
+            print(f"   ✅ {name}")
+    return ok
+
+def main():
+    print("=" * 60)
+    print("🚀 积分榜流式解析器测试")
+    print("=" * 60)
+
+    results = [test_matches_json_loads(), test_rejects_invalid()]
+
+    print("\n" + "=" * 60)
+    print(f"📊 测试结果: {sum(results)}/{len(results)} 通过")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)